@@ -50,22 +50,21 @@ import requests
 import bcrypt
 
 from flask_limiter import Limiter
-from security import safe_requests
 
 sys.path.append("..")
 from pterocache import *
 from managers.authentication import login_required, login, register
 from managers.email_manager import send_email, generate_verification_token, send_verification_email, generate_reset_token, send_reset_email
-from managers.user_manager import account_get_information, get_id, get_name, instantly_delete_user, get_ptero_id
+from managers.user_manager import account_get_information, get_id, get_name, instantly_delete_user, get_ptero_id, invalidate_principal
 from managers.server_manager import improve_list_servers, delete_server as manager_delete_server
-from managers.credit_manager import convert_to_product
-from managers.utils import HEADERS
+from managers.credit_manager import convert_to_products
+from managers.ptero_client import ptero
 from managers.logging import webhook_log
 from products import products
 
 from cacheext import cache
 from managers.database_manager import DatabaseManager
-from config import PTERODACTYL_URL, RECAPTCHA_SECRET_KEY, RECAPTCHA_SITE_KEY, SUBSCRIPTION_CREDIT_PRICES
+from config import RECAPTCHA_SECRET_KEY, RECAPTCHA_SITE_KEY, SUBSCRIPTION_CREDIT_PRICES
 
 # Create a blueprint for the user routes
 user = Blueprint('user', __name__)
@@ -202,7 +201,7 @@ def index():
             servers = response['attributes']['relationships']['servers']['data']
     
     server_count = len(servers)
-    monthly_usage = sum(convert_to_product(server)['price'] for server in servers)
+    monthly_usage = sum(product['price'] for product in convert_to_products(servers))
 
     #username = DatabaseManager.execute_query(
     #    "SELECT name FROM users WHERE email = %s", 
@@ -357,7 +356,7 @@ def reset_password_confirm(token):
                 )
 
                 # Update password in panel
-                info = safe_requests.get(f"{PTERODACTYL_URL}api/application/users/{ptero_id[0]}", headers=HEADERS, timeout=60).json()['attributes']
+                info = ptero.get(f"api/application/users/{ptero_id[0]}").json()['attributes']
                 body = {
                     "username": info['username'],
                     "email": info['email'],
@@ -366,7 +365,7 @@ def reset_password_confirm(token):
                     "password": password
                 }
 
-                requests.patch(f"{PTERODACTYL_URL}api/application/users/{ptero_id[0]}", headers=HEADERS, json=body, timeout=60)
+                ptero.patch(f"api/application/users/{ptero_id[0]}", json=body)
 
                 cache.delete(token)
 
@@ -548,6 +547,7 @@ def verify_email(token):
             "UPDATE users SET email_verified_at = %s WHERE email = %s",
             (datetime.datetime.now(), email)
         )
+        invalidate_principal(email)
         cache.delete(token)
         flash('Your email has been successfully verified.')
     else:
@@ -53,19 +53,19 @@ from flask import Blueprint, request, render_template, session, flash, redirect,
 import sys
 import requests
 from threadedreturn import ThreadWithReturnValue
-from security import safe_requests
-import secrets
 
 sys.path.append("..")
 from managers.authentication import login_required, admin_required
-from managers.user_manager import get_ptero_id, get_id, get_name, check_if_user_suspended, get_user_verification_status_and_suspension_status
-from managers.server_manager import get_nodes, get_eggs, get_server_information, improve_list_servers, get_node_allocation, transfer_server
-from managers.credit_manager import get_credits, convert_to_product, use_credits, remove_credits, add_credits
+from managers.user_manager import get_ptero_id, get_id, get_name, check_if_user_suspended, get_user_verification_status_and_suspension_status, invalidate_principal
+from managers.server_manager import get_nodes, get_eggs, eggs_ready, get_server_information, improve_list_servers, get_node_allocation, transfer_server, invalidate_server
+from managers.allocations import allocation_index, is_allocation_conflict, ALLOCATION_CONFLICT_RETRIES
+from managers.credit_manager import get_credits, convert_to_product, use_credits, remove_credits
+from managers.credit_ledger import apply_credits
 from managers.logging import webhook_log
-from managers.utils import HEADERS
 from products import products
 from managers.database_manager import DatabaseManager
-from config import PTERODACTYL_URL, RECAPTCHA_SECRET_KEY, RECAPTCHA_SITE_KEY
+from managers.ptero_client import ptero
+from config import RECAPTCHA_SECRET_KEY, RECAPTCHA_SITE_KEY
 
 servers = Blueprint('servers', __name__)
 
@@ -169,7 +169,7 @@ def verify_server_ownership(server_id, user_email):
     Related Functions:
         - get_ptero_id(): Gets user's panel ID
     """
-    resp = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers/{int(server_id)}", headers=HEADERS, timeout=60).json()
+    resp = ptero.get(f"api/application/servers/{int(server_id)}").json()
     ptero_id = get_ptero_id(user_email)
     return resp['attributes']['user'] == ptero_id[0] if ptero_id else False
 
@@ -195,7 +195,7 @@ def verify_server_ownership_by_ptero_id(server_id, ptero_id):
     Related Functions:
         - get_ptero_id(): Gets user's panel ID
     """
-    resp = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers/{int(server_id)}", headers=HEADERS, timeout=60).json()
+    resp = ptero.get(f"api/application/servers/{int(server_id)}").json()
     try:
         return resp['attributes']['user'] == ptero_id if ptero_id else False
     except:
@@ -416,7 +416,7 @@ def delete_server(server_id):
         - delete_from_panel(): Removes server
         - update_resources(): Updates limits
     """
-    resp = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers/{int(server_id)}", headers=HEADERS, timeout=60).json()
+    resp = ptero.get(f"api/application/servers/{int(server_id)}").json()
     
     # Get user's pterodactyl ID
     ptero_id = DatabaseManager.execute_query(
@@ -426,7 +426,8 @@ def delete_server(server_id):
     try:
         if resp['attributes']['user'] == ptero_id[0]:
             webhook_log(f"Server with id: {server_id} was deleted by user", 0, database_log=True)
-            requests.delete(f"{PTERODACTYL_URL}api/application/servers/{int(server_id)}", headers=HEADERS, timeout=60)
+            ptero.delete(f"api/application/servers/{int(server_id)}")
+            invalidate_server(int(server_id), resp['attributes']['user'])
             return redirect(url_for('user.index'))
         else:
             webhook_log(f"Server with id {server_id} attempted deleted from user {session['email']}", 1, database_log=True)
@@ -453,15 +454,21 @@ def create_server_submit():
         flash("Failed captcha please try again")
         return redirect(url_for('servers.create_server'))
 
-    # Enforce max 2 servers for non-client users
-    role_row = DatabaseManager.execute_query(
-        "SELECT role FROM users WHERE email = %s",
+    # Role, registration time and panel id in one round trip
+    user_row = DatabaseManager.execute_query(
+        "SELECT role, created_at, pterodactyl_id FROM users WHERE email = %s",
         (session['email'],)
     )
+    role_row = (user_row[0],) if user_row else None
+    created_at_row = (user_row[1],) if user_row else None
+
+    # Enforce max 2 servers for non-client users
+    response_local = None
     if role_row and role_row[0] != 'client' and role_row[0] != 'admin' and role_row[0] != 'support':
         # Count current servers
-        ptero_id_local = get_ptero_id(session['email'])[0]
-        response_local = improve_list_servers(ptero_id_local)
+        ptero_id_local = user_row[2]
+        # Limits are enforced on a fresh list, never the cached one
+        response_local = improve_list_servers(ptero_id_local, use_cache=False)
         current_servers = []
         if response_local and 'attributes' in response_local and 'relationships' in response_local['attributes']:
             if 'servers' in response_local['attributes']['relationships']:
@@ -471,15 +478,7 @@ def create_server_submit():
             return redirect(url_for('user.index'))
 
     # Enforce 2-minute cooldown from registration (bypass if client)
-    created_at_row = DatabaseManager.execute_query(
-        "SELECT created_at FROM users WHERE email = %s",
-        (session['email'],)
-    )
-    role_row_submit = DatabaseManager.execute_query(
-        "SELECT role FROM users WHERE email = %s",
-        (session['email'],)
-    )
-    is_client_submit = bool(role_row_submit and role_row_submit[0] == 'client')
+    is_client_submit = bool(role_row and role_row[0] == 'client')
     if not is_client_submit and created_at_row and created_at_row[0] is not None:
         try:
             created_at = created_at_row[0]
@@ -515,7 +514,11 @@ def create_server_submit():
         flash("Please select a plan")
         return redirect(url_for('servers.create_server'))
 
-    node_id = request.form['node_id']
+    try:
+        node_id = int(request.form['node_id'])
+    except ValueError:
+        flash("Please select a valid node")
+        return redirect(url_for('servers.create_server'))
     egg_id = request.form['egg_id']
     
     # Check if we have a project_id in the session (set during create_server)
@@ -529,13 +532,16 @@ def create_server_submit():
         # Clear the session variable to avoid keeping it for future requests
         session.pop('project_id', None)
     else:
-        eggs = get_eggs()
+        if not eggs_ready():
+            flash("The software list is still loading, please try again in a minute.")
+            return redirect(url_for('servers.create_server'))
 
-        for egg in eggs:
-            if int(egg['egg_id']) == int(egg_id):
-                docker_image = egg['docker_image']
-                startup = egg['startup']
-                break
+        egg = next((egg for egg in get_eggs() if str(egg['egg_id']) == str(egg_id)), None)
+        if egg is None:
+            flash("Please select a valid software")
+            return redirect(url_for('servers.create_server'))
+        docker_image = egg['docker_image']
+        startup = egg['startup']
 
         # Use default environment variables
         environment = {
@@ -547,23 +553,13 @@ def create_server_submit():
         }
     
 
-    resp = safe_requests.get(f"{PTERODACTYL_URL}api/application/nodes/{node_id}/allocations?per_page=100000",
-                        headers=HEADERS, timeout=60).json()
-    
-    allocs = resp['data']
-    secrets.SystemRandom().shuffle(allocs)
-    alloac_id = None
-    for allocation in allocs:
-        if not allocation['attributes']['assigned']:
-            alloac_id = allocation['attributes']['id']
-            break
-            
-    if alloac_id is None:
+    if allocation_index.free_count(node_id) == 0:
         flash("Selected node is full. Please choose a different node.")
         return redirect(url_for('servers.create_server'))
             
-    ptero_id = get_ptero_id(session['email'])[0]
-    response = improve_list_servers(ptero_id) #improved
+    ptero_id = user_row[2]
+    # Reuse the fresh list from the server limit check when there was one
+    response = response_local if response_local is not None else improve_list_servers(ptero_id, use_cache=False)
     
     # Extract servers from the response
     servers_list = []
@@ -593,10 +589,6 @@ def create_server_submit():
                 found_product = True
                 main_product = product
                 credits_used = main_product['price'] / 30 / 24
-                res = remove_credits(session['email'], credits_used)
-                if res == "SUSPEND":
-                    flash("You are out of credits")
-                    return redirect(url_for('user.index'))
     except (ValueError, TypeError):
         flash("Please select a valid plan")
         return redirect(url_for('servers.create_server'))
@@ -604,31 +596,64 @@ def create_server_submit():
     if not found_product:
         return "You already have free server"
 
-    if check_if_user_suspended(str(get_ptero_id(session['email'])[0])):
+    if check_if_user_suspended(str(ptero_id)):
         return ("Your Account has been suspended for breaking our TOS, if you believe this is a mistake you can submit "
                 "appeal at panel@lunes.host")
 
-    body = {
-        "name": request.form['name'],
-        "user": session['pterodactyl_id'][0],
-        "egg": egg_id,
-        "docker_image": docker_image,
-        "startup": startup,
-        "limits": main_product['limits'],
-        "feature_limits": main_product['product_limits'],
-        "allocation": {
-            "default": alloac_id
-        },
-        "environment": environment  # Use the environment variables we determined earlier
-    }
+    email = session['email']
+    # The debit, the panel create and any refund are one unit of work: the charge is only
+    # committed together with the outcome, so a crash in between rolls it back instead of
+    # losing credits. The user's row stays locked for the duration of the panel call.
+    with DatabaseManager.transaction() as cursor:
+        if apply_credits(email, -credits_used, "server_create", cursor=cursor) is None:
+            flash("You are out of credits")
+            return redirect(url_for('user.index'))
 
-    res: dict = requests.post(f"{PTERODACTYL_URL}api/application/servers", headers=HEADERS, json=body, timeout=60).json()
+        # Reserved last so the early returns above don't hold a lease
+        alloac_id = get_node_allocation(node_id)
+        if alloac_id is None:
+            apply_credits(email, credits_used, "server_create_refund", allow_negative=True, cursor=cursor)
+            flash("Selected node is full. Please choose a different node.")
+            return redirect(url_for('servers.create_server'))
+
+        body = {
+            "name": request.form['name'],
+            "user": session['pterodactyl_id'][0],
+            "egg": egg_id,
+            "docker_image": docker_image,
+            "startup": startup,
+            "limits": main_product['limits'],
+            "feature_limits": main_product['product_limits'],
+            "allocation": {
+                "default": alloac_id
+            },
+            "environment": environment  # Use the environment variables we determined earlier
+        }
 
-    error = res.get('errors', None)
-    if error is not None:
-        flash("Failed to create server try a different node or open a ticket")
-        add_credits(session['email'], credits_used, False)
-        webhook_log(f"Server was just created: ```{res}```", database_log=True)
+        response = ptero.post("api/application/servers", json=body)
+        # Leases are per process, so the panel is the final guard against a shared allocation
+        for _ in range(ALLOCATION_CONFLICT_RETRIES):
+            if not is_allocation_conflict(response):
+                break
+            allocation_index.discard(alloac_id)
+            alloac_id = get_node_allocation(node_id)
+            if alloac_id is None:
+                break
+            body["allocation"]["default"] = alloac_id
+            response = ptero.post("api/application/servers", json=body)
+        res: dict = response.json()
+        invalidate_server(res.get('attributes', {}).get('id'), ptero_id)
+
+        error = res.get('errors', None)
+        if error is not None:
+            if is_allocation_conflict(response):
+                allocation_index.discard(alloac_id)
+            else:
+                allocation_index.release(alloac_id)
+            flash("Failed to create server try a different node or open a ticket")
+            apply_credits(email, credits_used, "server_create_refund", allow_negative=True, cursor=cursor)
+            webhook_log(f"Server was just created: ```{res}```", database_log=True)
+    invalidate_principal(email)
     webhook_log(f"Server was just created: ```{res}```", database_log=True)
     return redirect(url_for('user.index'))
 
@@ -674,7 +699,7 @@ def update_server_submit(server_id, bypass_owner_only: bool = False):
     """
     Update server configuration.
     """
-    resp_thread = ThreadWithReturnValue(target=requests.get, args=(f"{PTERODACTYL_URL}api/application/servers/{int(server_id)}", ), kwargs={"headers": HEADERS})
+    resp_thread = ThreadWithReturnValue(target=ptero.get, args=(f"api/application/servers/{int(server_id)}", ))
     resp_thread.start()
     webhook_log(f"Server update with id: {server_id} was attempted", database_log=True)
     
@@ -683,7 +708,7 @@ def update_server_submit(server_id, bypass_owner_only: bool = False):
                 "apeal at panel@lunes.host")
 
     ptero_id = get_ptero_id(session['email'])[0]
-    response = improve_list_servers(ptero_id) #improved
+    response = improve_list_servers(ptero_id, use_cache=False)
     
     # Extract servers from the response
     servers_list = []
@@ -723,7 +748,7 @@ def update_server_submit(server_id, bypass_owner_only: bool = False):
                 
                 # Only check credits if not downgrading to free plan
                 if bypass_owner_only is False and not is_free_plan:
-                    res = remove_credits(session['email'], credits_used)
+                    res = remove_credits(session['email'], credits_used, reason="server_update")
                     if res == "SUSPEND":
                         flash("You are out of credits")
                         return redirect(url_for('index'))
@@ -737,8 +762,8 @@ def update_server_submit(server_id, bypass_owner_only: bool = False):
     body = main_product['limits']
     body["feature_limits"] = main_product['product_limits']
     body['allocation'] = resp['attributes']['allocation']
-    _resp2 = requests.patch(f"{PTERODACTYL_URL}api/application/servers/{int(server_id)}/build", headers=HEADERS,
-                           json=body, timeout=60)
+    _resp2 = ptero.patch(f"api/application/servers/{int(server_id)}/build", json=body)
+    invalidate_server(int(server_id), resp['attributes']['user'])
     return redirect(url_for('index'))
 
 @servers.route('/transfer/<server_id>')
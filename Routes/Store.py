@@ -340,7 +340,7 @@ def stripe_webhook():
                 webhook_log(f"Subscription invoice {invoice_id} missing user email", database_log=True)
                 return "", 200
 
-            add_credits(user_email, int(credits_to_add))
+            add_credits(user_email, int(credits_to_add), reason="subscription")
             _mark_invoice_processed(invoice_id)
             webhook_log(
                 f"Subscription payment succeeded: {user_email} credited {int(credits_to_add)} (invoice {invoice_id})",
@@ -464,7 +464,7 @@ def success():
             flash("Failed please open a ticket")
             return redirect(url_for("user.index"))
             #return url_for('index')
-        add_credits(check_session['customer_email'], credits_to_add)
+        add_credits(check_session['customer_email'], credits_to_add, reason="purchase")
         webhook_log(f"**NEW PAYMENT ALERT**: User with email: {check_session['customer_email']} bought {credits_to_add} credits.", database_log=True)
         # Clear session payment identifiers so refresh can't double-credit
         session.pop('pay_id', None)
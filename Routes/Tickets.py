@@ -112,29 +112,29 @@ def create_ticket_submit():
         flash("You already have an open ticket. Please close it before creating a new one.")
         return redirect(url_for('tickets.tickets_index'))
 
-    # Get next ticket ID
-    ticket_id = DatabaseManager.execute_query(
-        "SELECT * FROM tickets ORDER BY id DESC LIMIT 0, 1"
-    )
-    ticket_id = 0 if ticket_id is None else ticket_id[0] + 1
-    
-    # Create ticket
-    DatabaseManager.execute_query(
-        "INSERT INTO tickets (id, user_id, title, status, created_at) VALUES (%s, %s, %s, %s, %s)",
-        (ticket_id, user_id, title, "open", timestamp)
-    )
- 
-    # Get next comment ID
-    comment_id = DatabaseManager.execute_query(
-        "SELECT * FROM ticket_comments ORDER BY id DESC LIMIT 0, 1"
-    )
-    comment_id = 0 if comment_id is None else comment_id[0] + 1
-    
-    # Add initial message
-    DatabaseManager.execute_query(
-        "INSERT INTO ticket_comments (id, ticket_id, user_id, ticketcomment, created_at) VALUES (%s, %s, %s, %s, %s)",
-        (comment_id, ticket_id, user_id, message, timestamp)
-    )
+    # The ticket and its first message are written as one unit
+    with DatabaseManager.transaction() as cursor:
+        # Get next ticket ID
+        cursor.execute("SELECT * FROM tickets ORDER BY id DESC LIMIT 0, 1")
+        ticket_id = cursor.fetchone()
+        ticket_id = 0 if ticket_id is None else ticket_id[0] + 1
+
+        # Create ticket
+        cursor.execute(
+            "INSERT INTO tickets (id, user_id, title, status, created_at) VALUES (%s, %s, %s, %s, %s)",
+            (ticket_id, user_id, title, "open", timestamp)
+        )
+
+        # Get next comment ID
+        cursor.execute("SELECT * FROM ticket_comments ORDER BY id DESC LIMIT 0, 1")
+        comment_id = cursor.fetchone()
+        comment_id = 0 if comment_id is None else comment_id[0] + 1
+
+        # Add initial message
+        cursor.execute(
+            "INSERT INTO ticket_comments (id, ticket_id, user_id, ticketcomment, created_at) VALUES (%s, %s, %s, %s, %s)",
+            (comment_id, ticket_id, user_id, message, timestamp)
+        )
 
     webhook_log(f"Ticket created by `{session['email']}` with title `{title}` https://betadash.lunes.host/tickets/{ticket_id}", is_ticket=True)
     ticket_url = url_for('tickets.ticket', ticket_id=ticket_id, _external=True)
@@ -13,6 +13,7 @@ Modules:
 - nodes.py: Node management routes
 - dashboard.py: Admin dashboard routes
 - activity_logs.py: Activity logs management routes
+- server_actions.py: Server action queue and dead-letter routes
 
 Access Control:
 -------------
@@ -32,5 +33,6 @@ from Routes.admin.tickets import *
 from Routes.admin.nodes import *
 from Routes.admin.activity_logs import *
 from Routes.admin.stats import *
+from Routes.admin.server_actions import *
 
 # All routes are registered to the admin blueprint in their respective modules
@@ -28,125 +28,201 @@ from flask import render_template, request, session, redirect, url_for, flash, j
 from managers.authentication import admin_required
 from Routes.admin import admin
 from managers.database_manager import DatabaseManager
+from managers.logging import STATUS_MAP
 import json
+import re
+
+# Search results are counted up to this many rows, beyond that the count shows as "N+"
+SEARCH_COUNT_CAP = 10000
+
+# Columns shown in the list; the message is pulled out of the JSON content by MySQL
+LIST_COLUMNS = (
+    "id, create_time, status, is_ticket, "
+    "IF(JSON_VALID(content), JSON_UNQUOTE(JSON_EXTRACT(content, '$.message')), content)"
+)
+
+# InnoDB's default full-text stopword list (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD)
+INNODB_STOPWORDS = frozenset((
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from", "how",
+    "i", "in", "is", "it", "la", "of", "on", "or", "that", "the", "this", "to", "was", "what",
+    "when", "where", "who", "will", "with", "und", "www"
+))
+
+# Used when the server's innodb_ft_min_token_size can't be read; longer words aren't indexed at all
+FT_DEFAULT_MIN_TOKEN_SIZE = 3
+FT_MAX_TOKEN_SIZE = 84
+_ft_min_token_size = None
+
+# Emails, numeric ids and uuids are split into fragments by the full-text parser; match them with LIKE
+LIKE_ONLY_TERM = re.compile(r"^(\S+@\S+|\d+|[0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12})$")
+
+def fulltext_min_token_size() -> int:
+    """ innodb_ft_min_token_size of the server, read once; shorter words aren't in the index """
+    global _ft_min_token_size
+    if _ft_min_token_size is None:
+        try:
+            row = DatabaseManager.execute_query("SELECT @@innodb_ft_min_token_size")
+            _ft_min_token_size = int(row[0]) if row and row[0] is not None else FT_DEFAULT_MIN_TOKEN_SIZE
+        except Exception:
+            _ft_min_token_size = FT_DEFAULT_MIN_TOKEN_SIZE
+    return _ft_min_token_size
+
+def build_search(search_term: str):
+    """
+    Turns a search term into a WHERE fragment and its parameters.
+    
+    Words the FULLTEXT index can match (at least innodb_ft_min_token_size characters
+    and not an InnoDB stopword) become required prefix matches; the LIKE then keeps
+    only rows containing the exact term. A required stopword or short word would
+    match nothing, so those are left to the LIKE. Emails and ids, and terms with no
+    indexable word, fall back to LIKE alone.
+    
+    Args:
+        search_term: Text typed by the admin
+    
+    Returns:
+        tuple: (sql fragment, params list)
+    """
+    like = f"%{search_term}%"
+    if LIKE_ONLY_TERM.match(search_term.strip()):
+        return "content LIKE %s", [like]
+    min_size = fulltext_min_token_size()
+    words = [
+        word for word in re.findall(r"\w+", search_term)
+        if min_size <= len(word) <= FT_MAX_TOKEN_SIZE and word.lower() not in INNODB_STOPWORDS
+    ]
+    if not words:
+        return "content LIKE %s", [like]
+    against = " ".join(f"+{word}*" for word in words)
+    return "MATCH(content) AGAINST (%s IN BOOLEAN MODE) AND content LIKE %s", [against, like]
+
+def approximate_log_count(where: str, params: list):
+    """
+    Returns (count, is_capped) without counting the whole table.
+    
+    Unfiltered counts use InnoDB's row estimate; filtered counts stop at
+    SEARCH_COUNT_CAP rows.
+    """
+    if not where:
+        result = DatabaseManager.execute_query(
+            "SELECT TABLE_ROWS FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = 'activity_logs'"
+        )
+        return (int(result[0] or 0) if result else 0), False
+    result = DatabaseManager.execute_query(
+        f"SELECT COUNT(*) FROM (SELECT 1 FROM activity_logs WHERE {where} LIMIT %s) AS capped",
+        tuple(params + [SEARCH_COUNT_CAP + 1])
+    )
+    count = int(result[0]) if result else 0
+    return min(count, SEARCH_COUNT_CAP), count > SEARCH_COUNT_CAP
 
 @admin.route("/activity_logs")
 @admin_required
 def activity_logs():
     """
-    Display paginated list of activity logs with search functionality.
+    Display activity logs newest first with cursor pagination, search and status filter.
     
     Query Parameters:
-        - page: Current page number (default 1)
+        - before: Show logs older than this log ID (next page)
+        - after: Show logs newer than this log ID (previous page)
         - search: Optional search term
+        - status: Optional status filter (Info, Warning, Error, Success, Debug, No Code)
         
     Templates:
         - admin/activity_logs.html: Activity logs management interface
         
     Database Queries:
-        - Get paginated activity logs list
-        - Count total activity logs
+        - Get one page of activity logs by ID cursor
+        - Approximate count of matching logs
         
     Process:
         1. Verify admin status
-        2. Parse pagination parameters
-        3. Execute search if term provided
-        4. Fetch activity logs data
+        2. Parse cursor and filter parameters
+        3. Build full-text search / status filter
+        4. Fetch one page past the cursor
         
     Returns:
         template: admin/activity_logs.html with:
-            - logs: Paginated activity logs list
-            - total_logs: Total logs count
-            - current_page: Active page number
+            - logs: Activity logs on this page
+            - total_logs: Approximate matching logs count
+            - total_capped: Whether the count stopped at SEARCH_COUNT_CAP
+            - newer_cursor / older_cursor: IDs for the previous / next page links
             - search_term: Current search filter
+            - status_filter: Current status filter
     """
 
     # Get query parameters
-    page = int(request.args.get('page', 1))
+    before = request.args.get('before', type=int)
+    after = request.args.get('after', type=int)
     search_term = request.args.get('search', '').strip()
+    status_filter = request.args.get('status', '').strip()
     per_page = 100
     
-    # Prepare base queries
-    base_query = "SELECT id, create_time, content FROM activity_logs"
-    count_query = "SELECT COUNT(*) FROM activity_logs"
+    # Build filters shared by the page and count queries
+    filters = []
+    params = []
+    if search_term:
+        fragment, fragment_params = build_search(search_term)
+        filters.append(fragment)
+        params += fragment_params
+    if status_filter:
+        filters.append("status = %s")
+        params.append(status_filter)
+    where = " AND ".join(filters)
     
-    # Prepare search and pagination parameters
-    search_params = []
+    # Keyset pagination on the primary key: no OFFSET, so deep pages cost the same as the first
+    page_filters = list(filters)
+    page_params = list(params)
+    if after is not None:
+        page_filters.append("id > %s")
+        page_params.append(after)
+        order = "ASC"
+    else:
+        if before is not None:
+            page_filters.append("id < %s")
+            page_params.append(before)
+        order = "DESC"
     
-    # Apply search if term exists
-    if search_term:
-        base_query += " WHERE content LIKE %s"
-        count_query += " WHERE content LIKE %s"
-        search_params = [f'%{search_term}%']
+    query = f"SELECT {LIST_COLUMNS} FROM activity_logs"
+    if page_filters:
+        query += " WHERE " + " AND ".join(page_filters)
+    # One extra row tells us whether another page exists in this direction
+    query += f" ORDER BY id {order} LIMIT %s"
+    rows = DatabaseManager.execute_query(query, tuple(page_params + [per_page + 1]), fetch_all=True) or []
     
-    # Add sorting and pagination
-    base_query += " ORDER BY create_time DESC LIMIT %s OFFSET %s"
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if order == "ASC":
+        rows.reverse()
     
-    # Prepare final parameters
-    if search_term:
-        # For count query, use search params
-        count_params = tuple(search_params)
-        # For main query, add pagination params
-        query_params = tuple(search_params + [per_page, (page - 1) * per_page])
-    else:
-        # No search, just use pagination params
-        count_params = tuple()
-        query_params = (per_page, (page - 1) * per_page)
-    
-    # Execute count query
-    total_logs_result = DatabaseManager.execute_query(count_query, count_params)
-    total_logs = total_logs_result[0] if total_logs_result else 0
-    
-    # Execute logs query
-    logs_from_db = DatabaseManager.execute_query(base_query, query_params, fetch_all=True)
-    
-    # Process logs
-    formatted_logs = []
-    if logs_from_db:
-        for log in logs_from_db:
-            log_id = log[0]
-            create_time = log[1]
-            
-            # Parse JSON content
-            try:
-                content_json = json.loads(log[2])
-                # Format the content for display
-                status = content_json.get('status', 'Unknown')
-                message = content_json.get('message', '')
-                non_embed_message = content_json.get('non_embed_message', '')
-                is_ticket = content_json.get('is_ticket', False)
-                
-                formatted_logs.append({
-                    "id": log_id,
-                    "create_time": create_time,
-                    "status": status,
-                    "message": message,
-                    "non_embed_message": non_embed_message,
-                    "is_ticket": is_ticket,
-                    "raw_content": log[2]  
-                })
-            except json.JSONDecodeError:
-                # Handle non-JSON content
-                formatted_logs.append({
-                    "id": log_id,
-                    "create_time": create_time,
-                    "status": "Unknown",
-                    "message": log[2],
-                    "non_embed_message": "",
-                    "is_ticket": False,
-                    "raw_content": log[2]
-                })
-    
-    # Calculate total pages
-    total_pages = max(1, (total_logs + per_page - 1) // per_page)
+    formatted_logs = [{
+        "id": row[0],
+        "create_time": row[1],
+        "status": row[2] or "Unknown",
+        "is_ticket": bool(row[3]),
+        "message": row[4] or ""
+    } for row in rows]
+    
+    # Cursors for the neighbouring pages
+    newer_cursor = None
+    older_cursor = None
+    if formatted_logs:
+        if (after is not None and has_more) or (after is None and before is not None):
+            newer_cursor = formatted_logs[0]["id"]
+        if after is not None or has_more:
+            older_cursor = formatted_logs[-1]["id"]
+    
+    total_logs, total_capped = approximate_log_count(where, params)
     
     return render_template(
         "admin/activity_logs.html", 
         logs=formatted_logs, 
-        total_pages=total_pages, 
-        current_page=page, 
         total_logs=total_logs,
-        search_term=search_term
+        total_capped=total_capped,
+        newer_cursor=newer_cursor,
+        older_cursor=older_cursor,
+        search_term=search_term,
+        status_filter=status_filter,
+        statuses=[info["title"] for info in STATUS_MAP.values()]
     )
 
 @admin.route("/activity_logs/view/<int:log_id>")
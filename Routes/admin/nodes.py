@@ -31,7 +31,8 @@ All routes are protected by admin_required verification
 from flask import render_template, request, session, redirect, url_for, flash
 from managers.authentication import admin_required
 from Routes.admin import admin
-from managers.server_manager import get_nodes, get_all_servers, transfer_server, get_node_allocation
+from managers.server_manager import get_nodes, get_all_servers, transfer_server
+from managers.allocations import allocation_index
 import sys
 import threading
 import time
@@ -154,8 +155,7 @@ def do_transfers(node_servers, num_servers, target_node):
         attempted += 1
         
         # Check if allocation is available before attempting transfer
-        allocation = get_node_allocation(target_node)
-        if allocation is None:
+        if allocation_index.free_count(target_node) == 0:
             print(f"Skipping server {server_id} - No free allocations on node {target_node}")
             skipped += 1
             continue
@@ -0,0 +1,72 @@
+"""
+Admin Server Actions Routes
+=================
+
+This module shows the server action queue (managers.server_actions) to admins:
+queue counts per status and the dead-letter list of actions that ran out of
+attempts, which can be retried or dismissed.
+
+Templates Used:
+-------------
+- admin/server_actions.html: Queue counts and dead-letter list
+
+Database Tables Used:
+------------------
+- server_actions: Queued server suspend/unsuspend/delete actions
+
+Access Control:
+-------------
+All routes are protected by admin_required verification
+"""
+
+from flask import render_template, redirect, url_for, flash
+from managers.authentication import admin_required
+from Routes.admin import admin
+from managers.server_actions import action_counts, get_dead_actions, retry_action, dismiss_action
+
+
+@admin.route('/server_actions')
+@admin_required
+def server_actions():
+    """
+    Display queue counts and dead-lettered server actions.
+
+    Returns:
+        template: admin/server_actions.html
+    """
+    return render_template(
+        'admin/server_actions.html',
+        counts=action_counts(),
+        dead_actions=get_dead_actions()
+    )
+
+
+@admin.route('/server_actions/<int:action_id>/retry', methods=['POST'])
+@admin_required
+def retry_server_action(action_id):
+    """
+    Put a dead action back in the queue with a fresh attempt count.
+    Its reason is checked again before it runs.
+
+    Returns:
+        redirect: To the server actions page
+    """
+    if retry_action(action_id):
+        flash(f'Action {action_id} queued for retry', 'success')
+    else:
+        flash(f'Action {action_id} was not retried: a newer action for the server is queued', 'error')
+    return redirect(url_for('admin.server_actions'))
+
+
+@admin.route('/server_actions/<int:action_id>/dismiss', methods=['POST'])
+@admin_required
+def dismiss_server_action(action_id):
+    """
+    Mark a dead action as done without running it.
+
+    Returns:
+        redirect: To the server actions page
+    """
+    dismiss_action(action_id)
+    flash(f'Action {action_id} dismissed', 'success')
+    return redirect(url_for('admin.server_actions'))
@@ -30,17 +30,15 @@ All routes are protected by admin_required verification
 
 from flask import render_template, request, session, redirect, url_for, flash
 from managers.authentication import admin_required
-from managers.utils import HEADERS
 from managers.user_manager import get_ptero_id
 from managers.server_manager import get_server_information, delete_server, suspend_server, unsuspend_server
 from managers.credit_manager import convert_to_product
 from managers.logging import webhook_log
 from Routes.admin import admin
 from managers.database_manager import DatabaseManager
-from config import PTERODACTYL_URL
+from managers.inventory import inventory
 from products import products
 import sys
-from security import safe_requests
 
 sys.path.append("..")
 
@@ -58,7 +56,7 @@ def admin_servers():
         - admin/servers.html: Server overview list
         
     API Calls:
-        - Pterodactyl: List all servers
+        - Server inventory: List all servers (shared snapshot)
         
     Returns:
         template: admin/servers.html with:
@@ -72,9 +70,8 @@ def admin_servers():
     search_term = request.args.get('search', '').strip().lower()  # Convert to lowercase once
     per_page = 20
     
-    # Get all servers from Pterodactyl
-    resp = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers?per_page=100000", headers=HEADERS, timeout=60).json()
-    all_servers = resp['data']
+    # Get all servers from the shared inventory
+    all_servers = inventory.servers() or []
     
     # Filter servers based on search term (server ID or name)
     filtered_servers = []
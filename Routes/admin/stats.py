@@ -9,6 +9,10 @@ Provides aggregated platform statistics for administrators.
 - Total servers (from Pterodactyl)
 - Total free vs paid servers
 - Plan popularity (bar chart data)
+- Trends over the last 7 days (line chart data)
+
+Numbers come from the materialised snapshot in managers.stats, refreshed on a
+schedule, so the page doesn't query totals or download the server list.
 
 Templates:
 - admin/stats.html
@@ -20,11 +24,7 @@ Access Control:
 from flask import render_template
 from Routes.admin import admin
 from managers.authentication import admin_required
-from managers.database_manager import DatabaseManager
-from managers.credit_manager import convert_to_product
-from managers.utils import HEADERS
-from config import PTERODACTYL_URL
-from security import safe_requests
+from managers.stats import get_stats, get_stats_history
 
 def shorten_number(n):
     """
@@ -49,79 +49,38 @@ def shorten_number(n):
 @admin_required
 def admin_stats():
     """
-    Render the admin statistics dashboard with totals and chart data.
+    Render the admin statistics dashboard from the latest stats snapshot,
+    with trend data from the snapshot history.
     """
-    # Totals from DB
-    total_users = DatabaseManager.execute_query("SELECT COUNT(*) FROM users")
-    total_users = int(total_users[0]) if total_users else 0
-
-    total_clients = DatabaseManager.execute_query(
-        "SELECT COUNT(*) FROM users WHERE role = 'client'"
-    )
-    total_clients = int(total_clients[0]) if total_clients else 0
-
-    # Tickets and messages
-    total_tickets = DatabaseManager.execute_query("SELECT COUNT(*) FROM tickets")
-    total_tickets = int(total_tickets[0]) if total_tickets else 0
-
-    total_ticket_messages = DatabaseManager.execute_query("SELECT COUNT(*) FROM ticket_comments")
-    total_ticket_messages = int(total_ticket_messages[0]) if total_ticket_messages else 0
-
-    # Total credits in circulation (exclude admins)
-    credits_circ = DatabaseManager.execute_query("SELECT COALESCE(SUM(credits), 0) FROM users WHERE role != 'admin'")
-    total_credits_circulation = float(credits_circ[0]) if credits_circ else 0.0
-
-    # Servers from Pterodactyl
-    servers_resp = safe_requests.get(
-        f"{PTERODACTYL_URL}api/application/servers?per_page=100000",
-        headers=HEADERS,
-        timeout=60,
-    )
-
-    total_servers = 0
-    free_servers = 0
-    paid_servers = 0
-    plan_counts: dict[str, int] = {}
-    total_monthly_credits_used = 0.0
-
-    if servers_resp.status_code == 200:
-        servers_json = servers_resp.json()
-        data = servers_json.get("data", [])
-        total_servers = len(data)
-        for s in data:
-            try:
-                product = convert_to_product(s)
-                price = float(product.get("price", 0) or 0)
-                name = product.get("name", "Unknown")
-                if price == 0:
-                    free_servers += 1
-                else:
-                    paid_servers += 1
-                total_monthly_credits_used += price
-                plan_counts[name] = plan_counts.get(name, 0) + 1
-            except Exception:
-                # If mapping fails, count under Unknown
-                paid_servers += 0  # no-op to keep structure
-                plan_counts["Unknown"] = plan_counts.get("Unknown", 0) + 1
-    else:
-        # If API fails, keep zeros and show empty chart
-        data = []
+    stats = get_stats()
 
     # Prepare chart data
+    plan_counts = stats["plan_counts"]
     chart_labels = list(plan_counts.keys())
     chart_values = [plan_counts[k] for k in chart_labels]
 
+    history = get_stats_history(days=7, fields=("total_users", "total_clients", "total_servers", "paid_servers"))
+    trend = {
+        "labels": [row["captured_at"].strftime("%Y-%m-%d %H:%M") for row in history],
+        "total_users": [row["total_users"] for row in history],
+        "total_clients": [row["total_clients"] for row in history],
+        "total_servers": [row["total_servers"] for row in history],
+        "paid_servers": [row["paid_servers"] for row in history],
+    }
+
     return render_template(
         "admin/stats.html",
-        total_users=total_users,
-        total_clients=total_clients,
-        total_servers=total_servers,
-        free_servers=free_servers,
-        paid_servers=paid_servers,
-        total_tickets=total_tickets,
-        total_ticket_messages=total_ticket_messages,
-        total_credits_circulation=shorten_number(total_credits_circulation),
-        total_monthly_credits_used=shorten_number(total_monthly_credits_used),
+        total_users=stats["total_users"],
+        total_clients=stats["total_clients"],
+        total_servers=stats["total_servers"],
+        free_servers=stats["free_servers"],
+        paid_servers=stats["paid_servers"],
+        total_tickets=stats["total_tickets"],
+        total_ticket_messages=stats["total_ticket_messages"],
+        total_credits_circulation=shorten_number(stats["credits_circulation"]),
+        total_monthly_credits_used=shorten_number(stats["monthly_credits_used"]),
         chart_labels=chart_labels,
         chart_values=chart_values,
+        captured_at=stats["captured_at"],
+        trend=trend,
     )
@@ -32,16 +32,13 @@ All routes are protected by admin_required verification
 
 from flask import render_template, request, session, redirect, url_for, flash, jsonify
 from managers.authentication import admin_required
-from managers.utils import HEADERS
+from managers.ptero_client import ptero
 from managers.logging import webhook_log
 from Routes.admin import admin
-from managers.user_manager import get_ptero_id
+from managers.user_manager import get_ptero_id, invalidate_principal
 from managers.database_manager import DatabaseManager
-from config import PTERODACTYL_URL
-import requests
 import sys
 import json
-from security import safe_requests
 
 sys.path.append("..")
 
@@ -190,11 +187,7 @@ def audit_recent_multi():
                     debug_info['skipped_no_panel_id'] += 1
                     continue
                 # Use dedicated servers list endpoint for reliability
-                resp = safe_requests.get(
-                    f"{PTERODACTYL_URL}/api/application/users/{panel_id}/servers",
-                    headers=HEADERS,
-                    timeout=60
-                )
+                resp = ptero.get(f"api/application/users/{panel_id}/servers")
                 if resp.status_code != 200:
                     debug_info['skipped_api_error'] += 1
                     continue
@@ -223,6 +216,7 @@ def audit_recent_multi():
                 "UPDATE users SET suspended = 1 WHERE id = %s",
                 (off['id'],)
             )
+            invalidate_principal(off['email'])
         webhook_log(
             f"Admin {session['email']} suspended {len(offenders)} recent multi-server offenders",
             "admin",
@@ -292,10 +286,7 @@ def admin_user_servers(user_id):
         return "User does not have a Pterodactyl ID", 404
     
     # Get user's servers from panel using Pterodactyl ID
-    response = safe_requests.get(
-        f"{PTERODACTYL_URL}/api/application/users/{ptero_id}?include=servers",
-        headers=HEADERS, 
-    timeout=60)
+    response = ptero.get(f"api/application/users/{ptero_id}?include=servers")
     
     if response.status_code != 200:
         return "Failed to get user servers", 500
@@ -380,10 +371,7 @@ def admin_delete_user(user_id):
         return redirect(url_for('admin.users'))
     
     # Get user's servers from panel
-    response = safe_requests.get(
-        f"{PTERODACTYL_URL}/api/application/users/{user_id}?include=servers",
-        headers=HEADERS, 
-    timeout=60)
+    response = ptero.get(f"api/application/users/{user_id}?include=servers")
     
     if response.status_code != 200:
         flash("Failed to get user servers", "error")
@@ -398,11 +386,10 @@ def admin_delete_user(user_id):
             server_id = server['id']
             
             # Delete server from panel
-            delete_response = requests.delete(
-                f"{PTERODACTYL_URL}/api/application/servers/{server_id}",
-                headers=HEADERS,
-                params={'force': 'true'}, 
-            timeout=60)
+            delete_response = ptero.delete(
+                f"api/application/servers/{server_id}",
+                params={'force': 'true'}
+            )
             
             if delete_response.status_code != 204:
                 flash(f"Failed to delete server {server_id}", "error")
@@ -414,10 +401,7 @@ def admin_delete_user(user_id):
         return redirect(url_for('admin.users'))
     
     # Delete user from panel
-    delete_user_response = requests.delete(
-        f"{PTERODACTYL_URL}/api/application/users/{user_id}",
-        headers=HEADERS, 
-    timeout=60)
+    delete_user_response = ptero.delete(f"api/application/users/{user_id}")
     
     if delete_user_response.status_code != 204:
         flash("Failed to delete user from panel", "error")
@@ -504,6 +488,7 @@ def admin_toggle_suspension(user_id):
         "UPDATE users SET suspended = %s WHERE id = %s", 
         (new_status, user_id)
     )
+    invalidate_principal(db_user[7])
     
     action = "suspended" if new_status == 1 else "unsuspended"
     webhook_log(
@@ -21,7 +21,14 @@ from flask_apscheduler import APScheduler
 from flask_limiter import Limiter
 from flask_mail import Mail, Message
 from managers.maintenance import sync_users_script
-from managers.credit_manager import use_credits, check_to_unsuspend, delete_suspended_users_servers
+from managers.user_manager import flush_last_seen, LAST_SEEN_FLUSH_INTERVAL
+from managers.allocations import allocation_index, ALLOCATION_INDEX_REFRESH_INTERVAL
+from managers.stats import refresh_stats, STATS_SNAPSHOT_INTERVAL
+from managers.server_actions import process_actions, ACTION_PROCESS_INTERVAL
+from managers.sweep import run_sweep, SWEEP_INTERVAL
+from managers.job_lock import cluster_job
+from managers.cache_sync import poll as poll_cache_invalidations, CACHE_SYNC_INTERVAL
+from pterocache import PteroCache
 
 from Routes.AuthenticationHandler import *
 from Routes.Servers import *
@@ -36,6 +43,7 @@ import importlib
 import sys
 import datetime
 from managers.logging import webhook_log
+from managers.migrations import pending_migrations
 from cacheext import cache
 from threading import Thread
 import datetime
@@ -77,6 +85,11 @@ if not app.config.get('PREFERRED_URL_SCHEME'):
 
 # Initialize extensions
 cache.init_app(app)
+
+# Migrations are applied by scripts/migrate.py, never by the workers themselves
+pending_versions = pending_migrations()
+if pending_versions:
+    raise RuntimeError(f"Schema migrations {', '.join(pending_versions)} are pending; run python scripts/migrate.py before starting the panel")
 Session(app)
 mail = Mail(app)
 scheduler = APScheduler()
@@ -145,59 +158,76 @@ app.register_blueprint(admin, url_prefix="/admin")
 
 if not DEBUG_FRONTEND_MODE:
 # if False:
-    @scheduler.task('interval', id='credit_usage', seconds=3600, misfire_grace_time=900)
-    def process_credits():
-        """Process hourly credit usage for all servers."""
+    # Jobs wrapped in cluster_job run in one process at a time across all workers and hosts;
+    # the others only touch this process's buffers and caches, so every process runs them
+    @scheduler.task('interval', id='fleet_sweep', seconds=SWEEP_INTERVAL, misfire_grace_time=900)
+    @cluster_job('fleet_sweep')
+    def fleet_sweep_task():
+        """Run the due fleet rules: billing, unsuspension, suspended users and inactive free servers."""
         with app.app_context():
-            print("Processing credits...")
-            use_credits()
-            print("Credit processing complete")
+            report = run_sweep()
+            if report and report["rules"]:
+                timings = report["timings"]
+                rules = ", ".join(
+                    f"{name} {seconds:.2f}s ({report['rule_actions'][name]} actions)"
+                    for name, seconds in timings["rules"].items()
+                )
+                print(
+                    f"Fleet sweep: {report['servers']} servers, rules {rules}; "
+                    f"{report['billed_users']} users billed {report['credits_charged']:.2f} credits "
+                    f"in {timings['total']:.2f}s (load {timings['load']:.2f}s, execute {timings['execute']:.2f}s)"
+                )
 
-    @scheduler.task('interval', id='server_unsuspend', seconds=60, misfire_grace_time=900)
-    def check_suspensions():
-        """Check for servers that can be unsuspended."""
-        with app.app_context():
-            print("Checking suspensions...")
-            check_to_unsuspend()
-            print("Suspension check complete")
-            
-    @scheduler.task('interval', id='delete_suspended_servers', seconds=120, misfire_grace_time=900)
-    def delete_suspended_servers():
-        """Delete servers of suspended users."""
+    @scheduler.task('interval', id='flush_last_seen', seconds=LAST_SEEN_FLUSH_INTERVAL, misfire_grace_time=900)
+    def flush_last_seen_task():
+        """Write buffered last seen times to the users table."""
+        flush_last_seen()
+
+    @scheduler.task('interval', id='sync_caches', seconds=CACHE_SYNC_INTERVAL, misfire_grace_time=900)
+    def sync_caches_task():
+        """Apply cache invalidations published by the other processes."""
+        poll_cache_invalidations()
+
+    @scheduler.task('interval', id='refresh_allocations', seconds=ALLOCATION_INDEX_REFRESH_INTERVAL, misfire_grace_time=900)
+    def refresh_allocations_task():
+        """Reload the free allocation sets of nodes used for creates and transfers."""
+        allocation_index.refresh_all()
+
+    @scheduler.task('interval', id='process_server_actions', seconds=ACTION_PROCESS_INTERVAL, misfire_grace_time=900)
+    @cluster_job('process_server_actions')
+    def process_server_actions_task():
+        """Run due suspend/unsuspend/delete actions from the server action queue."""
         with app.app_context():
-            print("Checking for servers of suspended users...")
-            delete_suspended_users_servers()
-            print("Suspended users servers check complete")
+            process_actions()
 
-    @scheduler.task('interval', id='delete_inactive_free_servers', seconds=3600, misfire_grace_time=900)
-    def delete_inactive_free_servers_task():
-        """Delete free tier servers of users who haven't logged in for 15+ days."""
+    @scheduler.task('interval', id='refresh_stats', seconds=STATS_SNAPSHOT_INTERVAL, misfire_grace_time=900)
+    @cluster_job('refresh_stats', interval=STATS_SNAPSHOT_INTERVAL)
+    def refresh_stats_task():
+        """Record a platform stats snapshot for the admin page and Discord."""
         with app.app_context():
-            print("Checking for inactive free tier servers...")
-            from managers.maintenance import delete_inactive_free_servers
-            delete_inactive_free_servers()
-            print("Inactive free tier servers check complete")
-
-    # Schedule the first run of delete_inactive_free_servers to happen 60 seconds after startup
-    @scheduler.task('date', id='initial_delete_inactive_free_servers', run_date=datetime.datetime.now() + datetime.timedelta(seconds=60))
-    def initial_delete_inactive_free_servers_task():
-        """Initial run of delete_inactive_free_servers shortly after startup."""
+            refresh_stats()
+
+    @scheduler.task('interval', id='archive_activity_logs', seconds=86400, misfire_grace_time=3600)
+    @cluster_job('archive_activity_logs', interval=86400)
+    def archive_activity_logs_task():
+        """Export activity logs past the retention period to archives and prune them."""
         with app.app_context():
-            print("Running initial check for inactive free tier servers...")
-            from managers.maintenance import delete_inactive_free_servers
-            delete_inactive_free_servers()
-            print("Initial inactive free tier servers check complete")
+            from managers.maintenance import archive_activity_logs
+            report = archive_activity_logs()
+            print(f"Archived {report['rows']} activity logs")
 
     @scheduler.task('interval', id='sync_users', seconds=60, misfire_grace_time=900)
+    @cluster_job('sync_users', interval=60)
     def sync_user_data():
         """Synchronize user data with Pterodactyl panel."""
         print("Syncing users...")
         sync_users_script()
-        pterocache.update_all()
         print("User sync complete")
 
 
     scheduler.start()
+    # Egg and node lists are refreshed in the background from here on
+    PteroCache().start()
 
 @app.route('/')
 @login_required
@@ -31,3 +31,53 @@ AUTODEPLOY_NEST_ID: int =
 #DISCORD INVITE
 DISCORD_INVITE = ""
 DOWNLOAD_API_URL = ""
+#DATABASE POOL (optional)
+DB_POOL_SIZE = 20
+DB_POOL_TIMEOUT = 10
+DB_POOL_MAX_LIFETIME = 3600
+#SERVER INVENTORY (optional)
+INVENTORY_MAX_AGE = 60
+INVENTORY_MAX_STALE = 900
+#PTERODACTYL HTTP CLIENT (optional)
+PTERO_POOL_SIZE = 32
+PTERO_PAGE_SIZE = 100
+PTERO_PAGE_WORKERS = 4
+PTERO_PAGE_PASSES = 3
+PTERO_ASYNC_CONCURRENCY = 16
+#LAST SEEN WRITE BUFFER (optional)
+LAST_SEEN_FLUSH_INTERVAL = 30
+LAST_SEEN_BUFFER_MAX = 5000
+#USER PRINCIPAL CACHE (optional)
+PRINCIPAL_CACHE_TTL = 30
+USER_SERVERS_CACHE_TTL = 30
+#PTERODACTYL EGG/NODE CACHE (optional)
+PTEROCACHE_REFRESH_INTERVAL = 60
+PTEROCACHE_REFRESH_JITTER = 0.1
+PTEROCACHE_EGG_INTERVAL = 900
+PTEROCACHE_EGG_WORKERS = 4
+#ALLOCATION INDEX (optional)
+ALLOCATION_LEASE_TTL = 120
+ALLOCATION_INDEX_MAX_AGE = 300
+ALLOCATION_INDEX_REFRESH_INTERVAL = 60
+#CROSS-PROCESS CACHE INVALIDATION (optional)
+CACHE_SYNC_INTERVAL = 5
+CACHE_SYNC_RETENTION = 3600
+#PLATFORM STATS SNAPSHOT (optional)
+STATS_SNAPSHOT_INTERVAL = 300
+STATS_HISTORY_DAYS = 30
+#ACTIVITY LOG RETENTION (optional)
+ACTIVITY_LOG_RETENTION_DAYS = 90
+ACTIVITY_LOG_ARCHIVE_DIR = "archives/activity_logs"  # relative to the project root unless absolute
+#LOG SHIPPING QUEUE (optional)
+WEBHOOK_QUEUE_SIZE = 10000
+WEBHOOK_ENQUEUE_TIMEOUT = 1.0
+#BACKGROUND WORKER POOLS (optional)
+PANEL_POOL_WORKERS = 8
+SMTP_POOL_WORKERS = 4
+DB_POOL_WORKERS = 4
+POOL_SUBMIT_TIMEOUT = 30
+#SERVER ACTION QUEUE (optional)
+ACTION_NODE_CONCURRENCY = 4
+ACTION_MAX_ATTEMPTS = 6
+ACTION_BACKOFF_BASE = 30
+ACTION_PROCESS_INTERVAL = 10
@@ -25,10 +25,75 @@ CREATE TABLE `activity_logs` (
   `id` int(11) NOT NULL AUTO_INCREMENT COMMENT 'Primary Key',
   `create_time` datetime DEFAULT NULL COMMENT 'Create Time',
   `content` longtext DEFAULT NULL,
-  PRIMARY KEY (`id`)
+  `status` varchar(16) DEFAULT NULL,
+  `is_ticket` tinyint(1) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`id`),
+  KEY `activity_logs_create_time_index` (`create_time`),
+  KEY `activity_logs_status_index` (`status`),
+  KEY `activity_logs_is_ticket_index` (`is_ticket`),
+  FULLTEXT KEY `activity_logs_content_fulltext` (`content`)
 ) ENGINE=InnoDB AUTO_INCREMENT=446296 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `cache_invalidations`
+--
+
+DROP TABLE IF EXISTS `cache_invalidations`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `cache_invalidations` (
+  `id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+  `scope` varchar(32) NOT NULL,
+  `item_id` bigint(20) DEFAULT NULL,
+  `created_at` datetime NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`id`),
+  KEY `cache_invalidations_created_at_index` (`created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `credit_transactions`
+--
+
+DROP TABLE IF EXISTS `credit_transactions`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `credit_transactions` (
+  `id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+  `email` varchar(191) NOT NULL,
+  `amount` double NOT NULL,
+  `balance_after` double DEFAULT NULL,
+  `reason` varchar(64) NOT NULL,
+  `batch_key` varchar(64) DEFAULT NULL,
+  `created_at` datetime NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`id`),
+  KEY `credit_transactions_email_index` (`email`,`created_at`),
+  KEY `credit_transactions_created_at_index` (`created_at`),
+  KEY `credit_transactions_batch_key_index` (`batch_key`,`email`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `job_runs`
+--
+
+DROP TABLE IF EXISTS `job_runs`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `job_runs` (
+  `job_id` varchar(64) NOT NULL,
+  `last_started_at` datetime NOT NULL,
+  `last_finished_at` datetime DEFAULT NULL,
+  `last_duration` double DEFAULT NULL,
+  `last_status` varchar(16) NOT NULL DEFAULT 'running',
+  `last_error` text DEFAULT NULL,
+  `holder` varchar(64) DEFAULT NULL,
+  `runs` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`job_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `pending_deletions`
 --
@@ -44,6 +109,31 @@ CREATE TABLE `pending_deletions` (
 ) ENGINE=InnoDB AUTO_INCREMENT=4706 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci COMMENT='Stores users pending deletion';
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `platform_stats`
+--
+
+DROP TABLE IF EXISTS `platform_stats`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `platform_stats` (
+  `id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+  `captured_at` datetime NOT NULL DEFAULT current_timestamp(),
+  `total_users` int(11) NOT NULL DEFAULT 0,
+  `total_clients` int(11) NOT NULL DEFAULT 0,
+  `total_tickets` int(11) NOT NULL DEFAULT 0,
+  `total_ticket_messages` int(11) NOT NULL DEFAULT 0,
+  `credits_circulation` double NOT NULL DEFAULT 0,
+  `total_servers` int(11) NOT NULL DEFAULT 0,
+  `free_servers` int(11) NOT NULL DEFAULT 0,
+  `paid_servers` int(11) NOT NULL DEFAULT 0,
+  `monthly_credits_used` double NOT NULL DEFAULT 0,
+  `plan_counts` text DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `platform_stats_captured_at_index` (`captured_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `project_stars`
 --
@@ -85,6 +175,50 @@ CREATE TABLE `projects` (
 ) ENGINE=InnoDB AUTO_INCREMENT=18 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `schema_migrations`
+--
+
+DROP TABLE IF EXISTS `schema_migrations`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `schema_migrations` (
+  `version` varchar(64) NOT NULL,
+  `description` varchar(255) NOT NULL,
+  `applied_at` datetime NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `server_actions`
+--
+
+DROP TABLE IF EXISTS `server_actions`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `server_actions` (
+  `id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+  `idempotency_key` varchar(191) DEFAULT NULL,
+  `action` varchar(16) NOT NULL,
+  `server_id` int(11) NOT NULL,
+  `node_id` int(11) DEFAULT NULL,
+  `reason` varchar(255) DEFAULT NULL,
+  `status` varchar(16) NOT NULL DEFAULT 'pending',
+  `attempts` int(11) NOT NULL DEFAULT 0,
+  `next_attempt_at` datetime NOT NULL DEFAULT current_timestamp(),
+  `locked_by` varchar(64) DEFAULT NULL,
+  `locked_at` datetime DEFAULT NULL,
+  `last_error` text DEFAULT NULL,
+  `created_at` datetime NOT NULL DEFAULT current_timestamp(),
+  `updated_at` datetime NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `server_actions_idempotency_key_unique` (`idempotency_key`),
+  KEY `server_actions_status_index` (`status`,`next_attempt_at`),
+  KEY `server_actions_server_index` (`server_id`,`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `stripe_processed_invoices`
 --
@@ -132,7 +266,8 @@ CREATE TABLE `ticket_comments` (
   `user_id` int(10) unsigned NOT NULL,
   `ticketcomment` text NOT NULL,
   `created_at` timestamp NULL DEFAULT NULL,
-  PRIMARY KEY (`id`)
+  PRIMARY KEY (`id`),
+  KEY `ticket_comments_ticket_id_index` (`ticket_id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=4913 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -166,7 +301,8 @@ CREATE TABLE `tickets` (
   `created_at` timestamp NULL DEFAULT NULL,
   `reply_status` varchar(255) NOT NULL DEFAULT 'waiting' COMMENT 'responded OR waiting depending on who replyed last',
   `last_reply` timestamp NULL DEFAULT NULL COMMENT 'Timestamp of latest reply',
-  PRIMARY KEY (`id`)
+  PRIMARY KEY (`id`),
+  KEY `tickets_user_id_index` (`user_id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1824 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -199,7 +335,9 @@ CREATE TABLE `users` (
   `discord_id` bigint(20) DEFAULT NULL COMMENT 'discord id',
   `show_email` tinyint(4) NOT NULL DEFAULT 0 COMMENT 'Shows Email on codehub',
   PRIMARY KEY (`id`),
-  UNIQUE KEY `users_email_unique` (`email`)
+  UNIQUE KEY `users_email_unique` (`email`),
+  KEY `users_pterodactyl_id_index` (`pterodactyl_id`),
+  KEY `users_discord_id_index` (`discord_id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=42103 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -105,11 +105,11 @@ class BlackjackView(discord.ui.View):
         # Apply credits
         try:
             if result == "win":
-                add_credits(self.email, self.bet, set_client=False)
+                add_credits(self.email, self.bet, set_client=False, reason="blackjack")
                 footer = f"You win! +{self.bet} credits"
             elif result == "lose":
                 # remove_credits returns 'SUSPEND' if insufficient, but we pre-checked balance so shouldn't happen here
-                remove_credits(self.email, float(self.bet))
+                remove_credits(self.email, float(self.bet), reason="blackjack")
                 footer = f"You lose! -{self.bet} credits"
             else:
                 footer = "Push! No credits won or lost."
@@ -190,7 +190,7 @@ class Blackjack(commands.Cog):
             try:
                 # Force a loss: deduct credits and update the existing game message
                 try:
-                    remove_credits(existing.email, float(existing.bet))
+                    remove_credits(existing.email, float(existing.bet), reason="blackjack")
                     footer = f"Auto-loss: started a new game before finishing the previous one. -{existing.bet} credits"
                 except Exception as e:
                     logger.error(f"Auto-loss credit removal failed for {existing.email}: {e}")
@@ -186,7 +186,7 @@ class BumpRewards(commands.Cog):
             logger.info(
                 f"(process) Awarding +4 credit to email={email} (discord_id={bumper_id}) for DISBOARD bump"
             )
-            add_credits(email, 4, set_client=False)
+            add_credits(email, 4, set_client=False, reason="bump_reward")
             await message.channel.send(
                 content=(
                     f"<@{bumper_id}>, thanks for the bump on [{message.guild.name} | DISBOARD: Discord Server List]"
@@ -48,10 +48,10 @@ class Coinflip(commands.Cog):
         # Settle credits
         try:
             if win:
-                add_credits(email, int(credits), set_client=False)
+                add_credits(email, int(credits), set_client=False, reason="coinflip")
                 outcome_text = f"You won! The coin landed on {result}. +{credits} credits"
             else:
-                remove_credits(email, float(credits))
+                remove_credits(email, float(credits), reason="coinflip")
                 outcome_text = f"You lost! The coin landed on {result}. -{credits} credits"
         except Exception as e:
             logger.error(f"Coinflip credit settlement failed for {email}: {e}")
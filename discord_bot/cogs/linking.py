@@ -4,8 +4,9 @@ from discord.ext import commands # type: ignore
 from discord.ext.commands import cooldown, BucketType # type: ignore
 from managers.database_manager import DatabaseManager
 from managers.email_manager import send_email_without_app_context
-from ..utils.database import UserDB
+from ..utils.database import UserDB, AsyncDB
 from ..utils.logger import logger
+import asyncio
 import random
 import string
 import importlib.util
@@ -37,8 +38,9 @@ class Linking(commands.Cog):
                     seconds = remaining % 60
                     await ctx.respond(f"Please wait {minutes} minutes and {seconds} seconds before requesting another code.", ephemeral=True)
                     return
-            if isinstance(UserDB.get_user_info(email), str):
-                await ctx.respond(f"{UserDB.get_user_info(email)}", ephemeral=True)
+            user_info = await AsyncDB.run(UserDB.get_user_info, email)
+            if isinstance(user_info, str):
+                await ctx.respond(f"{user_info}", ephemeral=True)
                 return
             code = ''.join(random.choices(string.ascii_letters + string.digits, k=6)).lower()
             self.codes[code] = email
@@ -60,7 +62,7 @@ class Linking(commands.Cog):
             }
             
             # Send email without Flask app context
-            send_email_without_app_context(email, "Linking Code", f"Your linking code is: {code}", smtp_config)
+            await asyncio.to_thread(send_email_without_app_context, email, "Linking Code", f"Your linking code is: {code}", smtp_config)
             
             # Set cooldown for this user
             self.cooldowns[ctx.author.id] = datetime.datetime.now()
@@ -79,7 +81,7 @@ class Linking(commands.Cog):
                 await ctx.respond("Invalid linking code.", ephemeral=True)
                 return
             email = self.codes[code]
-            UserDB.link_discord(email, ctx.author.id)
+            await AsyncDB.run(UserDB.link_discord, email, ctx.author.id)
             await ctx.respond("Linked your Discord account to your email.", ephemeral=True)
             logger.info(f"Linked {ctx.author.id} to {email}")
             self.codes.pop(code)
@@ -94,7 +96,7 @@ class Linking(commands.Cog):
             await ctx.respond("You do not have permission to use this command.", ephemeral=False)
             return
         try:
-            info = UserDB.get_discord_user_info(user.id)
+            info = await AsyncDB.run(UserDB.get_discord_user_info, user.id)
             if isinstance(info, str):
                 await ctx.respond(f"{info}", ephemeral=True)
                 return
@@ -1,14 +1,11 @@
+import asyncio
 import discord # type: ignore
 from discord.commands import slash_command # type: ignore
 from discord.ext import commands # type: ignore
-from managers.database_manager import DatabaseManager
-from ..utils.ptero import PteroAPI
-from ..utils.database import UserDB
+from ..utils.ptero import async_ptero
+from ..utils.database import UserDB, AsyncDB
 from ..utils.logger import logger
-from managers.credit_manager import convert_to_product
-from managers.utils import HEADERS
-from config import PTERODACTYL_URL
-from security import safe_requests
+from managers.stats import get_stats, get_stats_history
 
 class Statistics(commands.Cog):
     def __init__(self, bot):
@@ -25,10 +22,15 @@ class Statistics(commands.Cog):
         try:
 
             embed = discord.Embed(title="Lunes Statistics", color=discord.Color.blue())
-            embed.add_field(name="Total Users", value=str(UserDB.get_all_users()), inline=True)
-            embed.add_field(name="Suspended Users", value=str(UserDB.get_suspended_users()), inline=False)
+            total_users, suspended_users, total_servers = await asyncio.gather(
+                AsyncDB.run(UserDB.get_all_users),
+                AsyncDB.run(UserDB.get_suspended_users),
+                async_ptero.count("api/application/servers"),
+            )
+            embed.add_field(name="Total Users", value=str(total_users), inline=True)
+            embed.add_field(name="Suspended Users", value=str(suspended_users), inline=False)
 
-            embed.add_field(name="Total Servers", value=str(PteroAPI.get_all_servers()['servers']), inline=False)
+            embed.add_field(name="Total Servers", value=str(total_servers), inline=False)
 
 
             await ctx.respond(embed=embed, ephemeral=True)
@@ -48,50 +50,21 @@ class Statistics(commands.Cog):
             await ctx.respond("You do not have permission to use this command.", ephemeral=True)
             return
         try:
-            # Totals from DB
-            total_users = DatabaseManager.execute_query("SELECT COUNT(*) FROM users")
-            total_users = int(total_users[0]) if total_users else 0
-
-            total_clients = DatabaseManager.execute_query("SELECT COUNT(*) FROM users WHERE role = 'client'")
-            total_clients = int(total_clients[0]) if total_clients else 0
-
-            total_tickets = DatabaseManager.execute_query("SELECT COUNT(*) FROM tickets")
-            total_tickets = int(total_tickets[0]) if total_tickets else 0
-
-            total_ticket_messages = DatabaseManager.execute_query("SELECT COUNT(*) FROM ticket_comments")
-            total_ticket_messages = int(total_ticket_messages[0]) if total_ticket_messages else 0
-
-            credits_circ = DatabaseManager.execute_query("SELECT COALESCE(SUM(credits), 0) FROM users WHERE role != 'admin'")
-            total_credits_circulation = float(credits_circ[0]) if credits_circ else 0.0
-
-            # Servers from Pterodactyl (mirror admin stats logic)
-            servers_resp = safe_requests.get(
-                f"{PTERODACTYL_URL}api/application/servers?per_page=100000",
-                headers=HEADERS,
-                timeout=60,
+            # Latest materialised snapshot plus the last day of history for deltas
+            stats, history = await asyncio.gather(
+                AsyncDB.run(get_stats),
+                AsyncDB.run(get_stats_history, days=1, fields=("total_users", "total_clients", "total_servers", "paid_servers", "credits_circulation")),
             )
-            total_servers = 0
-            free_servers = 0
-            paid_servers = 0
-            plan_counts = {}
-            total_monthly_credits_used = 0.0
-            if servers_resp.status_code == 200:
-                servers_json = servers_resp.json()
-                data = servers_json.get("data", [])
-                total_servers = len(data)
-                for s in data:
-                    try:
-                        product = convert_to_product(s)
-                        price = float(product.get("price", 0) or 0)
-                        name = product.get("name", "Unknown")
-                        if price == 0:
-                            free_servers += 1
-                        else:
-                            paid_servers += 1
-                        total_monthly_credits_used += price
-                        plan_counts[name] = plan_counts.get(name, 0) + 1
-                    except Exception:
-                        plan_counts["Unknown"] = plan_counts.get("Unknown", 0) + 1
+            total_users = stats["total_users"]
+            total_clients = stats["total_clients"]
+            total_tickets = stats["total_tickets"]
+            total_ticket_messages = stats["total_ticket_messages"]
+            total_credits_circulation = stats["credits_circulation"]
+            total_servers = stats["total_servers"]
+            free_servers = stats["free_servers"]
+            paid_servers = stats["paid_servers"]
+            total_monthly_credits_used = stats["monthly_credits_used"]
+            plan_counts = stats["plan_counts"]
             # Build embed
             embed = discord.Embed(title="Lunes Economy Stats", color=discord.Color.green())
             embed.add_field(name="Total Users", value=str(total_users), inline=True)
@@ -105,6 +78,18 @@ class Statistics(commands.Cog):
             if plan_counts:
                 breakdown = ", ".join([f"{k}: {v}" for k, v in plan_counts.items()])
                 embed.add_field(name="Plan Breakdown", value=breakdown[:1024], inline=False)
+            # Change since the oldest snapshot of the last 24 hours
+            if history:
+                oldest = history[0]
+                changes = ", ".join([
+                    f"Users {total_users - oldest['total_users']:+d}",
+                    f"Clients {total_clients - oldest['total_clients']:+d}",
+                    f"Servers {total_servers - oldest['total_servers']:+d}",
+                    f"Paid {paid_servers - oldest['paid_servers']:+d}",
+                    f"Credits {total_credits_circulation - oldest['credits_circulation']:+.2f}",
+                ])
+                embed.add_field(name="24h Change", value=changes, inline=False)
+            embed.set_footer(text=f"Snapshot taken {stats['captured_at']}")
             await ctx.respond(embed=embed, ephemeral=True)
         except Exception as e:
             await ctx.respond(f"Error fetching economy stats: {str(e)}", ephemeral=True)
@@ -1,8 +1,9 @@
 import discord # type: ignore
 from discord.commands import slash_command # type: ignore
 from discord.ext import commands # type: ignore
-from managers.database_manager import DatabaseManager
-from ..utils.database import UserDB
+from managers.credit_ledger import apply_credits
+from managers.user_manager import invalidate_principal
+from ..utils.database import UserDB, AsyncDB
 from ..utils.logger import logger
 
 class Users(commands.Cog):
@@ -19,27 +20,19 @@ class Users(commands.Cog):
             return
         try:
             # Get current credits
-            current_credits = DatabaseManager.execute_query(
+            current_credits = await AsyncDB.execute_query(
                 "SELECT credits FROM users WHERE email = %s",
                 (email,)
             )
             if not current_credits:
                 await ctx.respond(f"Error: User with email {email} not found", ephemeral=False)
                 return
-            # Update credits
-            DatabaseManager.execute_query(
-                "UPDATE users SET credits = credits + %s WHERE email = %s",
-                (amount, email)
-            )
-            # Get new balance
-            new_credits = DatabaseManager.execute_query(
-                "SELECT credits FROM users WHERE email = %s",
-                (email,)
-            )
+            # Update credits (returns the new balance)
+            new_credits = await AsyncDB.run(apply_credits, email, amount, "discord_admin", allow_negative=True)
             embed = discord.Embed(title="Lunes Credits", color=discord.Color.blue())
             embed.add_field(name=f"{'Added' if amount > 0 else 'Removed'}", value=str(f'{amount} credits to {email}.'), inline=True)
             embed.add_field(name="Old Balance:", value=str(current_credits[0]), inline=True)
-            embed.add_field(name="New Balance:", value=str(new_credits[0]), inline=True)
+            embed.add_field(name="New Balance:", value=str(new_credits), inline=True)
             await ctx.respond(embed=embed, ephemeral=False)
             logger.info(f"Added {amount} credits to {email}")
         except Exception as e:
@@ -52,7 +45,7 @@ class Users(commands.Cog):
             await ctx.respond("You do not have permission to use this command.", ephemeral=True)
             return
         try:
-            info = UserDB.get_user_info(email)
+            info = await AsyncDB.run(UserDB.get_user_info, email)
             if isinstance(info, str):
                 await ctx.respond(f"{info}", ephemeral=True)
                 return
@@ -79,7 +72,7 @@ class Users(commands.Cog):
                 await ctx.respond("You do not have permission to use this command.", ephemeral=True)
                 return
             try:
-                UserDB.suspend_user(email)
+                await AsyncDB.run(UserDB.suspend_user, email)
                 embed = discord.Embed(title="User Suspended", color=discord.Color.red())
                 embed.add_field(name="Email:", value=str(email), inline=False)
                 await ctx.respond(embed=embed, ephemeral=True)
@@ -99,12 +92,13 @@ class Users(commands.Cog):
                 await ctx.respond("You do not have permission to use this command.", ephemeral=True)
                 return
             try:
-                DatabaseManager.execute_query(
+                await AsyncDB.execute_query(
                     "UPDATE users SET role = client WHERE email = %s",
                     (email,)
                 )
+                invalidate_principal(email)
                 # Get new role
-                new_role = DatabaseManager.execute_query(
+                new_role = await AsyncDB.execute_query(
                     "SELECT role FROM users WHERE email = %s",
                     (email,)
                 )
@@ -127,7 +121,7 @@ class Users(commands.Cog):
                 await ctx.respond("You do not have permission to use this command.", ephemeral=True)
                 return
             try:
-                UserDB.unsuspend_user(email)
+                await AsyncDB.run(UserDB.unsuspend_user, email)
                 embed = discord.Embed(title="User Unsuspended", color=discord.Color.green())
                 embed.add_field(name="Email:", value=str(email), inline=False)
                 await ctx.respond(embed=embed, ephemeral=True)
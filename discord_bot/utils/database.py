@@ -1,7 +1,43 @@
-from managers.database_manager import DatabaseManager
+import asyncio
+import functools
+from managers.database_manager import DatabaseManager, DB_POOL_SIZE
 from managers.email_manager import send_email
+from managers.user_manager import invalidate_principal
 from flask import current_app
 from ..utils.logger import logger
+
+class AsyncDB():
+    """
+    Async facade over DatabaseManager for use inside the bot's event loop.
+
+    Queries run in worker threads; at most half the connection pool is used at
+    once so the web app always keeps connections available.
+    """
+    _semaphore = None
+    _loop = None
+
+    @classmethod
+    def _get_semaphore(cls):
+        loop = asyncio.get_running_loop()
+        if cls._semaphore is None or cls._loop is not loop:
+            cls._loop = loop
+            cls._semaphore = asyncio.Semaphore(max(1, DB_POOL_SIZE // 2))
+        return cls._semaphore
+
+    @classmethod
+    async def run(cls, func, *args, **kwargs):
+        """Runs a blocking DB-backed call (e.g. a UserDB method) off the event loop."""
+        async with cls._get_semaphore():
+            return await asyncio.to_thread(functools.partial(func, *args, **kwargs))
+
+    @classmethod
+    async def execute_query(cls, query, values=None, **kwargs):
+        return await cls.run(DatabaseManager.execute_query, query, values, **kwargs)
+
+    @classmethod
+    async def execute_many(cls, query, values, **kwargs):
+        return await cls.run(DatabaseManager.execute_many, query, values, **kwargs)
+
 class UserDB():
 
     def get_user_info(email):
@@ -29,6 +65,7 @@ class UserDB():
         try:
             send_email(email, "Account Suspended", "Your account has been suspended.", current_app._get_current_object())
             DatabaseManager.execute_query("UPDATE users SET suspended = 1 WHERE email = %s",(email,))
+            invalidate_principal(email)
             return "User suspended"
         except Exception as e:
             logger.error(f"Error suspending user: {str(e)}")
@@ -38,6 +75,7 @@ class UserDB():
         try:
             send_email(email, "Account Unsuspended", "Your account has been unsuspended.", current_app._get_current_object())
             DatabaseManager.execute_query("UPDATE users SET suspended = 0 WHERE email = %s",(email,))
+            invalidate_principal(email)
             return "User unsuspended"
         except Exception as e:
             logger.error(f"Error unsuspending user: {str(e)}")
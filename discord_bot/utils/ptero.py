@@ -1,8 +1,13 @@
-import config
-from config import PTERODACTYL_ADMIN_KEY, PTERODACTYL_URL
-from ..utils.logger import logger
-from managers.database_manager import DatabaseManager
-from security import safe_requests
+import asyncio
+import time
+import aiohttp
+from config import PTERODACTYL_ADMIN_KEY
+from managers.ptero_client import ptero, normalize_endpoint, PteroPageError, PTERO_POOL_SIZE
+
+try:
+    from config import PTERO_ASYNC_CONCURRENCY  # type: ignore
+except ImportError:
+    PTERO_ASYNC_CONCURRENCY = 16
 
 headers = {
     "Authorization": f"Bearer {PTERODACTYL_ADMIN_KEY}",
@@ -10,19 +15,79 @@ headers = {
     'Content-Type': 'application/json'
 }
 
-class PteroAPI():
+class AsyncPteroAPI():
+    """
+    asyncio-native Pterodactyl client for the bot and batch jobs.
+
+    One pooled aiohttp session per event loop, with at most PTERO_ASYNC_CONCURRENCY
+    requests in flight. Latency is recorded in the shared ptero client histograms.
+    """
+
+    def __init__(self, concurrency: int = PTERO_ASYNC_CONCURRENCY, pool_size: int = PTERO_POOL_SIZE):
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    def _get_session(self):
+        loop = asyncio.get_running_loop()
+        # Sessions are tied to the loop that created them (the bot's, or a job's asyncio.run)
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._loop = loop
+            self._session = aiohttp.ClientSession(
+                headers=headers,
+                connector=aiohttp.TCPConnector(limit_per_host=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=60),
+                auto_decompress=True,
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def request(self, method: str, path: str, **kwargs):
+        """
+        Makes a request and returns (status, json body or None).
+        """
+        session = self._get_session()
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                async with session.request(method, ptero.url(path), **kwargs) as response:
+                    body = await response.json(content_type=None) if response.status != 204 else None
+                    return response.status, body
+            finally:
+                ptero.record_latency(normalize_endpoint(method, path), time.perf_counter() - started)
+
+    async def get(self, path: str, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    async def patch(self, path: str, **kwargs):
+        return await self.request("PATCH", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs):
+        return await self.request("DELETE", path, **kwargs)
+
+    async def gather(self, paths):
+        """
+        GETs many paths concurrently (bounded by the semaphore), results in input order.
+        """
+        return await asyncio.gather(*(self.get(path) for path in paths))
+
+    async def count(self, path: str) -> int:
+        """
+        Returns the total of a list endpoint without downloading it.
+        """
+        status, body = await self.get(path, params={"per_page": 1})
+        if status != 200:
+            raise PteroPageError(f"GET {path} failed: {status}")
+        return body['meta']['pagination']['total']
 
- def get_all_servers():
-    try:
-        response = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers?per_page=100000", headers=headers, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        
-        total_servers = data['meta']['pagination']['total']
-        total_servers_suspended = sum(1 for server in data['data'] if server['attributes'].get('suspended', False))
-        return {"servers": total_servers, "servers_suspended": total_servers_suspended}
-    except Exception as e:
-        logger.error(f"Error fetching total servers: {str(e)}")
-        return f"Error fetching total servers"
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
 
 
+async_ptero = AsyncPteroAPI()
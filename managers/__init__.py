@@ -11,6 +11,17 @@ Key Managers:
 - UserManager: Handles user-related operations
 - ServerManager: Handles server-related operations
 - CreditManager: Handles credit-related operations
+- CreditLedger: Atomic credit balance changes and audit trail
+- Inventory: Shared in-process snapshot of all panel servers
+- Allocations: Free allocation index per node with reservation leases
+- Stats: Materialised platform stats snapshot with history
+- PteroClient: Pooled HTTP client for the Pterodactyl API
+- Executor: Bounded worker pools for background panel, SMTP and DB work
+- ServerActions: Durable queue for server suspend/unsuspend/delete actions
+- Sweep: One fleet pass running the billing and cleanup rules
+- JobLock: Cluster-wide advisory locks and run history for scheduled jobs
+- CacheSync: Broadcasts cache invalidations to every process
+- Migrations: Versioned schema changes and hot-query index checks
 - EmailManager: Handles email-related operations
 - Authentication: Handles login and registration
 - Maintenance: Handles scheduled tasks
@@ -25,6 +36,17 @@ from .database_manager import DatabaseManager
 from .user_manager import *
 from .server_manager import *
 from .credit_manager import *
+from .credit_ledger import apply_credits, apply_credits_bulk
+from .inventory import inventory, ServerInventory
+from .allocations import allocation_index, AllocationIndex
+from .ptero_client import ptero, PteroClient
+from .executor import submit, executor_metrics
+from .server_actions import enqueue_action, enqueue_actions, process_actions, action_counts
+from .sweep import run_sweep, sweep_rule
+from .job_lock import cluster_job, job_metrics, get_job_runs
+from .cache_sync import publish as publish_invalidation, poll as poll_invalidations
+from .migrations import apply_migrations, check_hot_queries
+from .stats import get_stats, get_stats_history, refresh_stats
 from .email_manager import *
 from .authentication import *
 from .maintenance import *
@@ -44,7 +66,11 @@ __all__ = [
     'account_get_information',
     'update_ip', 
     'update_last_seen', 
+    'record_last_seen',
+    'flush_last_seen',
     'get_last_seen', 
+    'get_principal',
+    'invalidate_principal',
     'is_admin',
     'check_if_user_suspended', 
     'get_user_verification_status_and_suspension_status',
@@ -54,18 +80,59 @@ __all__ = [
     'get_eggs', 
     'get_autodeploy_info', 
     'improve_list_servers',
+    'invalidate_user_servers',
+    'invalidate_server',
     'get_server_information', 
     'suspend_server', 
     'unsuspend_server',
     'get_node_allocation', 
     'transfer_server',
+    # Inventory
+    'inventory',
+    'ServerInventory',
+    # Allocations
+    'allocation_index',
+    'AllocationIndex',
+    # Pterodactyl Client
+    'ptero',
+    'PteroClient',
+    # Executor
+    'submit',
+    'executor_metrics',
+    # Server Actions
+    'enqueue_action',
+    'enqueue_actions',
+    'process_actions',
+    'action_counts',
+    # Sweep
+    'run_sweep',
+    'sweep_rule',
+    # Job Lock
+    'cluster_job',
+    'job_metrics',
+    'get_job_runs',
+    # Cache Sync
+    'publish_invalidation',
+    'poll_invalidations',
+    # Migrations
+    'apply_migrations',
+    'check_hot_queries',
+    # Stats
+    'get_stats',
+    'get_stats_history',
+    'refresh_stats',
     # Credit Manager
     'add_credits', 
     'remove_credits', 
     'get_credits', 
     'convert_to_product',
+    'convert_to_products',
+    'rebuild_product_index',
     'use_credits', 
     'check_to_unsuspend',
+    # Credit Ledger
+    'apply_credits',
+    'apply_credits_bulk',
     # Email Manager
     'send_email', 
     'generate_verification_token', 
@@ -79,8 +146,11 @@ __all__ = [
     'admin_required',
     # Maintenance
     'sync_users_script',
+    'archive_activity_logs',
     # Logging
     'webhook_log',
+    'flush_webhook_log',
+    'webhook_log_metrics',
     # Utils
     'get_db_connection',
     # Constants
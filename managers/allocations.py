@@ -0,0 +1,252 @@
+"""
+Allocation Index Module
+=================
+
+This module keeps an in-process index of free allocations per node:
+- Free sets loaded once per node and refreshed in the background
+- O(1) reservation of a random free allocation
+- Short reservation leases so concurrent creates/transfers in this process never
+  get the same port
+- Release of a reservation when the create or transfer fails
+
+The index and its leases live in process memory. Leases are broadcast to the
+other processes (managers.cache_sync), but only within CACHE_SYNC_INTERVAL
+seconds, so two processes can still pick the same allocation. The panel is the
+final guard: it rejects an allocation that is already assigned with a 422, and
+callers then discard() it and retry with another one (is_allocation_conflict).
+
+Usage:
+    from managers.allocations import allocation_index
+    allocation_id = allocation_index.reserve(node_id)
+    ...
+    allocation_index.release(allocation_id)   # only if the server wasn't created
+    allocation_index.discard(allocation_id)   # the panel says it is taken
+"""
+
+import secrets
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+import requests
+from .ptero_client import ptero
+from .cache_sync import register_handler, publish
+
+try:
+    from config import ALLOCATION_LEASE_TTL  # type: ignore
+except ImportError:
+    ALLOCATION_LEASE_TTL = 120
+
+try:
+    from config import ALLOCATION_INDEX_MAX_AGE  # type: ignore
+except ImportError:
+    ALLOCATION_INDEX_MAX_AGE = 300
+
+try:
+    from config import ALLOCATION_INDEX_REFRESH_INTERVAL  # type: ignore
+except ImportError:
+    ALLOCATION_INDEX_REFRESH_INTERVAL = 60
+
+# An empty node is refetched at most this often (seconds) when a reservation misses
+EMPTY_RECHECK_INTERVAL = 10
+
+# Extra attempts with a fresh allocation when the panel reports the allocation taken
+ALLOCATION_CONFLICT_RETRIES = 2
+
+
+def is_allocation_conflict(response: requests.Response) -> bool:
+    """
+    True if the panel rejected a create or transfer because the allocation is
+    already assigned, which happens when another process leased it too.
+    """
+    return response.status_code == 422 and "allocation" in response.text.lower()
+
+
+class FreeSet:
+    """
+    Set of free allocation ids supporting O(1) add, discard and random pop.
+
+    Ids live in a list with a reverse index; removal swaps the last id into the
+    removed slot.
+    """
+
+    def __init__(self, ids: Iterable[int] = (), loaded_at: float = 0.0):
+        self.ids = []
+        self.positions: Dict[int, int] = {}
+        self.loaded_at = loaded_at
+        for allocation_id in ids:
+            self.add(allocation_id)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, allocation_id: int) -> None:
+        if allocation_id not in self.positions:
+            self.positions[allocation_id] = len(self.ids)
+            self.ids.append(allocation_id)
+
+    def discard(self, allocation_id: int) -> None:
+        index = self.positions.pop(allocation_id, None)
+        if index is None:
+            return
+        last = self.ids.pop()
+        if last != allocation_id:
+            self.ids[index] = last
+            self.positions[last] = index
+
+    def pop_random(self) -> Optional[int]:
+        if not self.ids:
+            return None
+        allocation_id = self.ids[secrets.randbelow(len(self.ids))]
+        self.discard(allocation_id)
+        return allocation_id
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+
+class AllocationIndex:
+    """
+    Shared index of free allocations per node.
+
+    A node is loaded the first time it's asked for and then kept fresh by
+    refresh_all() (scheduled in app.py). reserve() hands out a random free
+    allocation and leases it for ALLOCATION_LEASE_TTL seconds; refreshes never
+    hand a leased allocation back out. Once the server is created the panel marks
+    the allocation assigned, so the lease can simply expire.
+
+    Leases are broadcast through managers.cache_sync, so other processes stop
+    handing the allocation out within CACHE_SYNC_INTERVAL seconds.
+    """
+
+    def __init__(self, lease_ttl: float = ALLOCATION_LEASE_TTL, max_age: float = ALLOCATION_INDEX_MAX_AGE):
+        self.lease_ttl = lease_ttl
+        self.max_age = max_age
+        self._free: Dict[int, FreeSet] = {}
+        # allocation id -> (node id, lease expiry)
+        self._leases: Dict[int, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._node_locks: Dict[int, threading.Lock] = {}
+
+    def _node_lock(self, node_id: int) -> threading.Lock:
+        with self._lock:
+            return self._node_locks.setdefault(node_id, threading.Lock())
+
+    def _expire_leases(self, now: float) -> None:
+        # Called with self._lock held
+        for allocation_id in [a for a, (_, expires) in self._leases.items() if expires <= now]:
+            del self._leases[allocation_id]
+
+    def refresh(self, node_id: int) -> bool:
+        """
+        Reloads the free set of a node from the panel.
+
+        Concurrent refreshes of the same node wait on one fetch.
+
+        Returns:
+            bool: True if the node was loaded
+        """
+        node_id = int(node_id)
+        node_lock = self._node_lock(node_id)
+        started = time.monotonic()
+        with node_lock:
+            current = self._free.get(node_id)
+            if current is not None and current.loaded_at >= started:
+                return True
+
+            try:
+                free_ids = [
+                    allocation['attributes']['id']
+                    for allocation in ptero.iter_pages(f"api/application/nodes/{node_id}/allocations")
+                    if not allocation['attributes']['assigned']
+                ]
+            except (requests.RequestException, KeyError, ValueError) as e:
+                # ValueError covers an unparsable body; keep the previous free set
+                print(f"Error fetching allocations for node {node_id}: {e}")
+                return False
+
+            with self._lock:
+                self._expire_leases(time.monotonic())
+                free = FreeSet((a for a in free_ids if a not in self._leases), time.monotonic())
+                self._free[node_id] = free
+            return True
+
+    def refresh_all(self) -> int:
+        """
+        Refreshes every node that has been loaded so far; run by the scheduler.
+
+        Returns:
+            int: Number of nodes refreshed
+        """
+        with self._lock:
+            node_ids = list(self._free)
+        return sum(1 for node_id in node_ids if self.refresh(node_id))
+
+    def reserve(self, node_id: int) -> Optional[int]:
+        """
+        Takes a random free allocation on a node and leases it.
+
+        Args:
+            node_id: ID of the node
+
+        Returns:
+            int: Allocation ID
+            None: If the node has no free allocation
+        """
+        node_id = int(node_id)
+        free = self._free.get(node_id)
+        if free is None or free.age > self.max_age or (not free and free.age > EMPTY_RECHECK_INTERVAL):
+            if not self.refresh(node_id) and free is None:
+                return None
+
+        with self._lock:
+            free = self._free.get(node_id)
+            allocation_id = free.pop_random() if free is not None else None
+            if allocation_id is not None:
+                self._leases[allocation_id] = (node_id, time.monotonic() + self.lease_ttl)
+        if allocation_id is not None:
+            publish("allocation", allocation_id)
+        return allocation_id
+
+    def lease_elsewhere(self, allocation_id: Optional[int]) -> None:
+        """Takes an allocation leased by another process out of this process's free sets."""
+        if allocation_id is None:
+            return
+        with self._lock:
+            for node_id, free in self._free.items():
+                if allocation_id in free.positions:
+                    free.discard(allocation_id)
+                    self._leases[allocation_id] = (node_id, time.monotonic() + self.lease_ttl)
+                    break
+
+    def release(self, allocation_id: Optional[int]) -> None:
+        """Returns a reserved allocation to its node's free set, e.g. after a failed create."""
+        if allocation_id is None:
+            return
+        with self._lock:
+            lease = self._leases.pop(allocation_id, None)
+            if lease is not None and lease[0] in self._free:
+                self._free[lease[0]].add(allocation_id)
+
+    def discard(self, allocation_id: Optional[int]) -> None:
+        """Drops a reservation without returning it to the free set, e.g. after the panel reported it taken."""
+        if allocation_id is None:
+            return
+        with self._lock:
+            self._leases.pop(allocation_id, None)
+            for free in self._free.values():
+                free.discard(allocation_id)
+
+    def free_count(self, node_id: int) -> int:
+        """Free (unleased) allocations on a node, loading it if needed."""
+        node_id = int(node_id)
+        free = self._free.get(node_id)
+        if free is None or (not free and free.age > EMPTY_RECHECK_INTERVAL):
+            self.refresh(node_id)
+            free = self._free.get(node_id)
+        return len(free) if free is not None else 0
+
+
+# Shared instance
+allocation_index = AllocationIndex()
+register_handler("allocation", allocation_index.lease_elsewhere)
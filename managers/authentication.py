@@ -12,26 +12,16 @@ to authenticate and register users across the system.
 """
 from threadedreturn import ThreadWithReturnValue
 import bcrypt
-import requests
-import threading
-from config import PTERODACTYL_URL, PTERODACTYL_ADMIN_KEY
 from managers.database_manager import DatabaseManager
 from .logging import webhook_log
-from .user_manager import update_ip, update_last_seen
+from .ptero_client import ptero
+from .user_manager import update_ip, update_last_seen, record_last_seen
 from functools import wraps
 from flask import session, redirect, url_for, current_app, render_template, request
 from urllib.parse import quote
 from managers.email_manager import send_email
 from security import safe_requests
 
-
-# API authentication headers
-HEADERS = {
-    "Authorization": f"Bearer {PTERODACTYL_ADMIN_KEY}",
-    'Accept': 'application/json',
-    'Content-Type': 'application/json'
-}
-
 def login_required(f):
     """
     Decorator that checks if a user is logged in.
@@ -50,7 +40,7 @@ def login_required(f):
             # Only pass the path portion of the URL for redirection after login
             next_url = request.path
             return redirect(url_for('user.login_user', next=next_url))
-        update_last_seen(session['email'])
+        record_last_seen(session['email'])
         return f(*args, **kwargs)
         
     return decorated_function
@@ -155,11 +145,8 @@ def login(email: str, password: str, ip: str):
                 email_subject = "Account Deletion Cancelled"
                 email_body = "Your account was previously marked for deletion, but since you've logged in, the deletion process has been cancelled. Your account is now fully active again."
                 
-                # Send email in a separate thread to avoid blocking
-                threading.Thread(
-                    target=send_email, 
-                    args=(email, email_subject, email_body, current_app._get_current_object())
-                ).start()
+                # Send email on the SMTP pool to avoid blocking
+                send_email(email, email_subject, email_body, current_app._get_current_object())
                 
                 # Log the cancellation
                 webhook_log(f"User {email} logged in, cancelling pending account deletion", 0, database_log=True)
@@ -235,7 +222,7 @@ def register(email: str, password: str, name: str, ip: str):
         "password": password
     }
 
-    response = requests.post(f"{PTERODACTYL_URL}api/application/users", headers=HEADERS, json=body, timeout=60)
+    response = ptero.post("api/application/users", json=body)
     data = response.json()
 
     try:
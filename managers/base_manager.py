@@ -8,7 +8,8 @@ It contains common functionality and utilities used across different managers.
 
 import requests
 from typing import Optional, Any, Dict
-from config import PTERODACTYL_URL, PTERODACTYL_ADMIN_KEY
+from config import PTERODACTYL_ADMIN_KEY
+from .ptero_client import ptero
 
 class BaseManager:
     """
@@ -50,16 +51,14 @@ class BaseManager:
         Raises:
             Exception: If request fails
         """
-        url = f"{PTERODACTYL_URL}{endpoint}"
-        
         try:
-            response = requests.request(
-                method=method,
-                url=url,
+            response = ptero.request(
+                method,
+                endpoint,
                 headers=cls.HEADERS,
                 json=data,
-                params=params, 
-            timeout=60)
+                params=params
+            )
             response.raise_for_status()
             return response.json() if response.text else None
             
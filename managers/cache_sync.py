@@ -0,0 +1,111 @@
+"""
+Cache Sync Module
+=================
+
+This module broadcasts cache invalidations to every panel process:
+- publish() records an invalidation in the cache_invalidations table
+- Every process polls the table (app.py) and runs the handler registered
+  for each new entry's scope
+- Old entries are pruned after CACHE_SYNC_RETENTION seconds
+
+Caches such as the server inventory, the per-user server lists and the
+allocation index live in process memory. An invalidation made in one worker,
+or in a scheduled job running in just one process (managers.job_lock), reaches
+the other workers within CACHE_SYNC_INTERVAL seconds.
+
+Usage:
+    register_handler("server", lambda owner_id: ...)   # at import, in every process
+    publish("server", owner_id)                        # after changing the server
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+from .database_manager import DatabaseManager
+
+try:
+    from config import CACHE_SYNC_INTERVAL  # type: ignore
+except ImportError:
+    CACHE_SYNC_INTERVAL = 5
+
+try:
+    from config import CACHE_SYNC_RETENTION  # type: ignore
+except ImportError:
+    CACHE_SYNC_RETENTION = 3600
+
+# Entries read per poll; a larger backlog is drained over the following polls
+POLL_BATCH_SIZE = 1000
+
+_handlers: Dict[str, Callable[[Optional[int]], None]] = {}
+_poll_lock = threading.Lock()
+_last_id: Optional[int] = None
+_last_prune = 0.0
+
+
+def register_handler(scope: str, handler: Callable[[Optional[int]], None]) -> None:
+    """
+    Registers the local invalidation for a scope.
+
+    Args:
+        scope: Name of the cache, e.g. "server"
+        handler: Called with the entry's item id (or None) in every process
+    """
+    _handlers[scope] = handler
+
+
+def publish(scope: str, item_id: Optional[int] = None) -> None:
+    """
+    Tells every process to run the scope's handler for item_id.
+
+    The caller is expected to have invalidated its own process already. Failures
+    are logged rather than raised: the other processes still converge once their
+    caches expire.
+    """
+    try:
+        DatabaseManager.execute_query(
+            "INSERT INTO cache_invalidations (scope, item_id) VALUES (%s, %s)",
+            (scope, item_id)
+        )
+    except Exception as e:
+        print(f"Error publishing {scope} invalidation: {e}")
+
+
+def poll() -> int:
+    """
+    Runs the handlers for entries published since the last poll; scheduled in every process.
+
+    The first poll only records the current position, since a fresh process has
+    nothing cached yet.
+
+    Returns:
+        int: Number of entries handled
+    """
+    global _last_id, _last_prune
+    with _poll_lock:
+        if _last_id is None:
+            row = DatabaseManager.execute_query("SELECT COALESCE(MAX(id), 0) FROM cache_invalidations")
+            _last_id = int(row[0]) if row else 0
+            return 0
+
+        rows = DatabaseManager.execute_query(
+            "SELECT id, scope, item_id FROM cache_invalidations WHERE id > %s ORDER BY id LIMIT %s",
+            (_last_id, POLL_BATCH_SIZE),
+            fetch_all=True
+        ) or []
+        for entry_id, scope, item_id in rows:
+            _last_id = entry_id
+            handler = _handlers.get(scope)
+            if handler is None:
+                continue
+            try:
+                handler(item_id)
+            except Exception as e:
+                print(f"Error handling {scope} invalidation: {e}")
+
+        if time.monotonic() - _last_prune > CACHE_SYNC_RETENTION / 4:
+            _last_prune = time.monotonic()
+            DatabaseManager.execute_query(
+                "DELETE FROM cache_invalidations WHERE created_at < NOW() - INTERVAL %s SECOND",
+                (CACHE_SYNC_RETENTION,)
+            )
+        return len(rows)
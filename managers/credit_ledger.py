@@ -0,0 +1,131 @@
+"""
+Credit Ledger Module
+=================
+
+This module is the single write path for user credit balances:
+- Atomic, single-statement balance changes (no read-modify-write)
+- Guarded debits that never take a balance below zero
+- Append-only audit trail in the credit_transactions table
+- Set-based bulk application for the hourly billing run
+
+Every balance change is written together with its credit_transactions row in
+one database transaction.
+"""
+
+from typing import Optional, List, Set, Tuple
+from .database_manager import DatabaseManager
+
+# Rows per statement when applying bulk changes
+BULK_CHUNK_SIZE = 1000
+
+
+def apply_credits(email: str, amount: float, reason: str, allow_negative: bool = False, cursor=None) -> Optional[float]:
+    """
+    Atomically changes a user's balance by `amount` and records it in the ledger.
+
+    Args:
+        email: User's email
+        amount: Credits to add (negative to remove)
+        reason: Short label stored with the ledger entry (e.g. "purchase", "server_create")
+        allow_negative: If False, a debit larger than the balance is rejected
+        cursor: Cursor of a DatabaseManager.transaction() the change becomes part of;
+                by default the change is committed on its own
+
+    Returns:
+        float: New balance
+        None: If the user doesn't exist or the debit was rejected
+    """
+    if cursor is None:
+        with DatabaseManager.transaction() as cursor:
+            return apply_credits(email, amount, reason, allow_negative, cursor)
+
+    if amount < 0 and not allow_negative:
+        update_query = "UPDATE users SET credits = credits + %s WHERE email = %s AND credits >= %s"
+        update_values = (float(amount), email, float(-amount))
+    else:
+        # credits is unsigned, so an allowed overdraft bottoms out at zero
+        update_query = "UPDATE users SET credits = GREATEST(credits + %s, 0) WHERE email = %s"
+        update_values = (float(amount), email)
+
+    cursor.execute(update_query, update_values)
+    if cursor.rowcount == 0:
+        return None
+
+    cursor.execute(
+        "INSERT INTO credit_transactions (email, amount, balance_after, reason) "
+        "SELECT email, %s, credits, %s FROM users WHERE email = %s",
+        (float(amount), reason, email)
+    )
+    cursor.execute("SELECT credits FROM users WHERE email = %s", (email,))
+    row = cursor.fetchone()
+    return float(row[0]) if row else None
+
+
+def charged_in_batch(batch_key: str) -> Set[str]:
+    """
+    Args:
+        batch_key: Batch passed to apply_credits_bulk()
+
+    Returns:
+        set[str]: Emails that already have a ledger entry for the batch
+    """
+    rows = DatabaseManager.execute_query(
+        "SELECT DISTINCT email FROM credit_transactions WHERE batch_key = %s",
+        (batch_key,),
+        fetch_all=True
+    )
+    return {row[0] for row in rows or []}
+
+
+def apply_credits_bulk(changes: List[Tuple[str, float]], reason: str, batch_key: Optional[str] = None) -> int:
+    """
+    Applies many balance changes as a handful of set-based statements.
+
+    Changes are joined against the users table in chunks of BULK_CHUNK_SIZE, so billing
+    tens of thousands of users costs a few dozen statements instead of one per user.
+    Balances are clamped at zero.
+
+    Each chunk is committed on its own, so row locks on users are only held for one
+    chunk. With a batch_key, users that already have a ledger entry for that key are
+    skipped, so retrying a batch that failed part way never charges anyone twice.
+
+    Args:
+        changes: List of (email, amount) tuples, amount negative to remove credits
+        reason: Short label stored with every ledger entry
+        batch_key: Identifies this batch across retries (e.g. one billing period)
+
+    Returns:
+        int: Number of user rows updated
+    """
+    # Collapse repeated emails so each user row is matched exactly once
+    totals = {}
+    for email, amount in changes:
+        totals[email] = totals.get(email, 0.0) + float(amount)
+    changes = [(email, amount) for email, amount in totals.items() if amount]
+    if not changes:
+        return 0
+
+    # Users already charged in this batch are left out of both statements
+    seen_join = "LEFT JOIN credit_transactions t ON t.batch_key = %s AND t.email = u.email"
+    updated = 0
+    for start in range(0, len(changes), BULK_CHUNK_SIZE):
+        chunk = changes[start:start + BULK_CHUNK_SIZE]
+        derived = " UNION ALL ".join(["SELECT %s AS email, %s AS amount"] * len(chunk))
+        values = tuple(value for change in chunk for value in change)
+
+        with DatabaseManager.transaction() as cursor:
+            cursor.execute(
+                f"UPDATE users u JOIN ({derived}) d ON u.email = d.email {seen_join} "
+                "SET u.credits = GREATEST(u.credits + d.amount, 0) WHERE t.id IS NULL",
+                values + (batch_key,)
+            )
+            updated += cursor.rowcount
+
+            cursor.execute(
+                "INSERT INTO credit_transactions (email, amount, balance_after, reason, batch_key) "
+                f"SELECT u.email, d.amount, u.credits, %s, %s FROM users u JOIN ({derived}) d ON u.email = d.email "
+                f"{seen_join} WHERE t.id IS NULL",
+                (reason, batch_key) + values + (batch_key,)
+            )
+
+    return updated
@@ -3,7 +3,7 @@ Credit Management Module
 =================
 
 This module handles all credit-related operations including:
-- Credit addition and removal
+- Credit addition and removal (through the credit ledger)
 - Automated credit usage calculation
 - Server suspension based on credit status
 - Credit-based server unsuspension
@@ -12,99 +12,74 @@ Functions in this module interact with both the local database and the Pterodact
 to manage the credit system across the platform.
 """
 
-import threading
-from threadedreturn import ThreadWithReturnValue
 from managers.database_manager import DatabaseManager
-from config import PTERODACTYL_URL, PTERODACTYL_ADMIN_KEY
+from .credit_ledger import apply_credits
 from products import products
 from .logging import webhook_log
-from .email_manager import send_email
-from .server_manager import suspend_server, unsuspend_server, delete_server
-from .user_manager import check_if_user_suspended
-from security import safe_requests
-from flask import current_app
-import datetime
+from .user_manager import invalidate_principal
+from bisect import bisect_left
 
-# API authentication headers
-HEADERS = {
-    "Authorization": f"Bearer {PTERODACTYL_ADMIN_KEY}",
-    'Accept': 'application/json',
-    'Content-Type': 'application/json'
-}
+# Product lookup index, built by rebuild_product_index()
+_products_by_memory = {}    # memory -> first product with that memory
+_product_memories = []      # sorted distinct memories
+_product_order = {}         # memory -> list position of its product (tie-break)
+_nearest_products = {}      # unmatched memory -> closest product
 
-def add_credits(email: str, amount: int, set_client: bool = True):
+def add_credits(email: str, amount: int, set_client: bool = True, reason: str = "add"):
     """
     Adds credits to a user's account.
     
     Process:
-    1. Gets current credits from database
-    2. Adds specified amount
-    3. Updates database
-    4. Optionally sets user role to 'client'
+    1. Atomically adds specified amount in the database (recorded in the credit ledger)
+    2. Optionally sets user role to 'client'
     
     Args:
         email: User's email
         amount: Number of credits to add
         set_client: Whether to set user role to 'client'
+        reason: Ledger label for the change
     
     Returns:
         None
     """
-    # Get current credits
-    query = "SELECT credits FROM users WHERE email = %s"
-    result = DatabaseManager.execute_query(query, (email,))
+    new_credits = apply_credits(email, amount, reason, allow_negative=True)
     
-    if result:
-        current_credits = float(result[0])
-        new_credits = current_credits + amount
-        
-        # Update credits
-        update_query = "UPDATE users SET credits = %s WHERE email = %s"
-        DatabaseManager.execute_query(update_query, (float(new_credits), email))
-        
+    if new_credits is not None:
         # Optionally set role to client
         if set_client:
             role_query = "UPDATE users SET role = 'client' WHERE email = %s"
             DatabaseManager.execute_query(role_query, (email,))
+            invalidate_principal(email)
             
         webhook_log(f"Added {amount} credits to {email}. New balance: {new_credits}", database_log=True)
 
-def remove_credits(email: str, amount: float):
+def remove_credits(email: str, amount: float, reason: str = "remove"):
     """
     Removes credits from a user's account.
     
     Process:
-    1. Gets current credits
-    2. If user has enough credits:
-        - Subtracts amount
-        - Updates database
-    3. If not enough credits:
+    1. Atomically subtracts amount only if the balance covers it
+       (recorded in the credit ledger)
+    2. If not enough credits:
         - Returns "SUSPEND"
     
     Args:
         email: User's email
         amount: Number of credits to remove
+        reason: Ledger label for the change
     
     Returns:
         "SUSPEND": If user doesn't have enough credits
         None: If credits successfully removed
     """
-    # Get current credits
-    query = "SELECT credits FROM users WHERE email = %s"
-    result = DatabaseManager.execute_query(query, (email,))
-    
-    if result:
-        current_credits = float(result[0])
-        if current_credits >= amount:
-            new_credits = current_credits - amount
-            
-            # Update credits
-            update_query = "UPDATE users SET credits = %s WHERE email = %s"
-            DatabaseManager.execute_query(update_query, (float(new_credits), email))
-            
-            return None
-        else:
-            return "SUSPEND"
+    new_credits = apply_credits(email, -amount, reason)
+    if new_credits is not None:
+        return None
+    
+    # Debit rejected: distinguish an insufficient balance from an unknown user
+    query = "SELECT 1 FROM users WHERE email = %s"
+    if DatabaseManager.execute_query(query, (email,)):
+        return "SUSPEND"
     return None
 
 def get_credits(email: str):
@@ -123,6 +98,37 @@ def get_credits(email: str):
         return float(result[0])
     return 0.0
 
+def rebuild_product_index(product_list: list = None):
+    """
+    Rebuilds the memory -> product index used by convert_to_product.
+    Built at import; call again after the products list is reloaded or edited.
+    
+    Args:
+        product_list: Products to index, defaults to products.products
+    
+    Returns:
+        None
+    """
+    global _products_by_memory, _product_memories, _product_order, _nearest_products
+    by_memory = {}
+    order = {}
+    for position, product in enumerate(products if product_list is None else product_list):
+        memory = product['limits']['memory']
+        if memory not in by_memory:
+            by_memory[memory] = product
+            order[memory] = position
+    
+    # Swap in complete structures so concurrent lookups never see a half-built index
+    _products_by_memory, _product_memories, _product_order, _nearest_products = by_memory, sorted(by_memory), order, {}
+
+def _nearest_product(memory):
+    # Closest neighbours on either side; ties go to the product listed first, like min() did
+    memories = _product_memories
+    index = bisect_left(memories, memory)
+    candidates = memories[max(index - 1, 0):index + 1]
+    best = min(candidates, key=lambda m: (abs(m - memory), _product_order[m]))
+    return _products_by_memory[best]
+
 def convert_to_product(data):
     """
     Returns Product with matched MEMORY count all other fields ignored.
@@ -136,226 +142,69 @@ def convert_to_product(data):
     memory = data['attributes']['limits']['memory']
     
     # Find matching product based on memory
-    for product in products:
-        if product['limits']['memory'] == memory:
-            return product
+    product = _products_by_memory.get(memory)
+    if product is not None:
+        return product
             
     # If no exact match, find closest match
-    closest_product = min(products, key=lambda p: abs(p['limits']['memory'] - memory))
-    return closest_product
+    product = _nearest_products.get(memory)
+    if product is None:
+        product = _nearest_product(memory)
+        _nearest_products[memory] = product
+    return product
 
-def use_credits():
+def convert_to_products(servers: list) -> list:
     """
-    Scheduled task that processes credit usage for all servers.
+    Maps a list of servers to their products in one call.
     
-    Process:
-    1. Gets all servers
-    2. Batch processes servers by user
-    3. Makes a single database query per user
-    4. Processes credit deductions individually for each server
-    5. Suspends servers if needed
+    Args:
+        servers: Server data list
     
     Returns:
-        None
+        list: Product for each server, in the same order
+    """
+    by_memory = _products_by_memory
+    return [by_memory.get(server['attributes']['limits']['memory']) or convert_to_product(server) for server in servers]
+
+rebuild_product_index()
+
+def use_credits(dry_run: bool = False):
     """
-    # Get all servers from Pterodactyl
-    response = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers?per_page=100000", headers=HEADERS, timeout=60)
-    if response.status_code != 200:
-        webhook_log(f"Failed to get servers for credit processing: {response.status_code}", database_log=True)
-        return
-        
-    servers = response.json()
-    if 'data' not in servers:
-        webhook_log("No servers found for credit processing")
-        return
-        
-    # Group servers by user
-    user_servers = {}
-    for server in servers['data']:
-        user_id = server['attributes']['user']
-        if user_id not in user_servers:
-            user_servers[user_id] = []
-        user_servers[user_id].append(server)
+    Runs the billing rule of the fleet sweep on its own (managers.sweep).
     
-    # Process each user's servers
-    for user_id, servers in user_servers.items():
-        # Get user email from Pterodactyl
-        user_response = safe_requests.get(f"{PTERODACTYL_URL}api/application/users/{user_id}", headers=HEADERS, timeout=60)
-        if user_response.status_code != 200:
-            webhook_log(f"Failed to get user {user_id} for credit processing: {user_response.status_code}", database_log=False)
-            continue
-            
-        user_email = user_response.json()['attributes']['email']
-        
-        # Get current user credits
-        user_credits = float(get_credits(user_email))
-        remaining_credits = user_credits
-        
-        # Process each server individually
-        for server in servers:
-            # Skip suspended servers
-            if server['attributes']['suspended']:
-                continue
-                
-            # Get product info based on server specs
-            product = convert_to_product(server)
-            hourly_cost = float(product['price'])/30.0/24.0
-            
-            # Check if user has enough credits for this server
-            if remaining_credits >= hourly_cost:
-                # User can afford this server, deduct credits
-                remaining_credits -= hourly_cost
-            else:
-                # User can't afford this server, suspend it
-                server_id = server['attributes']['id']
-                server_name = server['attributes']['name']
-                webhook_log(f"User {user_email} can't afford server {server_name} (ID: {server_id}). Suspending.", database_log=True)
-                ThreadWithReturnValue(target=send_email, args=(user_email, f"Server suspended", f"Your server: {server_name} has been suspended due to your account running out of credits. If your account balance remains the same in 4 days, your server will be deleted permanently.", current_app._get_current_object())).start()
-                threading.Thread(target=suspend_server, args=(server_id,)).start()
-        
-        # Update user's credits with the remaining amount
-        if user_credits > 0:
-            # Calculate how many credits were used
-            credits_used = user_credits - remaining_credits
-            if credits_used > 0:
-                # Update database with new credit amount
-                update_query = "UPDATE users SET credits = %s WHERE email = %s"
-                DatabaseManager.execute_query(update_query, (float(remaining_credits), user_email))
+    Charges each owner's hourly usage in one batched ledger write and queues
+    suspensions for the servers the owner can no longer afford.
+    
+    Args:
+        dry_run: Compute charges and suspensions without writing or suspending anything
+    
+    Returns:
+        dict: Sweep report with the planned charges/actions and timings (seconds)
+        None: If the server list couldn't be fetched
+    """
+    from .sweep import run_sweep
+    return run_sweep(["billing"], dry_run=dry_run)
 
 def check_to_unsuspend():
     """
-    Scheduled task that checks for servers that can be unsuspended.
+    Runs the unsuspend rule of the fleet sweep on its own (managers.sweep).
     
-    Process:
-    1. Gets all servers
-    2. Groups suspended servers by user
-    3. For each user, checks which servers they can afford
-    4. Unsuspends only the affordable servers
+    Unsuspends the suspended servers each owner can afford (cheapest first) and
+    deletes unaffordable ones that have been suspended for more than 3 days.
     
     Returns:
         None
     """
-    # Get all servers from Pterodactyl
-    response = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers?per_page=100000", headers=HEADERS, timeout=60)
-    if response.status_code != 200:
-        threading.Thread(target=webhook_log, args=(f"Failed to get servers for unsuspension check: {response.status_code}", 2)).start()
-        return
-        
-    servers = response.json()
-    if 'data' not in servers:
-        return
-    
-    # Group suspended servers by user
-    user_suspended_servers = {}
-    
-    # Process all servers to find suspended ones
-    for server in servers['data']:
-        user_id = server['attributes']['user']
-        
-        # Only process suspended servers for unsuspension check
-        if server['attributes']['suspended']:
-            if user_id not in user_suspended_servers:
-                user_suspended_servers[user_id] = []
-            user_suspended_servers[user_id].append(server)
-    
-    # Process each user's suspended servers
-    for user_id, suspended_servers in user_suspended_servers.items():
-        # Get user email from Pterodactyl
-        user_response = safe_requests.get(f"{PTERODACTYL_URL}api/application/users/{user_id}", headers=HEADERS, timeout=60)
-        if user_response.status_code != 200:
-            threading.Thread(target=webhook_log, args=(f"Failed to get user {user_id} for unsuspension check: {user_response.status_code}", 2)).start()
-            continue
-            
-        user_email = user_response.json()['attributes']['email']
-        user_credits = float(get_credits(user_email))
-        
-        # Sort servers by cost (cheapest first) to maximize number of servers that can be unsuspended
-        sorted_servers = sorted(suspended_servers, key=lambda s: convert_to_product(s)['price'])
-        
-        # Try to unsuspend as many servers as possible
-        remaining_credits = user_credits
-        for server in sorted_servers:
-            server_id = server['attributes']['id']
-            server_name = server['attributes']['name']
-            
-            # Get product info based on server specs
-            product = convert_to_product(server)
-            hourly_cost = float(product['price'])/30.0/24.0
-            
-            # If this is a free-tier server (price=0), and the owner hasn't logged in for 15+ days,
-            # do NOT unsuspend here. This respects the inactivity suspension policy handled in maintenance.
-            try:
-                if int(product['price']) == 0:
-                    last_seen_result = DatabaseManager.execute_query(
-                        "SELECT last_seen FROM users WHERE pterodactyl_id = %s",
-                        (user_id,)
-                    )
-                    if last_seen_result and last_seen_result[0] is not None:
-                        last_seen = last_seen_result[0]
-                        if datetime.datetime.now() - last_seen > datetime.timedelta(days=15):
-                            # Skip unsuspension due to inactivity
-                            continue
-            except Exception:
-                # Fail-open to existing behavior if any error occurs
-                pass
-
-            # Check if user has enough credits for this server
-            if remaining_credits >= hourly_cost:
-                # User can afford this server, unsuspend it
-                webhook_log(f"Unsuspending server {server_name} (ID: {server_id}) for user {user_email} (has {remaining_credits:.2f} credits)", database_log=True)
-                threading.Thread(target=unsuspend_server, args=(server_id,)).start()
-                
-                # Deduct credits for this server
-                remaining_credits -= hourly_cost
-            else:
-                # Check if server has been suspended for too long
-                try:
-                    suspended_at = server['attributes']['updated_at']
-                    suspension_time = datetime.datetime.strptime(suspended_at, "%Y-%m-%dT%H:%M:%S+00:00")
-                    suspension_duration = datetime.datetime.now() - suspension_time
-
-                    if suspension_duration.days > 3:
-                        webhook_log(f"Deleting server {server_name} (ID: {server_id}) due to suspension for more than 3 days", database_log=True)
-                        threading.Thread(target=delete_server, args=(server_id,)).start()
-                except (ValueError, KeyError) as e:
-                    threading.Thread(target=webhook_log, args=(f"Error processing suspension duration for server {server_id}: {str(e)}", 1)).start()
+    from .sweep import run_sweep
+    run_sweep(["unsuspend"])
 
 def delete_suspended_users_servers():
     """
-    Scheduled task that deletes servers of suspended users.
-    
-    Process:
-    1. Gets all servers
-    2. Checks if each server's owner is suspended
-    3. Deletes servers of suspended users
+    Runs the suspended-user rule of the fleet sweep on its own (managers.sweep),
+    deleting every server of a suspended user.
     
     Returns:
         None
     """
-    # Get all servers from Pterodactyl
-    response = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers?per_page=100000", headers=HEADERS, timeout=60)
-    if response.status_code != 200:
-        threading.Thread(target=webhook_log, args=(f"Failed to get servers for suspension check: {response.status_code}", 2)).start()
-        return
-        
-    servers = response.json()
-    if 'data' not in servers:
-        return
-    
-    # Cache user suspension status
-    suspension_status = {}
-    
-    # Process all servers to check for suspended users
-    for server in servers['data']:
-        user_id = server['attributes']['user']
-        server_id = server['attributes']['id']
-        server_name = server['attributes']['name']
-        
-        # Check user suspension only once per user
-        if user_id not in suspension_status:
-            suspension_status[user_id] = check_if_user_suspended(user_id)
-        
-        # Delete servers of suspended users
-        if suspension_status[user_id]:
-            threading.Thread(target=delete_server, args=(server_id,)).start()
-            threading.Thread(target=webhook_log, args=(f"Server {server_name} (ID: {server_id}) deleted due to user suspension", 1)).start()
+    from .sweep import run_sweep
+    run_sweep(["suspended_users"])
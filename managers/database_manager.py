@@ -5,39 +5,277 @@ Database Manager Module
 This module provides the DatabaseManager class that handles all database operations.
 It encapsulates database connection and query execution while maintaining compatibility
 with existing codebase functionality.
+
+Connections are served from a bounded, thread-safe pool (one pool per database) so the
+Flask request threads, the scheduler jobs and the Discord bot thread all reuse warm
+connections instead of paying a TCP + auth handshake for every query.
+
+Every execute_query/execute_many call commits before it returns and raises if the commit
+fails. Statements that must succeed or fail together go through an explicit unit of work,
+DatabaseManager.transaction(), which commits when the block exits. Nothing is deferred to
+the end of an HTTP request, so no row locks or pooled connections are held across slow
+calls to the panel API.
 """
 
+import collections
+import threading
+import time
+from contextlib import contextmanager
 import mysql.connector
-from typing import Optional, Union, Tuple, List, Any
+from mysql.connector.constants import ClientFlag
+from mysql.connector.errors import PoolError
+from typing import Optional, Union, Tuple, List, Any, Dict, Iterator
 from .base_manager import BaseManager
 from config import DATABASE, HOST, PASSWORD, USER
 
+try:
+    from config import DB_POOL_SIZE  # type: ignore
+except ImportError:
+    DB_POOL_SIZE = 20
+
+try:
+    from config import DB_POOL_TIMEOUT  # type: ignore
+except ImportError:
+    DB_POOL_TIMEOUT = 10
+
+try:
+    from config import DB_POOL_MAX_LIFETIME  # type: ignore
+except ImportError:
+    DB_POOL_MAX_LIFETIME = 3600
+
+
+class PooledConnection:
+    """
+    Thin proxy around a pooled MySQL connection.
+    Behaves like the wrapped connection, except close() hands it back to the pool.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', connection: mysql.connector.MySQLConnection, created_at: float):
+        self._pool = pool
+        self._connection = connection
+        self._created_at = created_at
+
+    def __getattr__(self, name: str) -> Any:
+        connection = self.__dict__.get('_connection')
+        if connection is None:
+            raise AttributeError(f"Pooled connection already returned to pool ({name})")
+        return getattr(connection, name)
+
+    def close(self) -> None:
+        """Returns the connection to the pool instead of closing it."""
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        self._pool.release(connection, self._created_at)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections for a single database.
+
+    - At most `size` connections are open at once; borrowers wait up to `timeout`
+      seconds for one to be returned before PoolError is raised.
+    - Idle connections are pinged on borrow and replaced if the server dropped them.
+    - Connections older than `max_lifetime` seconds are recycled.
+    """
+
+    def __init__(self, database: str, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT,
+                 max_lifetime: float = DB_POOL_MAX_LIFETIME):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self._idle = collections.deque()
+        self._open = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            "created": 0,
+            "borrowed": 0,
+            "recycled": 0,
+            "broken": 0,
+            "waits": 0,
+            "exhausted": 0,
+        }
+
+    def _connect(self) -> mysql.connector.MySQLConnection:
+        return DatabaseManager.connect(self.database)
+
+    def _expired(self, created_at: float) -> bool:
+        return self.max_lifetime > 0 and time.monotonic() - created_at > self.max_lifetime
+
+    def _count(self, key: str) -> None:
+        with self._condition:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _discard(connection: mysql.connector.MySQLConnection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self) -> PooledConnection:
+        """
+        Borrows a healthy connection, opening a new one if the pool has room.
+
+        Raises:
+            PoolError: If no connection became available within the timeout
+        """
+        deadline = time.monotonic() + self.timeout
+        connection = None
+        created_at = 0.0
+        with self._condition:
+            while True:
+                if self._idle:
+                    connection, created_at = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                self._stats["waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["exhausted"] += 1
+                    raise PoolError(f"Connection pool for '{self.database}' exhausted ({self.size} in use)")
+                self._condition.wait(remaining)
+
+        # Health check / recycle outside the lock so a slow ping doesn't stall other borrowers
+        if connection is not None:
+            if self._expired(created_at):
+                self._count("recycled")
+                self._discard(connection)
+                connection = None
+            elif not connection.is_connected():
+                self._count("broken")
+                self._discard(connection)
+                connection = None
+
+        if connection is None:
+            try:
+                connection = self._connect()
+            except Exception:
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                raise
+            created_at = time.monotonic()
+            self._count("created")
+
+        self._count("borrowed")
+        return PooledConnection(self, connection, created_at)
+
+    def release(self, connection: mysql.connector.MySQLConnection, created_at: float) -> None:
+        """Puts a connection back into the pool, discarding it if it is expired or unusable."""
+        keep = not self._expired(created_at)
+        if keep:
+            try:
+                # Never hand out a connection with an open transaction: it would leak
+                # row locks and pin the next borrower to a stale read snapshot.
+                if connection.in_transaction:
+                    connection.rollback()
+            except Exception:
+                keep = False
+
+        with self._condition:
+            if keep:
+                self._idle.append((connection, created_at))
+            else:
+                self._open -= 1
+            self._condition.notify()
+
+        if not keep:
+            self._discard(connection)
+
+    def metrics(self) -> Dict[str, int]:
+        """Returns pool usage counters, including how often borrowers had to wait or gave up."""
+        with self._condition:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                **self._stats,
+            }
+
+
 class DatabaseManager(BaseManager):
     """
     Manages database operations including connections and query execution.
     Designed to be compatible with existing database usage patterns.
     """
-    
+
+    _pools: Dict[str, ConnectionPool] = {}
+    _pools_lock = threading.Lock()
+
     @classmethod
-    def get_connection(cls, database: str = DATABASE) -> Tuple[mysql.connector.MySQLConnection, mysql.connector.cursor.MySQLCursor]:
+    def get_pool(cls, database: str = DATABASE) -> ConnectionPool:
         """
-        Creates and returns a database connection with standard configuration.
-        Direct replacement for get_db_connection.
+        Returns the shared connection pool for a database, creating it on first use.
+        
+        Args:
+            database: Database name
+            
+        Returns:
+            ConnectionPool: Pool serving connections to that database
+        """
+        pool = cls._pools.get(database)
+        if pool is None:
+            with cls._pools_lock:
+                pool = cls._pools.get(database)
+                if pool is None:
+                    pool = ConnectionPool(database)
+                    cls._pools[database] = pool
+        return pool
+
+    @classmethod
+    def pool_metrics(cls) -> Dict[str, Dict[str, int]]:
+        """
+        Returns usage counters for every connection pool, keyed by database name.
+        """
+        return {database: pool.metrics() for database, pool in list(cls._pools.items())}
+
+    @staticmethod
+    def connect(database: str = DATABASE) -> mysql.connector.MySQLConnection:
+        """
+        Opens a standalone connection outside of the pool, with the standard configuration.
+        
+        For long-lived holders (e.g. advisory locks held for a whole job) that would
+        otherwise keep a pooled connection away from request threads. close() really
+        closes it.
         
         Args:
             database: Database name to connect to
             
         Returns:
-            tuple: (connection, cursor)
+            MySQLConnection: New connection
         """
-        connection = mysql.connector.connect(
+        return mysql.connector.connect(
             host=HOST,
             user=USER,
             password=PASSWORD,
             database=database,
             charset='utf8mb4',
-            collation='utf8mb4_unicode_ci'
+            collation='utf8mb4_unicode_ci',
+            # rowcount reports matched rows, so a guarded UPDATE that leaves a value
+            # unchanged is still distinguishable from one that matched nothing
+            client_flags=[ClientFlag.FOUND_ROWS]
         )
+
+    @classmethod
+    def get_connection(cls, database: str = DATABASE) -> Tuple[mysql.connector.MySQLConnection, mysql.connector.cursor.MySQLCursor]:
+        """
+        Borrows a pooled database connection with standard configuration.
+        Direct replacement for get_db_connection.
+        
+        Calling close() on the returned connection hands it back to the pool.
+        
+        Args:
+            database: Database name to connect to
+            
+        Returns:
+            tuple: (connection, cursor)
+        """
+        connection = cls.get_pool(database).acquire()
         cursor = connection.cursor(buffered=True)
         return connection, cursor
 
@@ -135,3 +373,38 @@ class DatabaseManager(BaseManager):
                 cursor.close()
             if connection:
                 connection.close()
+
+    @classmethod
+    @contextmanager
+    def transaction(cls, database: str = DATABASE) -> Iterator[mysql.connector.cursor.MySQLCursor]:
+        """
+        Runs several statements on one connection as a single atomic unit.
+        
+        The unit is committed when the block exits, so keep slow external calls (panel API,
+        email) outside of it: row locks are held until the commit.
+        
+        Usage:
+            with DatabaseManager.transaction() as cursor:
+                cursor.execute(...)
+                cursor.execute(...)
+        
+        Args:
+            database: Target database name
+            
+        Yields:
+            MySQLCursor: Buffered cursor bound to the transaction
+            
+        Raises:
+            Exception: If database error occurs (the block is rolled back)
+        """
+        connection, cursor = cls.get_connection(database)
+        try:
+            yield cursor
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            print(f"Database error: {e}")
+            raise
+        finally:
+            cursor.close()
+            connection.close()
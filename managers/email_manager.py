@@ -11,7 +11,6 @@ This module handles all email-related operations including:
 Functions in this module interact with Flask-Mail to send emails to users.
 """
 
-import threading
 import secrets
 import string
 from flask_mail import Mail, Message
@@ -19,10 +18,14 @@ from flask import url_for, current_app
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from .executor import submit
+
+# Seconds before an SMTP connection or command gives up
+SMTP_TIMEOUT = 30
 
 def send_email(email: str, title: str, message: str, inner_app):
     """
-    Sends an email to the user asynchronously using APScheduler.
+    Sends an email to the user asynchronously on the SMTP worker pool.
     
     Args:
         email: User's email
@@ -43,8 +46,8 @@ def send_email(email: str, title: str, message: str, inner_app):
         msg.body = message
         msg.html = f"<p>{message}</p>"
         
-        # Start a thread to send the email
-        threading.Thread(target=send_async_email, args=(inner_app, msg)).start()
+        # Queue the email on the SMTP pool
+        submit("smtp", send_async_email, inner_app, msg)
 
 def generate_verification_token():
     """
@@ -165,7 +168,7 @@ def send_email_without_app_context(email: str, title: str, message: str, smtp_co
             msg.attach(html_part)
             
             # Connect to SMTP server
-            server = smtplib.SMTP(smtp_config['MAIL_SERVER'], smtp_config['MAIL_PORT'])
+            server = smtplib.SMTP(smtp_config['MAIL_SERVER'], smtp_config['MAIL_PORT'], timeout=SMTP_TIMEOUT)
             
             # Use TLS if specified (default is True)
             use_tls = smtp_config.get('MAIL_USE_TLS', True)
@@ -182,6 +185,7 @@ def send_email_without_app_context(email: str, title: str, message: str, smtp_co
             print(f"Email sent to {recipient} successfully")
         except Exception as e:
             print(f"Error sending email: {str(e)}")
+            raise
     
-    # Start a thread to send the email asynchronously
-    threading.Thread(target=send_async_email, args=(smtp_config, email, title, message)).start()
+    # Queue the email on the SMTP pool
+    submit("smtp", send_async_email, smtp_config, email, title, message)
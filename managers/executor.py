@@ -0,0 +1,232 @@
+"""
+Background Executor Module
+=================
+
+This module runs fire-and-forget side effects (panel API calls, emails, DB
+writes) on fixed-size worker pools instead of one OS thread per task:
+- One pool per workload class: "panel", "smtp" and "db"
+- Bounded queues; a full queue blocks the submitter (backpressure) and, past
+  POOL_SUBMIT_TIMEOUT, runs the task in the submitting thread instead of dropping it
+- Retries with exponential backoff on exceptions (and on 429/5xx status codes
+  for panel calls)
+- Per-task time budgets and per-pool queue, latency and outcome metrics
+
+Usage:
+    from managers.executor import submit
+    submit("panel", suspend_server, server_id)
+    submit("smtp", send_async_email, app, msg)
+"""
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+try:
+    from config import PANEL_POOL_WORKERS  # type: ignore
+except ImportError:
+    PANEL_POOL_WORKERS = 8
+
+try:
+    from config import SMTP_POOL_WORKERS  # type: ignore
+except ImportError:
+    SMTP_POOL_WORKERS = 4
+
+try:
+    from config import DB_POOL_WORKERS  # type: ignore
+except ImportError:
+    DB_POOL_WORKERS = 4
+
+try:
+    from config import POOL_SUBMIT_TIMEOUT  # type: ignore
+except ImportError:
+    POOL_SUBMIT_TIMEOUT = 30
+
+
+def retry_on_server_error(result) -> bool:
+    """Retry policy for panel calls that return an HTTP status code."""
+    return isinstance(result, int) and (result == 429 or result >= 500)
+
+
+class WorkerPool:
+    """
+    Fixed number of worker threads fed from a bounded queue.
+
+    Python threads can't be interrupted, so task_timeout is a budget rather than
+    a hard kill: tasks that exceed it are counted and logged, and the blocking
+    calls they make (requests, SMTP) carry their own socket timeouts.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int, task_timeout: float,
+                 retries: int = 0, backoff: float = 1.0, retry_result: Optional[Callable] = None):
+        self.name = name
+        self.workers = workers
+        self.task_timeout = task_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_result = retry_result
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._active = 0
+        self._metrics = {
+            "submitted": 0, "completed": 0, "failed": 0, "retried": 0, "timed_out": 0, "ran_inline": 0,
+            "wait_total": 0.0, "run_total": 0.0, "run_max": 0.0
+        }
+
+    def _count(self, name: str, amount=1) -> None:
+        with self._metrics_lock:
+            self._metrics[name] += amount
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"{self.name}-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, func: Callable, *args, retries: Optional[int] = None, **kwargs) -> Future:
+        """
+        Queues func(*args, **kwargs) and returns a Future for its result.
+
+        Blocks while the queue is full; after POOL_SUBMIT_TIMEOUT seconds the task
+        runs in the calling thread so it's never lost.
+
+        Args:
+            func: Callable to run
+            retries: Override the pool's retry count for this task
+        """
+        self._ensure_started()
+        future = Future()
+        task = (func, args, kwargs, self.retries if retries is None else retries, future, time.monotonic())
+        self._count("submitted")
+        try:
+            self._queue.put(task, timeout=POOL_SUBMIT_TIMEOUT)
+        except queue.Full:
+            self._count("ran_inline")
+            print(f"{self.name} pool queue full, running task {getattr(func, '__name__', func)} inline")
+            self._run(task)
+        return future
+
+    def _work(self) -> None:
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            with self._metrics_lock:
+                self._active += 1
+            try:
+                self._run(task)
+            finally:
+                with self._metrics_lock:
+                    self._active -= 1
+
+    def _run(self, task) -> None:
+        func, args, kwargs, retries, future, queued_at = task
+        if not future.set_running_or_notify_cancel():
+            return
+        started = time.monotonic()
+        self._count("wait_total", started - queued_at)
+
+        attempt = 0
+        while True:
+            try:
+                result = func(*args, **kwargs)
+                error = None
+            except Exception as e:
+                result = None
+                error = e
+            retryable = error is not None or (self.retry_result is not None and self.retry_result(result))
+            if not retryable or attempt >= retries:
+                break
+            attempt += 1
+            self._count("retried")
+            time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+        elapsed = time.monotonic() - started
+        with self._metrics_lock:
+            self._metrics["run_total"] += elapsed
+            self._metrics["run_max"] = max(self._metrics["run_max"], elapsed)
+        if elapsed > self.task_timeout:
+            self._count("timed_out")
+            print(f"{self.name} task {getattr(func, '__name__', func)} took {elapsed:.1f}s (budget {self.task_timeout}s)")
+
+        if error is not None:
+            self._count("failed")
+            print(f"{self.name} task {getattr(func, '__name__', func)} failed: {error}")
+            future.set_exception(error)
+        else:
+            self._count("completed")
+            future.set_result(result)
+
+    def shutdown(self, timeout: float = 10) -> None:
+        """Lets the workers finish queued tasks, waiting at most timeout seconds in total."""
+        deadline = time.monotonic() + timeout
+        for _ in self._threads:
+            try:
+                self._queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+            metrics["active"] = self._active
+        finished = metrics["completed"] + metrics["failed"]
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["queue_capacity"] = self._queue.maxsize
+        metrics["workers"] = self.workers
+        metrics["avg_wait"] = metrics.pop("wait_total") / finished if finished else 0.0
+        metrics["avg_run"] = metrics.pop("run_total") / finished if finished else 0.0
+        return metrics
+
+
+# Shared pools per workload class
+pools: Dict[str, WorkerPool] = {
+    "panel": WorkerPool("panel", PANEL_POOL_WORKERS, queue_size=5000, task_timeout=120, retries=2, backoff=2.0,
+                        retry_result=retry_on_server_error),
+    "smtp": WorkerPool("smtp", SMTP_POOL_WORKERS, queue_size=2000, task_timeout=60, retries=1, backoff=5.0),
+    "db": WorkerPool("db", DB_POOL_WORKERS, queue_size=5000, task_timeout=30, retries=1, backoff=1.0),
+}
+
+
+def submit(workload: str, func: Callable, *args, **kwargs) -> Future:
+    """
+    Runs func(*args, **kwargs) on the pool for a workload class.
+
+    Args:
+        workload: "panel", "smtp" or "db"
+        func: Callable to run
+
+    Returns:
+        Future: Resolves to the return value of func
+    """
+    return pools[workload].submit(func, *args, **kwargs)
+
+
+def executor_metrics() -> Dict[str, dict]:
+    """
+    Returns per-pool metrics.
+
+    Returns:
+        dict: pool name -> submitted, completed, failed, retried, timed_out, ran_inline,
+              active, queue_depth, queue_capacity, workers, avg_wait, avg_run, run_max
+    """
+    return {name: pool.metrics() for name, pool in pools.items()}
+
+
+def shutdown_pools(timeout: float = 10) -> None:
+    for pool in pools.values():
+        pool.shutdown(timeout)
+
+
+atexit.register(shutdown_pools)
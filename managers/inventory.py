@@ -0,0 +1,157 @@
+"""
+Server Inventory Module
+=================
+
+This module keeps one in-process snapshot of every server on the panel:
+- A single fetch of the fleet per refresh interval, shared by all callers
+- Lookups by server id, uuid, owner (pterodactyl user id) and node
+- Per-caller staleness bounds via max_age
+- A hard staleness limit (INVENTORY_MAX_STALE) past which no snapshot is served
+- Explicit invalidation after actions that change server state
+
+Full-fleet scans (billing, suspension checks, admin pages, Discord stats)
+read from the snapshot instead of each downloading the server list.
+"""
+
+import threading
+import time
+from typing import Optional, List, Dict, Iterable
+from .ptero_client import ptero
+
+try:
+    from config import INVENTORY_MAX_AGE  # type: ignore
+except ImportError:
+    INVENTORY_MAX_AGE = 60
+
+try:
+    from config import INVENTORY_MAX_STALE  # type: ignore
+except ImportError:
+    INVENTORY_MAX_STALE = 900
+
+class InventorySnapshot:
+    """
+    Immutable view of the fleet at one point in time.
+
+    Attributes:
+        servers: Server objects exactly as returned by /api/application/servers
+        fetched_at: time.monotonic() of the fetch
+        by_id, by_uuid: server id / uuid -> server
+        by_owner, by_node: user id / node id -> list of servers
+    """
+
+    def __init__(self, servers: Iterable[dict], fetched_at: float):
+        self.servers: List[dict] = []
+        self.fetched_at = fetched_at
+        self.by_id: Dict[int, dict] = {}
+        self.by_uuid: Dict[str, dict] = {}
+        self.by_owner: Dict[int, List[dict]] = {}
+        self.by_node: Dict[int, List[dict]] = {}
+
+        for server in servers:
+            self.servers.append(server)
+            attributes = server['attributes']
+            self.by_id[attributes['id']] = server
+            self.by_uuid[attributes['uuid']] = server
+            self.by_owner.setdefault(attributes['user'], []).append(server)
+            self.by_node.setdefault(attributes['node'], []).append(server)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class ServerInventory:
+    """
+    Shared server inventory.
+
+    Concurrent callers that find the snapshot too old wait on a single refresh
+    rather than each fetching the fleet. If a refresh fails the previous snapshot
+    keeps being served, but only until it is max_stale seconds old; after that
+    readers get None until the panel answers again.
+    """
+
+    def __init__(self, max_age: float = INVENTORY_MAX_AGE, max_stale: float = INVENTORY_MAX_STALE):
+        self.max_age = max_age
+        self.max_stale = max_stale
+        self._snapshot: Optional[InventorySnapshot] = None
+        self._invalidated = False
+        self._refresh_lock = threading.Lock()
+
+    def _fetch(self, started: float) -> Optional[InventorySnapshot]:
+        try:
+            # Index servers page by page as they stream in
+            return InventorySnapshot(ptero.iter_pages("api/application/servers"), started)
+        except Exception as e:
+            print(f"Error refreshing server inventory: {e}")
+            return None
+
+    def _is_fresh(self, snapshot: Optional[InventorySnapshot], max_age: float) -> bool:
+        return snapshot is not None and not self._invalidated and snapshot.age <= max_age
+
+    def snapshot(self, max_age: float = None) -> Optional[InventorySnapshot]:
+        """
+        Returns a snapshot no older than max_age seconds, refreshing if needed.
+
+        Args:
+            max_age: Staleness bound for this caller, defaults to INVENTORY_MAX_AGE
+
+        Returns:
+            InventorySnapshot: Current snapshot, or the last good one while it is
+                               within max_stale
+            None: If no snapshot younger than max_stale could be fetched
+        """
+        max_age = self.max_age if max_age is None else max_age
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot, max_age):
+            return snapshot
+
+        with self._refresh_lock:
+            # Another caller may have refreshed while we waited
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot, max_age):
+                return snapshot
+
+            self._invalidated = False
+            fetched = self._fetch(time.monotonic())
+            if fetched is None:
+                if snapshot is not None and snapshot.age > self.max_stale:
+                    print(f"Server inventory is {snapshot.age:.0f}s old and can't be refreshed; not serving it")
+                    return None
+                return snapshot
+
+            self._snapshot = fetched
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        """Forces the next read to refetch; called after suspend, unsuspend, create and delete."""
+        self._invalidated = True
+
+    def owner_of(self, server_id: int) -> Optional[int]:
+        """Owner of a server from the current snapshot, without triggering a refresh."""
+        snapshot = self._snapshot
+        server = snapshot.by_id.get(int(server_id)) if snapshot else None
+        return server['attributes']['user'] if server else None
+
+    def servers(self, max_age: float = None) -> Optional[List[dict]]:
+        snapshot = self.snapshot(max_age)
+        return snapshot.servers if snapshot else None
+
+    def get(self, server_id: int, max_age: float = None) -> Optional[dict]:
+        snapshot = self.snapshot(max_age)
+        return snapshot.by_id.get(int(server_id)) if snapshot else None
+
+    def get_by_uuid(self, uuid: str, max_age: float = None) -> Optional[dict]:
+        snapshot = self.snapshot(max_age)
+        return snapshot.by_uuid.get(uuid) if snapshot else None
+
+    def by_owner(self, user_id: int, max_age: float = None) -> List[dict]:
+        snapshot = self.snapshot(max_age)
+        return snapshot.by_owner.get(int(user_id), []) if snapshot else []
+
+    def by_node(self, node_id: int, max_age: float = None) -> List[dict]:
+        snapshot = self.snapshot(max_age)
+        return snapshot.by_node.get(int(node_id), []) if snapshot else []
+
+
+# Shared instance
+inventory = ServerInventory()
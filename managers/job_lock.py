@@ -0,0 +1,199 @@
+"""
+Job Lock Module
+=================
+
+This module makes scheduled jobs safe to run from several processes or hosts:
+- Each run takes a MySQL advisory lock (GET_LOCK) for its job, so only one
+  process runs a job at a time; the others skip that tick
+- The job_runs table records when each job last started, so a job with an
+  interval runs at most once per interval across the cluster
+- Lock acquisition, hold time and job duration are tracked per job
+
+Advisory locks belong to the connection that took them and MySQL drops them if
+that connection or process dies, so a crashed leader never blocks the others.
+The lock is held on a dedicated connection outside the pool, so a long job
+doesn't take a pooled connection away from request threads.
+
+Usage:
+    @scheduler.task('interval', id='refresh_stats', seconds=300)
+    @cluster_job('refresh_stats', interval=300)
+    def refresh_stats_task():
+        ...
+
+Jobs that only touch process-local state (buffers, caches) must not be wrapped,
+since every process has to run them. Cache invalidations made by a wrapped job
+reach the other processes through managers.cache_sync.
+"""
+
+import datetime
+import functools
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional
+from config import DATABASE
+from .database_manager import DatabaseManager
+
+# A job with an interval is skipped when it last started less than this fraction
+# of its interval ago; absorbs the drift between the processes' schedulers
+JOB_INTERVAL_SLACK = 0.9
+
+# Identifies this process in job_runs
+HOLDER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, dict] = {}
+
+
+def _metrics_for(job_id: str) -> dict:
+    """ Returns the job's counters; call with _metrics_lock held """
+    return _metrics.setdefault(job_id, {
+        "runs": 0, "failures": 0, "skipped_locked": 0, "skipped_recent": 0,
+        "last_duration": 0.0, "max_duration": 0.0, "total_duration": 0.0,
+        "lock_hold_max": 0.0, "lock_hold_total": 0.0
+    })
+
+
+def _count(job_id: str, name: str) -> None:
+    with _metrics_lock:
+        _metrics_for(job_id)[name] += 1
+
+
+def _record_duration(job_id: str, duration: float) -> None:
+    with _metrics_lock:
+        metrics = _metrics_for(job_id)
+        metrics["runs"] += 1
+        metrics["last_duration"] = duration
+        metrics["max_duration"] = max(metrics["max_duration"], duration)
+        metrics["total_duration"] += duration
+
+
+def _record_lock_hold(job_id: str, hold: float) -> None:
+    with _metrics_lock:
+        metrics = _metrics_for(job_id)
+        metrics["lock_hold_max"] = max(metrics["lock_hold_max"], hold)
+        metrics["lock_hold_total"] += hold
+
+
+def lock_name(job_id: str) -> str:
+    # MySQL lock names are limited to 64 characters and shared by every database on the server
+    return f"{DATABASE}:job:{job_id}"[:64]
+
+
+def last_started(job_id: str) -> Optional[datetime.datetime]:
+    """
+    Returns:
+        datetime: When the job last started anywhere in the cluster
+        None: If it never ran
+    """
+    row = DatabaseManager.execute_query("SELECT last_started_at FROM job_runs WHERE job_id = %s", (job_id,))
+    return row[0] if row else None
+
+
+def record_job_start(job_id: str, started_at: datetime.datetime) -> None:
+    DatabaseManager.execute_query(
+        """
+        INSERT INTO job_runs (job_id, last_started_at, last_status, holder)
+        VALUES (%s, %s, 'running', %s)
+        ON DUPLICATE KEY UPDATE last_started_at = VALUES(last_started_at), last_status = 'running', holder = VALUES(holder)
+        """,
+        (job_id, started_at, HOLDER_ID)
+    )
+
+
+def record_job_finish(job_id: str, duration: float, error: Optional[str] = None) -> None:
+    DatabaseManager.execute_query(
+        """
+        UPDATE job_runs SET last_finished_at = %s, last_duration = %s, last_status = %s,
+            last_error = %s, runs = runs + 1
+        WHERE job_id = %s
+        """,
+        (datetime.datetime.now(), duration, "failed" if error else "ok", error, job_id)
+    )
+
+
+def cluster_job(job_id: str, interval: Optional[float] = None):
+    """
+    Runs the wrapped job only in the process holding its advisory lock.
+
+    Args:
+        job_id: Lock and job_runs key
+        interval: Seconds between runs; when set, a run that comes too soon after
+                  the last one anywhere in the cluster is skipped
+
+    Returns:
+        The wrapped function's result, or None when the run was skipped
+    """
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            connection = DatabaseManager.connect()
+            cursor = connection.cursor(buffered=True)
+            try:
+                # Timeout 0: if another process holds the lock it is already running this job
+                cursor.execute("SELECT GET_LOCK(%s, 0)", (lock_name(job_id),))
+                if cursor.fetchone()[0] != 1:
+                    _count(job_id, "skipped_locked")
+                    return None
+                locked_at = time.monotonic()
+                try:
+                    if interval is not None:
+                        previous = last_started(job_id)
+                        if previous is not None and (datetime.datetime.now() - previous).total_seconds() < interval * JOB_INTERVAL_SLACK:
+                            _count(job_id, "skipped_recent")
+                            return None
+
+                    record_job_start(job_id, datetime.datetime.now())
+                    started = time.monotonic()
+                    error = None
+                    try:
+                        return func(*args, **kwargs)
+                    except Exception as e:
+                        error = str(e) or type(e).__name__
+                        _count(job_id, "failures")
+                        raise
+                    finally:
+                        duration = time.monotonic() - started
+                        _record_duration(job_id, duration)
+                        record_job_finish(job_id, duration, error)
+                finally:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", (lock_name(job_id),))
+                    cursor.fetchone()
+                    _record_lock_hold(job_id, time.monotonic() - locked_at)
+            finally:
+                cursor.close()
+                connection.close()
+        return wrapper
+    return decorator
+
+
+def job_metrics() -> Dict[str, dict]:
+    """
+    Returns this process's counters per job.
+
+    Returns:
+        dict: job id -> runs, failures, skipped_locked, skipped_recent, last_duration,
+              max_duration, avg_duration, lock_hold_max, avg_lock_hold
+    """
+    with _metrics_lock:
+        metrics = {job_id: dict(values) for job_id, values in _metrics.items()}
+    for values in metrics.values():
+        runs = values["runs"]
+        held = runs + values["skipped_recent"]
+        values["avg_duration"] = values.pop("total_duration") / runs if runs else 0.0
+        values["avg_lock_hold"] = values.pop("lock_hold_total") / held if held else 0.0
+    return metrics
+
+
+def get_job_runs() -> list:
+    """
+    Returns:
+        list[tuple]: (job_id, last_started_at, last_finished_at, last_duration, last_status, last_error, holder, runs)
+                     for every job, as recorded by whichever process ran it
+    """
+    return DatabaseManager.execute_query(
+        "SELECT job_id, last_started_at, last_finished_at, last_duration, last_status, last_error, holder, runs "
+        "FROM job_runs ORDER BY job_id",
+        fetch_all=True
+    ) or []
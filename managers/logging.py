@@ -6,17 +6,49 @@ This module handles all logging operations including:
 - Webhook logging to Discord
 - Status code mapping for log messages
 - Formatted log messages
+- Background shipping of webhook posts and activity_logs inserts, on separate paths
+
+webhook_log() only enqueues. activity_logs rows go to their own queue and
+thread, which writes them in batches with a single executemany and retries
+with backoff while the database is unavailable; audit rows are never dropped.
+Webhook messages go to a bounded queue drained by a second thread, coalescing
+up to 10 embeds per Discord message and waiting out Discord rate limits. When
+Discord falls behind, callers wait up to WEBHOOK_ENQUEUE_TIMEOUT seconds for
+room and the webhook message (only) is dropped after that.
 
 Functions in this module provide consistent logging across the application.
 """
 
+import atexit
+import queue
 import requests
 import json
 import datetime
 import threading
+import time
 from config import WEBHOOK_URL, TICKET_WEBHOOK_URL
 from .database_manager import DatabaseManager
 
+try:
+    from config import WEBHOOK_QUEUE_SIZE  # type: ignore
+except ImportError:
+    WEBHOOK_QUEUE_SIZE = 10000
+
+try:
+    from config import WEBHOOK_ENQUEUE_TIMEOUT  # type: ignore
+except ImportError:
+    WEBHOOK_ENQUEUE_TIMEOUT = 1.0
+
+# Discord allows 10 embeds and 6000 characters of embed text per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+# Log records taken off the queue per worker pass
+SHIP_BATCH_SIZE = 200
+# Attempts per webhook message when Discord answers 429
+WEBHOOK_MAX_ATTEMPTS = 3
+# Longest wait (seconds) between retries of a failed activity_logs insert
+DB_RETRY_MAX_DELAY = 30
+
 # Status code mapping for log messages
 STATUS_MAP = {
     -1: {"color": 0x95A5A6, "title": "No Code"},   # Gray
@@ -27,9 +59,39 @@ STATUS_MAP = {
     4: {"color": 0x9B59B6, "title": "Debug"}       # Purple
 }
 
+# Pending webhook messages: (webhook_url, payload)
+_webhook_queue = queue.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+# Pending activity_logs rows; unbounded so an audit row is never dropped
+_row_queue = queue.Queue()
+_workers = {}
+_worker_lock = threading.Lock()
+_ship_lock = threading.Lock()
+_write_lock = threading.Lock()
+_session = requests.Session()
+# webhook url -> time.monotonic() before which it must not be posted to
+_rate_limited_until = {}
+_metrics_lock = threading.Lock()
+_metrics = {
+    "enqueued": 0,
+    "dropped": 0,
+    "messages_sent": 0,
+    "embeds_sent": 0,
+    "webhook_failures": 0,
+    "rate_limited": 0,
+    "db_rows": 0,
+    "db_failures": 0,
+    "db_retries": 0
+}
+
+def _count(name, amount=1):
+    with _metrics_lock:
+        _metrics[name] += amount
+
 def webhook_log(embed_message: str, status: int = -1, non_embed_message: str = None, is_ticket: bool = False, database_log: bool = False):
     """
-    Sends a log message to a Discord webhook with formatting and logs to activity_logs table.
+    Queues a log message for the Discord webhook and, optionally, the activity_logs table.
+    Returns immediately unless the webhook queue is full; delivery happens on the
+    log shipping threads.
 
     Args:
         embed_message: Message to send in the embed.
@@ -45,13 +107,14 @@ def webhook_log(embed_message: str, status: int = -1, non_embed_message: str = N
     
     # Get status color and title
     status_info = STATUS_MAP.get(status, STATUS_MAP[-1])
+    now = datetime.datetime.now()
     
     # Create embed
     embed = {
         "title": status_info["title"],
         "description": embed_message,
         "color": status_info["color"],
-        "timestamp": datetime.datetime.now().isoformat()
+        "timestamp": now.isoformat()
     }
     
     # Create payload
@@ -63,34 +126,202 @@ def webhook_log(embed_message: str, status: int = -1, non_embed_message: str = N
     if non_embed_message:
         payload["content"] = non_embed_message
     
-    # Log to activity_logs table
-    log_content = json.dumps({
-        "status": status_info["title"],
-        "message": embed_message,
-        "non_embed_message": non_embed_message,
-        "is_ticket": is_ticket,
-        "timestamp": datetime.datetime.now().isoformat()
-    })
-    
+    # Row for the activity_logs table
+    row = None
     if database_log:
-        try:
-            # Insert into activity_logs table
-            query = "INSERT INTO activity_logs (create_time, content) VALUES (%s, %s)"
-            values = (datetime.datetime.now(), log_content)
-            DatabaseManager.execute_query(query, values)
-        except Exception as e:
-            print(f"Error logging to activity_logs: {str(e)}")
+        log_content = json.dumps({
+            "status": status_info["title"],
+            "message": embed_message,
+            "non_embed_message": non_embed_message,
+            "is_ticket": is_ticket,
+            "timestamp": now.isoformat()
+        })
+        row = (now, log_content, status_info["title"], is_ticket)
+    
+    # The audit row never waits on Discord
+    if row is not None:
+        _row_queue.put(row)
+        _ensure_worker("activity-log-writer", _run_row_writer)
     
     # Skip webhook if no URL configured
     if not webhook_url:
         return
     
-    # Send webhook asynchronously
-    def send_webhook():
+    try:
+        # Backpressure: wait briefly for the shipper to catch up before giving up on the webhook
+        _webhook_queue.put((webhook_url, payload), timeout=WEBHOOK_ENQUEUE_TIMEOUT)
+    except queue.Full:
+        _count("dropped")
+        print(f"Webhook queue full, dropped webhook message: {embed_message[:200]}")
+        return
+    _count("enqueued")
+    _ensure_worker("webhook-log-shipper", _run_webhook_shipper)
+
+def _ensure_worker(name, target):
+    worker = _workers.get(name)
+    if worker is not None and worker.is_alive():
+        return
+    with _worker_lock:
+        worker = _workers.get(name)
+        if worker is None or not worker.is_alive():
+            worker = threading.Thread(target=target, name=name, daemon=True)
+            _workers[name] = worker
+            worker.start()
+
+def _take_batch(source):
+    """ Blocks for one record, then takes whatever else is queued, up to SHIP_BATCH_SIZE """
+    batch = [source.get()]
+    while len(batch) < SHIP_BATCH_SIZE:
+        try:
+            batch.append(source.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+def _run_row_writer():
+    while True:
+        rows = _take_batch(_row_queue)
+        delay = 1
+        # Keep the batch until it is written; later rows wait behind it in the queue
+        while not _write_rows(rows):
+            _count("db_retries")
+            time.sleep(delay)
+            delay = min(delay * 2, DB_RETRY_MAX_DELAY)
+
+def _run_webhook_shipper():
+    while True:
+        batch = _take_batch(_webhook_queue)
+        try:
+            _ship(batch)
+        except Exception as e:
+            print(f"Error shipping logs: {str(e)}")
+
+def _write_rows(rows):
+    """
+    Inserts activity_logs rows with one executemany.
+    
+    Returns:
+        bool: False if the insert failed and the rows must be retried
+    """
+    with _write_lock:
+        try:
+            query = "INSERT INTO activity_logs (create_time, content, status, is_ticket) VALUES (%s, %s, %s, %s)"
+            DatabaseManager.execute_many(query, rows)
+        except Exception as e:
+            _count("db_failures")
+            print(f"Error logging to activity_logs: {str(e)}")
+            return False
+        _count("db_rows", len(rows))
+        return True
+
+def _ship(batch):
+    """ Posts one batch of webhook messages, coalesced """
+    with _ship_lock:
+        for webhook_url, payload in _coalesce(batch):
+            _post_webhook(webhook_url, payload)
+
+def _coalesce(batch):
+    """ Merges consecutive embeds per webhook into messages of up to 10 embeds """
+    open_messages = {}
+    for webhook_url, payload in batch:
+        if payload is None:
+            continue
+        # Messages with text outside the embed are sent on their own to keep text and embed together
+        if "content" in payload:
+            message = open_messages.pop(webhook_url, None)
+            if message is not None:
+                yield webhook_url, {"embeds": message["embeds"]}
+            yield webhook_url, payload
+            continue
+        embed = payload["embeds"][0]
+        size = len(embed["title"]) + len(str(embed["description"] or ""))
+        message = open_messages.get(webhook_url)
+        if message is not None and (len(message["embeds"]) >= MAX_EMBEDS_PER_MESSAGE or message["_chars"] + size > MAX_EMBED_CHARS_PER_MESSAGE):
+            yield webhook_url, {"embeds": message["embeds"]}
+            message = None
+        if message is None:
+            message = {"embeds": [], "_chars": 0}
+            open_messages[webhook_url] = message
+        message["embeds"].append(embed)
+        message["_chars"] += size
+    for webhook_url, message in open_messages.items():
+        yield webhook_url, {"embeds": message["embeds"]}
+
+def _post_webhook(webhook_url, payload):
+    """ Posts one message, waiting out Discord's rate limits """
+    for _ in range(WEBHOOK_MAX_ATTEMPTS):
+        wait = _rate_limited_until.get(webhook_url, 0) - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
         try:
-            requests.post(webhook_url, json=payload, timeout=60)
+            response = _session.post(webhook_url, json=payload, timeout=60)
         except Exception as e:
+            _count("webhook_failures")
             print(f"Error sending webhook: {str(e)}")
+            return
+        
+        # Bucket exhausted: hold further posts to this webhook until it resets
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset_after = float(response.headers.get("X-RateLimit-Reset-After", 1))
+            _rate_limited_until[webhook_url] = time.monotonic() + reset_after
+        
+        if response.status_code == 429:
+            _count("rate_limited")
+            try:
+                retry_after = float(response.json().get("retry_after", 1))
+            except ValueError:
+                retry_after = float(response.headers.get("Retry-After", 1))
+            _rate_limited_until[webhook_url] = time.monotonic() + retry_after
+            continue
+        
+        if response.status_code >= 400:
+            _count("webhook_failures")
+            print(f"Error sending webhook: {response.status_code} {response.text[:200]}")
+        else:
+            _count("messages_sent")
+            _count("embeds_sent", len(payload["embeds"]))
+        return
     
-    # Start thread to send webhook
-    threading.Thread(target=send_webhook).start()
+    _count("webhook_failures")
+    print("Error sending webhook: still rate limited after retries")
+
+def _drain(source):
+    records = []
+    while True:
+        try:
+            records.append(source.get_nowait())
+        except queue.Empty:
+            return records
+
+def flush_webhook_log():
+    """
+    Writes and ships everything still queued from the calling thread; runs at shutdown.
+    
+    Returns:
+        int: Number of log records written or shipped
+    """
+    rows = _drain(_row_queue)
+    if rows and not _write_rows(rows):
+        print(f"Lost {len(rows)} activity_logs rows at shutdown")
+    batch = _drain(_webhook_queue)
+    if batch:
+        _ship(batch)
+    return len(rows) + len(batch)
+
+atexit.register(flush_webhook_log)
+
+def webhook_log_metrics():
+    """
+    Returns log shipping counters plus the current queue depth.
+    
+    Returns:
+        dict: queue_depth, queue_capacity, db_queue_depth, enqueued, dropped (webhook messages
+              only), messages_sent, embeds_sent, webhook_failures, rate_limited, db_rows,
+              db_failures, db_retries
+    """
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics["queue_depth"] = _webhook_queue.qsize()
+    metrics["db_queue_depth"] = _row_queue.qsize()
+    metrics["queue_capacity"] = WEBHOOK_QUEUE_SIZE
+    return metrics
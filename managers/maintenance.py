@@ -5,6 +5,7 @@ Maintenance Module
 This module handles scheduled maintenance tasks including:
 - Processing pending user deletions
 - Resetting passwords for inactive users
+- Archiving and pruning old activity logs
 - Other automated maintenance operations
 
 Functions in this module interact with both the local database and the Pterodactyl API
@@ -12,24 +13,42 @@ to perform maintenance operations across the system.
 """
 
 import datetime
-import threading
-import requests
+import gzip
+import json
+import os
 import bcrypt
 import secrets
-from flask import current_app
-from config import PTERODACTYL_URL, PTERODACTYL_ADMIN_KEY
 from managers.database_manager import DatabaseManager
 from .logging import webhook_log
-from .user_manager import get_ptero_id, update_last_seen
-from .email_manager import send_email
-from security import safe_requests
+from .ptero_client import ptero
+from .executor import submit
+from .user_manager import get_ptero_id, update_last_seen, flush_last_seen
 
-# API authentication headers
-HEADERS = {
-    "Authorization": f"Bearer {PTERODACTYL_ADMIN_KEY}",
-    'Accept': 'application/json',
-    'Content-Type': 'application/json'
-}
+try:
+    from config import ACTIVITY_LOG_RETENTION_DAYS  # type: ignore
+except ImportError:
+    ACTIVITY_LOG_RETENTION_DAYS = 90
+
+try:
+    from config import ACTIVITY_LOG_ARCHIVE_DIR  # type: ignore
+except ImportError:
+    ACTIVITY_LOG_ARCHIVE_DIR = "archives/activity_logs"
+
+# Relative archive dirs are resolved against the project root, not the working directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ACTIVITY_LOG_ARCHIVE_DIR = os.path.join(PROJECT_ROOT, ACTIVITY_LOG_ARCHIVE_DIR)
+
+# Rows exported and deleted per batch when archiving activity logs
+ARCHIVE_BATCH_SIZE = 5000
+
+def delete_local_user_rows(user_id: int, email: str):
+    """
+    Deletes a user's tickets, comments, account row and pending deletion entry, in that order.
+    """
+    DatabaseManager.execute_query("DELETE FROM ticket_comments WHERE user_id = %s", (user_id,))
+    DatabaseManager.execute_query("DELETE FROM tickets WHERE user_id = %s", (user_id,))
+    DatabaseManager.execute_query("DELETE FROM users WHERE id = %s", (user_id,))
+    DatabaseManager.execute_query("DELETE FROM pending_deletions WHERE email = %s", (email,))
 
 def sync_users_script():
     """
@@ -39,6 +58,9 @@ def sync_users_script():
     """
     db = DatabaseManager()
     
+    # Write buffered last seen times so inactivity checks see them
+    flush_last_seen()
+    
     # Process pending deletions after 15 days
     results = db.execute_query("SELECT * FROM pending_deletions", fetch_all=True)
     if results:
@@ -60,28 +82,21 @@ def sync_users_script():
                     # Get Pterodactyl ID before deletion
                     ptero_id = get_ptero_id(email)
                     if not ptero_id:
-                        threading.Thread(target=webhook_log, args=(f"User {email} not found in Pterodactyl, cleaning up pending deletion entry", 1)).start()
+                        webhook_log(f"User {email} not found in Pterodactyl, cleaning up pending deletion entry", 1)
                         db.execute_query("DELETE FROM pending_deletions WHERE email = %s", (email,))
                         continue
                         
                     # Try to delete from Pterodactyl first
-                    response = requests.delete(f"{PTERODACTYL_URL}api/application/users/{ptero_id[0]}", headers=HEADERS, timeout=60)
+                    response = ptero.delete(f"api/application/users/{ptero_id[0]}")
                     if response.status_code != 204:
-                        threading.Thread(target=webhook_log, args=(f"Failed to delete {email} from Pterodactyl - Status: {response.status_code}", 2)).start()
+                        webhook_log(f"Failed to delete {email} from Pterodactyl - Status: {response.status_code}", 2)
                         continue
                         
                     # If Pterodactyl deletion succeeded, delete locally
                     user_id = db.execute_query("SELECT id FROM users WHERE email = %s", (email,))[0]
                     
-                    # Delete user's tickets and comments
-                    threading.Thread(target=db.execute_query, args=("DELETE FROM ticket_comments WHERE user_id = %s", (user_id,))).start()
-                    threading.Thread(target=db.execute_query, args=("DELETE FROM tickets WHERE user_id = %s", (user_id,))).start()
-                    
-                    # Finally delete the user
-                    threading.Thread(target=db.execute_query, args=("DELETE FROM users WHERE id = %s", (user_id,))).start()
-                    
-                    # Clean up pending deletion entry
-                    threading.Thread(target=db.execute_query, args=("DELETE FROM pending_deletions WHERE email = %s", (email,))).start()
+                    # Delete user's tickets and comments, then the user and the pending deletion entry
+                    submit("db", delete_local_user_rows, user_id, email)
                     
                     webhook_log(f"Successfully processed pending deletion for {email}", database_log=True)
                     
@@ -99,13 +114,13 @@ def sync_users_script():
                         webhook_log(f"Resetting password for inactive user {email}", database_log=True)
                         new_password = secrets.token_hex(32)
                         hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt(rounds=14))
-                        threading.Thread(target=db.execute_query, args=("UPDATE users SET password = %s WHERE email = %s", (hashed_password, email))).start()
+                        submit("db", DatabaseManager.execute_query, "UPDATE users SET password = %s WHERE email = %s", (hashed_password, email))
                         
                         # Update Pterodactyl password if possible
                         ptero_id = get_ptero_id(email)
                         if ptero_id:
                             # Get user info from Pterodactyl with proper error handling
-                            response = safe_requests.get(f"{PTERODACTYL_URL}api/application/users/{ptero_id[0]}", headers=HEADERS, timeout=60)
+                            response = ptero.get(f"api/application/users/{ptero_id[0]}")
                             if response.status_code == 200:
                                 response_data = response.json()
                                 if 'attributes' in response_data:
@@ -117,7 +132,7 @@ def sync_users_script():
                                         "last_name": info['last_name'],
                                         "password": new_password
                                     }
-                                    patch_response = requests.patch(f"{PTERODACTYL_URL}api/application/users/{ptero_id[0]}", headers=HEADERS, json=body, timeout=60)
+                                    patch_response = ptero.patch(f"api/application/users/{ptero_id[0]}", json=body)
                                     if patch_response.status_code in [200, 201, 204]:
                                         update_last_seen(email)
                                         webhook_log(f"Successfully reset password for inactive user {email} in Pterodactyl", database_log=True)
@@ -128,95 +143,111 @@ def sync_users_script():
                             else:
                                 webhook_log(f"Failed to get user info from Pterodactyl for {email}: Status {response.status_code}", database_log=True)
                     except Exception as e:
-                        threading.Thread(target=webhook_log, args=(f"Error resetting password for {email}: {str(e)}", 2)).start()
+                        webhook_log(f"Error resetting password for {email}: {str(e)}", 2)
 
 def delete_inactive_free_servers():
     """
-    Handles lifecycle of free tier servers for users who haven't logged in recently.
+    Runs the inactive free tier rule of the fleet sweep on its own (managers.sweep).
     
-    Process:
-    1. Gets all servers from Pterodactyl
-    2. Identifies free tier servers based on specs
-    3. Checks last login time of server owners
-    4. If inactivity > 15 days, suspend the server (grace period)
-    5. If inactivity > 17 days, delete the server
-    6. Logs actions
+    Free tier servers of owners who haven't logged in for 15+ days are suspended
+    (grace period, owner is emailed) and deleted after 17+ days.
     """
-    db = DatabaseManager()
-    
-    # Get all servers from Pterodactyl
-    response = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers?per_page=100000", headers=HEADERS, timeout=60)
-    if response.status_code != 200:
-        webhook_log(f"Failed to get servers for inactive free tier check: {response.status_code}", database_log=True)
-        return
-        
-    servers = response.json()
-    if 'data' not in servers:
-        webhook_log("No servers found for inactive free tier check")
-        return
-    
-    # Process each server
-    for server in servers['data']:
-        try:
-            user_id = server['attributes']['user']
-            server_id = server['attributes']['id']
-            server_name = server['attributes']['name']
-
-            
-            # Get product info based on server specs
-            from managers.credit_manager import convert_to_product
-            product = convert_to_product(server)
-            
-            # Check if this is a free tier server (price = 0)
-            if int(product['price']) == 0:
-                # Get user's last seen time
-                last_seen_result = db.execute_query("SELECT last_seen FROM users WHERE pterodactyl_id = %s", (user_id,))
-                
-                if last_seen_result and last_seen_result[0]:
-                    last_seen = last_seen_result[0]
-                    inactivity = datetime.datetime.now() - last_seen
+    from .sweep import run_sweep
+    run_sweep(["inactive_free"])
 
-                    # Delete after 17+ days of inactivity
-                    if inactivity > datetime.timedelta(days=17):
-                        from managers.server_manager import delete_server
-                        delete_server(server_id)
-                        webhook_log(f"Deleted free tier server {server_name} (ID: {server_id}) due to owner inactivity (17+ days)", database_log=True)
 
-                    # Suspend after 15+ days of inactivity (grace period), only if not already suspended
-                    elif inactivity > datetime.timedelta(days=15):
-                        if not server['attributes'].get('suspended', False):
-                            from managers.server_manager import suspend_server
-                            suspend_server(server_id)
-                            webhook_log(f"Suspended free tier server {server_name} (ID: {server_id}) due to owner inactivity (15+ days)", database_log=True)
+def _write_archive(path: str, records: list) -> None:
+    """
+    Writes one archive file atomically: a temp file is written and fsynced, then
+    renamed over `path` and the directory entry fsynced, so `path` is either absent
+    or complete.
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            for record in records:
+                archive.write((json.dumps(record) + "\n").encode("utf-8"))
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temp_path, path)
+    directory = os.open(os.path.dirname(path), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
 
-                            # Send suspension email to the owner
-                            try:
-                                email_result = db.execute_query(
-                                    "SELECT email FROM users WHERE pterodactyl_id = %s",
-                                    (user_id,)
-                                )
-                                if email_result and email_result[0]:
-                                    user_email = email_result[0]
-                                    message = (
-                                        "Your free-tier server has been suspended due to inactivity (no login for over 15 days).\n\n"
-                                        "To keep your server, please log in to your account within the next 2 days. "
-                                        "Servers inactive for 17+ days are automatically deleted.\n\n"
-                                        "If you believe this was a mistake or need assistance, please contact support."
-                                    )
-                                    send_email(
-                                        user_email,
-                                        "Server Suspended Due to Inactivity",
-                                        message,
-                                        current_app._get_current_object()
-                                    )
-                                    webhook_log(
-                                        f"Suspension email sent to {user_email} for server {server_name} (ID: {server_id})",
-                                        database_log=True
-                                    )
-                            except Exception as e:
-                                webhook_log(
-                                    f"Failed to send suspension email for server {server_name} (ID: {server_id}): {str(e)}",
-                                    database_log=True
-                                )
-        except Exception as e:
-            webhook_log(f"Error processing server for inactive free tier check: {str(e)}", database_log=True)
+def archive_activity_logs(retention_days: int = ACTIVITY_LOG_RETENTION_DAYS, archive_dir: str = ACTIVITY_LOG_ARCHIVE_DIR, dry_run: bool = False):
+    """
+    Exports activity logs from whole months older than the retention period to
+    gzipped JSONL files and deletes them from the table.
+    
+    Rows are handled in id order, ARCHIVE_BATCH_SIZE at a time. Each batch is
+    written to new files, one per month it spans, named after the month and the
+    first row id (activity_logs-YYYY-MM-<id>.jsonl.gz). Each file is made durable
+    (temp file, fsync, rename) before the batch is deleted. After a crash the next
+    run starts from the same row, so it rewrites the same file names and nothing
+    is lost or archived twice.
+    
+    Args:
+        retention_days: Keep at least this many days of logs
+        archive_dir: Directory for the archive files; relative paths are resolved
+                     against the project root
+        dry_run: Only count the rows that would be archived
+    
+    Returns:
+        dict: rows, months (list of YYYY-MM), files and cutoff
+    """
+    archive_dir = os.path.join(PROJECT_ROOT, archive_dir)
+    cutoff = (datetime.datetime.now() - datetime.timedelta(days=retention_days)).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    report = {"rows": 0, "months": [], "files": 0, "cutoff": cutoff}
+    
+    # Ids grow with create_time, so everything up to the last pre-cutoff id is archived
+    boundary = DatabaseManager.execute_query("SELECT MAX(id) FROM activity_logs WHERE create_time < %s", (cutoff,))
+    boundary_id = boundary[0] if boundary else None
+    if boundary_id is None:
+        return report
+    
+    if dry_run:
+        count = DatabaseManager.execute_query("SELECT COUNT(*) FROM activity_logs WHERE id <= %s", (boundary_id,))
+        report["rows"] = int(count[0]) if count else 0
+        return report
+    
+    os.makedirs(archive_dir, exist_ok=True)
+    archives = set()
+    last_id = 0
+    while True:
+        rows = DatabaseManager.execute_query(
+            "SELECT id, create_time, status, is_ticket, content FROM activity_logs "
+            "WHERE id > %s AND id <= %s ORDER BY id LIMIT %s",
+            (last_id, boundary_id, ARCHIVE_BATCH_SIZE),
+            fetch_all=True
+        )
+        if not rows:
+            break
+        
+        # month -> (first row id, records)
+        batch = {}
+        for log_id, create_time, status, is_ticket, content in rows:
+            month = create_time.strftime("%Y-%m") if create_time else "undated"
+            batch.setdefault(month, (log_id, []))[1].append({
+                "id": log_id,
+                "create_time": create_time.isoformat() if create_time else None,
+                "status": status,
+                "is_ticket": bool(is_ticket),
+                "content": content
+            })
+        for month, (first_month_id, records) in batch.items():
+            _write_archive(os.path.join(archive_dir, f"activity_logs-{month}-{first_month_id}.jsonl.gz"), records)
+            archives.add(month)
+            report["files"] += 1
+        
+        first_id, last_id = rows[0][0], rows[-1][0]
+        DatabaseManager.execute_query("DELETE FROM activity_logs WHERE id >= %s AND id <= %s", (first_id, last_id))
+        report["rows"] += len(rows)
+    
+    report["months"] = sorted(archives)
+    if report["rows"]:
+        webhook_log(f"Archived {report['rows']} activity logs older than {cutoff:%Y-%m-%d} ({', '.join(report['months'])})", 0, database_log=True)
+    return report
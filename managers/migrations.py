@@ -0,0 +1,352 @@
+"""
+Schema Migrations Module
+=================
+
+This module applies versioned schema changes to the panel database:
+- Ordered migrations recorded in the schema_migrations table
+- Idempotent helpers (indexes are checked in information_schema first)
+- An EXPLAIN check that flags registered hot queries doing full table scans
+
+Migrations are applied from the CLI only, before the panel is (re)started:
+    python scripts/migrate.py            # apply pending migrations
+    python scripts/migrate.py --check    # also EXPLAIN the hot queries
+
+The app refuses to start while migrations are pending (app.py). Runs are
+serialized with a MySQL advisory lock; a second concurrent run fails fast
+instead of racing the first one through the same ALTERs.
+
+To add a schema change, append a new (version, description, function) entry to
+MIGRATIONS. Never edit or reorder an entry that has already shipped.
+"""
+
+from typing import List, Tuple
+from mysql.connector import errorcode
+import mysql.connector
+from config import DATABASE
+from .database_manager import DatabaseManager
+
+# Advisory lock held while migrations are applied; names are shared by every database on the server
+MIGRATION_LOCK = f"{DATABASE}:schema_migrations"[:64]
+
+
+class MigrationLockError(RuntimeError):
+    """Raised when another process is already applying migrations."""
+
+
+def ensure_migrations_table() -> None:
+    DatabaseManager.execute_query(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(64) NOT NULL PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+
+
+def index_exists(table: str, index_name: str) -> bool:
+    result = DatabaseManager.execute_query(
+        "SELECT 1 FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+        (table, index_name)
+    )
+    return result is not None
+
+
+def ensure_index(table: str, index_name: str, columns: str, kind: str = "INDEX") -> bool:
+    """
+    Creates an index unless one with the same name already exists.
+
+    Args:
+        table: Table name
+        index_name: Index name
+        columns: Column list, e.g. "`email`, `created_at`"
+        kind: INDEX, UNIQUE INDEX or FULLTEXT INDEX
+
+    Returns:
+        bool: True if the index was created
+    """
+    if index_exists(table, index_name):
+        return False
+    try:
+        DatabaseManager.execute_query(f"ALTER TABLE `{table}` ADD {kind} `{index_name}` ({columns})")
+    except mysql.connector.Error as e:
+        # Another process created it between the check and the ALTER
+        if e.errno == errorcode.ER_DUP_KEYNAME:
+            return False
+        raise
+    print(f"Created index {index_name} on {table}")
+    return True
+
+
+def column_exists(table: str, column: str) -> bool:
+    result = DatabaseManager.execute_query(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1",
+        (table, column)
+    )
+    return result is not None
+
+
+def ensure_column(table: str, column: str, definition: str) -> bool:
+    """
+    Adds a column unless it already exists.
+
+    Args:
+        table: Table name
+        column: Column name
+        definition: Column definition, e.g. "VARCHAR(16) DEFAULT NULL"
+
+    Returns:
+        bool: True if the column was added
+    """
+    if column_exists(table, column):
+        return False
+    try:
+        DatabaseManager.execute_query(f"ALTER TABLE `{table}` ADD COLUMN `{column}` {definition}")
+    except mysql.connector.Error as e:
+        if e.errno == errorcode.ER_DUP_FIELDNAME:
+            return False
+        raise
+    print(f"Added column {column} to {table}")
+    return True
+
+
+def _0001_hot_lookup_indexes() -> None:
+    ensure_index("users", "users_pterodactyl_id_index", "`pterodactyl_id`")
+    ensure_index("users", "users_discord_id_index", "`discord_id`")
+    ensure_index("tickets", "tickets_user_id_index", "`user_id`")
+    ensure_index("ticket_comments", "ticket_comments_ticket_id_index", "`ticket_id`")
+    ensure_index("activity_logs", "activity_logs_create_time_index", "`create_time`")
+
+
+# Rows per UPDATE when backfilling activity_logs
+BACKFILL_BATCH_SIZE = 10000
+
+
+def _0002_activity_log_columns() -> None:
+    ensure_column("activity_logs", "status", "VARCHAR(16) DEFAULT NULL")
+    ensure_column("activity_logs", "is_ticket", "TINYINT(1) NOT NULL DEFAULT 0")
+
+    # Backfill from the JSON content in id ranges so no single statement locks the whole table
+    bounds = DatabaseManager.execute_query("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM activity_logs")
+    low, high = int(bounds[0]), int(bounds[1])
+    for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+        DatabaseManager.execute_query(
+            """
+            UPDATE activity_logs SET
+                status = IF(JSON_VALID(content), LEFT(JSON_UNQUOTE(JSON_EXTRACT(content, '$.status')), 16), 'Unknown'),
+                is_ticket = IF(JSON_VALID(content), COALESCE(JSON_UNQUOTE(JSON_EXTRACT(content, '$.is_ticket')) = 'true', 0), 0)
+            WHERE id >= %s AND id < %s AND status IS NULL
+            """,
+            (start, start + BACKFILL_BATCH_SIZE)
+        )
+
+    ensure_index("activity_logs", "activity_logs_status_index", "`status`")
+    ensure_index("activity_logs", "activity_logs_is_ticket_index", "`is_ticket`")
+    ensure_index("activity_logs", "activity_logs_content_fulltext", "`content`", kind="FULLTEXT INDEX")
+
+
+def _0003_panel_tables() -> None:
+    DatabaseManager.execute_query(
+        """
+        CREATE TABLE IF NOT EXISTS credit_transactions (
+            id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            email VARCHAR(191) NOT NULL,
+            amount DOUBLE NOT NULL,
+            balance_after DOUBLE DEFAULT NULL,
+            reason VARCHAR(64) NOT NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            KEY credit_transactions_email_index (email, created_at),
+            KEY credit_transactions_created_at_index (created_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+    DatabaseManager.execute_query(
+        """
+        CREATE TABLE IF NOT EXISTS platform_stats (
+            id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            captured_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            total_users INT NOT NULL DEFAULT 0,
+            total_clients INT NOT NULL DEFAULT 0,
+            total_tickets INT NOT NULL DEFAULT 0,
+            total_ticket_messages INT NOT NULL DEFAULT 0,
+            credits_circulation DOUBLE NOT NULL DEFAULT 0,
+            total_servers INT NOT NULL DEFAULT 0,
+            free_servers INT NOT NULL DEFAULT 0,
+            paid_servers INT NOT NULL DEFAULT 0,
+            monthly_credits_used DOUBLE NOT NULL DEFAULT 0,
+            plan_counts TEXT,
+            KEY platform_stats_captured_at_index (captured_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+    DatabaseManager.execute_query(
+        """
+        CREATE TABLE IF NOT EXISTS server_actions (
+            id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            idempotency_key VARCHAR(191) DEFAULT NULL,
+            action VARCHAR(16) NOT NULL,
+            server_id INT NOT NULL,
+            node_id INT DEFAULT NULL,
+            reason VARCHAR(255) DEFAULT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_by VARCHAR(64) DEFAULT NULL,
+            locked_at DATETIME DEFAULT NULL,
+            last_error TEXT,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY server_actions_idempotency_key_unique (idempotency_key),
+            KEY server_actions_status_index (status, next_attempt_at),
+            KEY server_actions_server_index (server_id, status)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+    # Early server_actions tables required an idempotency key on every row and lacked the per-server index
+    DatabaseManager.execute_query("ALTER TABLE server_actions MODIFY idempotency_key VARCHAR(191) DEFAULT NULL")
+    ensure_index("server_actions", "server_actions_server_index", "`server_id`, `status`")
+    DatabaseManager.execute_query(
+        """
+        CREATE TABLE IF NOT EXISTS job_runs (
+            job_id VARCHAR(64) NOT NULL PRIMARY KEY,
+            last_started_at DATETIME NOT NULL,
+            last_finished_at DATETIME DEFAULT NULL,
+            last_duration DOUBLE DEFAULT NULL,
+            last_status VARCHAR(16) NOT NULL DEFAULT 'running',
+            last_error TEXT,
+            holder VARCHAR(64) DEFAULT NULL,
+            runs INT NOT NULL DEFAULT 0
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+
+
+def _0004_credit_transaction_batches() -> None:
+    ensure_column("credit_transactions", "batch_key", "VARCHAR(64) DEFAULT NULL")
+    ensure_index("credit_transactions", "credit_transactions_batch_key_index", "`batch_key`, `email`")
+
+
+def _0005_cache_invalidations() -> None:
+    DatabaseManager.execute_query(
+        """
+        CREATE TABLE IF NOT EXISTS cache_invalidations (
+            id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            scope VARCHAR(32) NOT NULL,
+            item_id BIGINT DEFAULT NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            KEY cache_invalidations_created_at_index (created_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+
+
+# Ordered list of (version, description, function)
+MIGRATIONS = [
+    ("0001", "Indexes for hot lookups on users, tickets, ticket_comments and activity_logs", _0001_hot_lookup_indexes),
+    ("0002", "Extracted status/is_ticket columns and full-text index on activity_logs", _0002_activity_log_columns),
+    ("0003", "credit_transactions, platform_stats, server_actions and job_runs tables", _0003_panel_tables),
+    ("0004", "Batch key on credit_transactions so a retried bulk charge skips users already charged", _0004_credit_transaction_batches),
+    ("0005", "cache_invalidations table broadcasting cache invalidations to every process", _0005_cache_invalidations),
+]
+
+# Queries that must be served by an index: (name, query, sample values)
+HOT_QUERIES = [
+    ("user by pterodactyl_id", "SELECT email, credits FROM users WHERE pterodactyl_id = %s", (1,)),
+    ("user by discord_id", "SELECT email FROM users WHERE discord_id = %s", (1,)),
+    ("user by email", "SELECT id FROM users WHERE email = %s", ("user@example.com",)),
+    ("tickets by user", "SELECT id FROM tickets WHERE user_id = %s", (1,)),
+    ("comments by ticket", "SELECT id FROM ticket_comments WHERE ticket_id = %s", (1,)),
+    ("recent activity logs", "SELECT id FROM activity_logs WHERE create_time >= %s ORDER BY create_time DESC LIMIT 50", ("2024-01-01",)),
+    ("activity logs page", "SELECT id FROM activity_logs WHERE id < %s ORDER BY id DESC LIMIT 100", (1000,)),
+    ("activity logs by status", "SELECT id FROM activity_logs WHERE status = %s AND id < %s ORDER BY id DESC LIMIT 100", ("Error", 1000)),
+    ("activity logs search", "SELECT id FROM activity_logs WHERE MATCH(content) AGAINST (%s IN BOOLEAN MODE) ORDER BY id DESC LIMIT 100", ("+server*",)),
+    ("ledger by user", "SELECT amount FROM credit_transactions WHERE email = %s ORDER BY created_at DESC LIMIT 50", ("user@example.com",)),
+]
+
+
+def applied_versions() -> set:
+    try:
+        rows = DatabaseManager.execute_query("SELECT version FROM schema_migrations", fetch_all=True)
+    except mysql.connector.Error as e:
+        # Nothing has been applied to a fresh database yet
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return set()
+        raise
+    return {row[0] for row in rows or []}
+
+
+def pending_migrations() -> List[str]:
+    """
+    Returns:
+        list: Versions in MIGRATIONS not recorded in schema_migrations, in order
+    """
+    done = applied_versions()
+    return [version for version, _, _ in MIGRATIONS if version not in done]
+
+
+def apply_migrations() -> List[str]:
+    """
+    Applies every migration that isn't recorded in schema_migrations yet.
+
+    Returns:
+        list: Versions applied by this call
+
+    Raises:
+        MigrationLockError: If another process is applying migrations right now
+    """
+    # The lock lives on its own connection so it is held across every statement below
+    connection = DatabaseManager.connect()
+    cursor = connection.cursor(buffered=True)
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (MIGRATION_LOCK,))
+        if cursor.fetchone()[0] != 1:
+            raise MigrationLockError("Another process is applying schema migrations")
+        try:
+            ensure_migrations_table()
+            done = applied_versions()
+            applied = []
+
+            for version, description, migration in MIGRATIONS:
+                if version in done:
+                    continue
+                print(f"Applying migration {version}: {description}")
+                migration()
+                DatabaseManager.execute_query(
+                    "INSERT IGNORE INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+                applied.append(version)
+
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def check_hot_queries() -> List[Tuple[str, str]]:
+    """
+    EXPLAINs every registered hot query.
+
+    A query fails when MySQL plans a full scan (type ALL) and has no usable index
+    at all; a full scan chosen despite an index (tiny tables) is not reported.
+
+    Returns:
+        list: (name, reason) for each failing query, empty if all pass
+    """
+    failures = []
+    for name, query, values in HOT_QUERIES:
+        with DatabaseManager.transaction() as cursor:
+            cursor.execute(f"EXPLAIN {query}", values)
+            columns = cursor.column_names
+            plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        for step in plan:
+            if step.get('type') == 'ALL' and not step.get('possible_keys'):
+                failures.append((name, f"full scan of {step.get('table')} (~{step.get('rows')} rows)"))
+    return failures
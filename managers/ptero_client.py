@@ -0,0 +1,256 @@
+"""
+Pterodactyl Client Module
+=================
+
+This module provides the shared HTTP client for the Pterodactyl panel API:
+- One pooled requests.Session (keep-alive, gzip) for every panel call
+- Configurable connection pool size per host
+- Per-endpoint latency histograms
+- Paginated list fetches streamed with bounded parallelism (iter_pages),
+  deduplicated by id and checked against the reported total
+
+Usage:
+    from managers.ptero_client import ptero
+    response = ptero.get(f"api/application/servers/{server_id}")
+
+    for server in ptero.iter_pages("api/application/servers"):
+        ...
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterator, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from config import PTERODACTYL_URL, PTERODACTYL_ADMIN_KEY
+
+try:
+    from config import PTERO_POOL_SIZE  # type: ignore
+except ImportError:
+    PTERO_POOL_SIZE = 32
+
+try:
+    from config import PTERO_PAGE_SIZE  # type: ignore
+except ImportError:
+    PTERO_PAGE_SIZE = 100
+
+try:
+    from config import PTERO_PAGE_WORKERS  # type: ignore
+except ImportError:
+    PTERO_PAGE_WORKERS = 4
+
+try:
+    from config import PTERO_PAGE_PASSES  # type: ignore
+except ImportError:
+    PTERO_PAGE_PASSES = 3
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+
+class PteroPageError(requests.RequestException):
+    """Raised when a page of a paginated list can't be fetched."""
+
+
+# Path segments collapsed to {id} so histograms are keyed per endpoint, not per object
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12}|[0-9a-f]{8})$")
+
+
+def normalize_endpoint(method: str, path: str) -> str:
+    """
+    Returns the histogram key for a request, e.g. "GET api/application/servers/{id}".
+    """
+    path = path.split("?", 1)[0]
+    if path.startswith(PTERODACTYL_URL):
+        path = path[len(PTERODACTYL_URL):]
+    segments = ["{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.strip("/").split("/")]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+class PteroClient:
+    """
+    Pooled client for the Pterodactyl API.
+
+    Paths are relative to PTERODACTYL_URL (full URLs are accepted too). The admin
+    API headers are set on the session; pass headers= to override them per call,
+    e.g. for client API keys.
+    """
+
+    def __init__(self, base_url: str = PTERODACTYL_URL, api_key: str = PTERODACTYL_ADMIN_KEY, pool_size: int = PTERO_POOL_SIZE):
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        })
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._latency: Dict[str, dict] = {}
+        self._latency_lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}{path.lstrip('/')}"
+
+    def request(self, method: str, path: str, timeout: float = 60, **kwargs) -> requests.Response:
+        """
+        Makes a request through the pooled session and records its latency.
+
+        Args:
+            method: HTTP method
+            path: API path relative to PTERODACTYL_URL, e.g. "api/application/servers"
+            timeout: Request timeout in seconds
+            **kwargs: Passed through to requests (json, params, headers, ...)
+
+        Returns:
+            requests.Response
+        """
+        started = time.perf_counter()
+        try:
+            return self.session.request(method, self.url(path), timeout=timeout, **kwargs)
+        finally:
+            self.record_latency(normalize_endpoint(method, path), time.perf_counter() - started)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def patch(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", path, **kwargs)
+
+    def delete(self, path: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", path, **kwargs)
+
+    def _fetch_page(self, path: str, page: int, per_page: int, params: Optional[dict]) -> dict:
+        response = self.get(path, params={**(params or {}), "page": page, "per_page": per_page})
+        if response.status_code != 200:
+            raise PteroPageError(f"GET {path} page {page} failed: {response.status_code}")
+        return response.json()
+
+    def _iter_pass(self, path: str, per_page: int, workers: int, params: Optional[dict], meta: dict) -> Iterator[dict]:
+        """ One pass over every page; stores the list's record total from the first page in meta """
+        first = self._fetch_page(path, 1, per_page, params)
+        pagination = first.get('meta', {}).get('pagination', {})
+        meta['total'] = pagination.get('total', len(first.get('data', [])))
+        yield from first.get('data', [])
+
+        total_pages = pagination.get('total_pages', 1)
+        del first
+        if total_pages <= 1:
+            return
+
+        pages = iter(range(2, total_pages + 1))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ptero-pages")
+        pending = set()
+        try:
+            for page in pages:
+                pending.add(executor.submit(self._fetch_page, path, page, per_page, params))
+                if len(pending) >= workers:
+                    break
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    next_page = next(pages, None)
+                    if next_page is not None:
+                        pending.add(executor.submit(self._fetch_page, path, next_page, per_page, params))
+                    yield from future.result().get('data', [])
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def iter_pages(self, path: str, per_page: int = PTERO_PAGE_SIZE, workers: int = PTERO_PAGE_WORKERS, params: Optional[dict] = None) -> Iterator[dict]:
+        """
+        Streams every record of a paginated list endpoint, each exactly once.
+
+        The first page is fetched to learn the page count, then the remaining pages
+        are fetched by at most `workers` threads. Records are yielded as each page
+        arrives (pages may complete out of order), and at most `workers` pages are
+        held in memory at once. Closing the iterator early stops further fetches.
+
+        Offset pages fetched concurrently shift when records are created or deleted
+        mid-listing: a record can show up on two pages or on none. Records are
+        deduplicated by id, and when fewer distinct records arrived than the
+        first page's meta.pagination.total the list is walked again (up to
+        PTERO_PAGE_PASSES times), yielding only the records not seen yet.
+
+        Args:
+            path: List endpoint, e.g. "api/application/servers"
+            per_page: Records per page
+            workers: Maximum pages in flight
+            params: Extra query parameters (e.g. {"include": "servers"})
+
+        Yields:
+            dict: One list item (e.g. {"object": "server", "attributes": {...}})
+
+        Raises:
+            PteroPageError: If a page returns a non-200 status, or records are still
+                            missing after the last pass
+        """
+        seen = set()
+        for _ in range(PTERO_PAGE_PASSES):
+            meta = {}
+            unidentified = False
+            for item in self._iter_pass(path, per_page, workers, params, meta):
+                item_id = item.get('attributes', {}).get('id')
+                if item_id is None:
+                    unidentified = True
+                elif item_id in seen:
+                    continue
+                else:
+                    seen.add(item_id)
+                yield item
+
+            # Records without an id can't be counted or deduplicated, so one pass is all we can do
+            if unidentified or len(seen) >= meta['total']:
+                return
+        raise PteroPageError(f"GET {path} returned {len(seen)} of {meta['total']} records after {PTERO_PAGE_PASSES} passes")
+
+    def record_latency(self, endpoint: str, elapsed: float) -> None:
+        """Adds one observation to the endpoint's latency histogram."""
+        with self._latency_lock:
+            stats = self._latency.get(endpoint)
+            if stats is None:
+                stats = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(LATENCY_BUCKETS)}
+                self._latency[endpoint] = stats
+            stats["count"] += 1
+            stats["sum"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    stats["buckets"][index] += 1
+                    break
+
+    def latency_metrics(self) -> Dict[str, dict]:
+        """
+        Returns per-endpoint latency histograms.
+
+        Returns:
+            dict: endpoint -> {count, avg, max, buckets: {"<=bound": count}}
+        """
+        with self._latency_lock:
+            snapshot = {endpoint: dict(stats, buckets=list(stats["buckets"])) for endpoint, stats in self._latency.items()}
+
+        return {
+            endpoint: {
+                "count": stats["count"],
+                "avg": stats["sum"] / stats["count"] if stats["count"] else 0.0,
+                "max": stats["max"],
+                "buckets": {f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS, stats["buckets"])}
+            }
+            for endpoint, stats in snapshot.items()
+        }
+
+
+# Shared instance
+ptero = PteroClient()
@@ -0,0 +1,416 @@
+"""
+Server Actions Module
+=================
+
+This module is a durable, DB-backed queue for server suspend, unsuspend and
+delete actions:
+- Actions are rows in the server_actions table, so a restart mid-sweep loses nothing
+- A server has at most one open action; a newer intent replaces a pending one
+- Actions for the same server run one at a time
+- Every attempt re-checks why the action was queued (credits, last login, user
+  suspension, current server state) and drops actions whose reason is gone
+- Failed actions are retried with exponential backoff, then dead-lettered
+- Each processing pass runs at most ACTION_NODE_CONCURRENCY actions per node
+
+Sweeps (billing, unsuspension, suspended-user cleanup) enqueue actions; the
+process_actions() scheduler job (app.py) executes them. Dead actions are listed
+in the admin panel, where they can be retried or dismissed.
+
+Statuses: pending -> running -> done | obsolete | dead (or back to pending for a retry).
+Only pending rows hold the "server:<id>" idempotency key, so a new intent for a
+server whose action is running is queued behind it instead of being lost.
+"""
+
+import datetime
+import socket
+import os
+from typing import Iterable, List, Optional, Tuple
+from mysql.connector.errors import IntegrityError
+from .database_manager import DatabaseManager
+from .executor import submit
+from .inventory import inventory
+from .logging import webhook_log
+from .ptero_client import ptero
+
+try:
+    from config import ACTION_NODE_CONCURRENCY  # type: ignore
+except ImportError:
+    ACTION_NODE_CONCURRENCY = 4
+
+try:
+    from config import ACTION_MAX_ATTEMPTS  # type: ignore
+except ImportError:
+    ACTION_MAX_ATTEMPTS = 6
+
+try:
+    from config import ACTION_BACKOFF_BASE  # type: ignore
+except ImportError:
+    ACTION_BACKOFF_BASE = 30
+
+try:
+    from config import ACTION_PROCESS_INTERVAL  # type: ignore
+except ImportError:
+    ACTION_PROCESS_INTERVAL = 10
+
+# Running actions older than this (seconds) are assumed orphaned by a crash and requeued
+ACTION_LOCK_TIMEOUT = 600
+# Due actions considered per processing pass
+ACTION_BATCH_SIZE = 500
+
+ACTIONS = ("suspend", "unsuspend", "delete")
+
+# Identifies this process in locked_by
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def pending_key(server_id: int) -> str:
+    """ Idempotency key held by a server's pending action """
+    return f"server:{int(server_id)}"
+
+
+def enqueue_actions(actions: Iterable[Tuple], reason: Optional[str] = None) -> int:
+    """
+    Queues server actions in one batched insert.
+
+    A server has at most one pending action. Enqueueing the same action again
+    keeps its attempt count and backoff; enqueueing a different one replaces the
+    pending action (newest intent wins). If the server's action is running, the
+    new one waits behind it.
+
+    Args:
+        actions: (action, server_id) or (action, server_id, node_id) tuples
+        reason: Why the action is queued; checked again before every attempt
+                (out_of_credits, credits_available, suspended_too_long,
+                user_suspended, inactive_free_tier)
+
+    Returns:
+        int: Number of actions passed in
+    """
+    now = datetime.datetime.now()
+    rows = []
+    for entry in actions:
+        action, server_id = entry[0], int(entry[1])
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown server action: {action}")
+        node_id = entry[2] if len(entry) > 2 else None
+        if node_id is None:
+            server = inventory.get(server_id, max_age=float("inf"))
+            node_id = server['attributes']['node'] if server else None
+        rows.append((pending_key(server_id), action, server_id, node_id, reason, now))
+    if not rows:
+        return 0
+
+    # Columns are assigned left to right, so action must be updated last
+    DatabaseManager.execute_many(
+        """
+        INSERT INTO server_actions (idempotency_key, action, server_id, node_id, reason, next_attempt_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            attempts = IF(action = VALUES(action), attempts, 0),
+            last_error = IF(action = VALUES(action), last_error, NULL),
+            next_attempt_at = IF(action = VALUES(action), next_attempt_at, VALUES(next_attempt_at)),
+            node_id = COALESCE(VALUES(node_id), node_id),
+            reason = VALUES(reason),
+            action = VALUES(action)
+        """,
+        rows
+    )
+    return len(rows)
+
+
+def enqueue_action(action: str, server_id: int, node_id: Optional[int] = None, reason: Optional[str] = None) -> None:
+    """
+    Queues a single server action; see enqueue_actions().
+    """
+    enqueue_actions([(action, server_id, node_id)], reason=reason)
+
+
+def _load_owner(pterodactyl_id: int) -> Optional[dict]:
+    row = DatabaseManager.execute_query(
+        "SELECT credits, last_seen, suspended FROM users WHERE pterodactyl_id = %s",
+        (pterodactyl_id,)
+    )
+    if not row:
+        return None
+    return {"credits": float(row[0]), "last_seen": row[1], "suspended": bool(row[2])}
+
+
+def obsolete_reason(action: str, reason: Optional[str], server: dict, owner: Optional[dict], now: datetime.datetime) -> Optional[str]:
+    """
+    Checks that the reason an action was queued for still holds.
+
+    Args:
+        action: Queued action
+        reason: Reason it was queued for
+        server: Current server object from the panel
+        owner: Owner's credits, last_seen and suspended flag, or None if unknown
+        now: Current time
+
+    Returns:
+        str: Why the action no longer applies
+        None: If it should still run
+    """
+    from .credit_manager import convert_to_product
+    from .sweep import FREE_TIER_SUSPEND_AFTER, FREE_TIER_DELETE_AFTER, SUSPENDED_DELETE_AFTER_DAYS
+
+    attributes = server['attributes']
+    product = convert_to_product(server)
+    hourly_cost = float(product['price'])/30.0/24.0
+
+    if reason == "out_of_credits":
+        if owner is not None and owner["credits"] >= hourly_cost:
+            return "owner can afford the server again"
+    elif reason == "credits_available":
+        if owner is None or owner["credits"] < hourly_cost:
+            return "owner can no longer afford the server"
+        if owner["suspended"]:
+            return "owner is suspended"
+    elif reason == "suspended_too_long":
+        if not attributes['suspended']:
+            return "server is no longer suspended"
+        if owner is not None and owner["credits"] >= hourly_cost:
+            return "owner can afford the server again"
+        try:
+            suspension_time = datetime.datetime.strptime(attributes['updated_at'], "%Y-%m-%dT%H:%M:%S+00:00")
+        except (ValueError, KeyError, TypeError):
+            return "suspension time unknown"
+        if (now - suspension_time).days <= SUSPENDED_DELETE_AFTER_DAYS:
+            return "server has not been suspended long enough"
+    elif reason == "user_suspended":
+        if owner is None or not owner["suspended"]:
+            return "owner is no longer suspended"
+    elif reason == "inactive_free_tier":
+        if int(product['price']) != 0:
+            return "server is no longer free tier"
+        if owner is None or owner["last_seen"] is None:
+            return "owner activity unknown"
+        threshold = FREE_TIER_DELETE_AFTER if action == "delete" else FREE_TIER_SUSPEND_AFTER
+        if now - owner["last_seen"] <= threshold:
+            return "owner has logged in since"
+    return None
+
+
+def _execute(action: str, server_id: int, reason: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Re-checks and runs one action.
+
+    Returns:
+        tuple: (outcome, message) where outcome is "done", "obsolete" or "error"
+    """
+    from .server_manager import suspend_server, unsuspend_server, delete_server
+
+    response = ptero.get(f"api/application/servers/{server_id}")
+    if response.status_code == 404:
+        if action == "delete":
+            return "done", None
+        return "obsolete", "server no longer exists"
+    # Rate limits and panel outages are retried; only a 404 means the server is gone
+    if response.status_code != 200:
+        return "error", f"panel returned {response.status_code}"
+    server = response.json()
+
+    # Already in the requested state
+    suspended = server['attributes']['suspended']
+    if (action == "suspend" and suspended) or (action == "unsuspend" and not suspended):
+        return "done", None
+
+    owner = _load_owner(server['attributes']['user'])
+    why = obsolete_reason(action, reason, server, owner, datetime.datetime.now())
+    if why is not None:
+        return "obsolete", why
+
+    if action == "delete":
+        if delete_server(server_id):
+            return "done", None
+        return "error", "delete failed"
+
+    status = suspend_server(server_id) if action == "suspend" else unsuspend_server(server_id)
+    # 404: the server was deleted in the meantime, nothing left to do
+    if status in (204, 404):
+        return "done", None
+    return "error", f"panel returned {status}"
+
+
+def _claim(limit: int) -> List[tuple]:
+    """
+    Claims due actions, at most ACTION_NODE_CONCURRENCY per node. Servers with an
+    action still running are skipped, so actions for one server never overlap.
+    """
+    candidates = DatabaseManager.execute_query(
+        """
+        SELECT id, node_id FROM server_actions
+        WHERE status = 'pending' AND next_attempt_at <= %s
+          AND server_id NOT IN (SELECT server_id FROM server_actions WHERE status = 'running')
+        ORDER BY id LIMIT %s
+        """,
+        (datetime.datetime.now(), limit),
+        fetch_all=True
+    ) or []
+
+    per_node = {}
+    chosen = []
+    for action_id, node_id in candidates:
+        if per_node.get(node_id, 0) >= ACTION_NODE_CONCURRENCY:
+            continue
+        per_node[node_id] = per_node.get(node_id, 0) + 1
+        chosen.append(action_id)
+    if not chosen:
+        return []
+
+    placeholders = ", ".join(["%s"] * len(chosen))
+    # The status guard makes the claim safe against another process claiming the same rows.
+    # Releasing the key lets a newer intent queue up behind the running action.
+    DatabaseManager.execute_query(
+        f"UPDATE server_actions SET status = 'running', idempotency_key = NULL, locked_by = %s, locked_at = %s "
+        f"WHERE id IN ({placeholders}) AND status = 'pending'",
+        (WORKER_ID, datetime.datetime.now(), *chosen)
+    )
+    return DatabaseManager.execute_query(
+        f"SELECT id, action, server_id, reason, attempts FROM server_actions "
+        f"WHERE id IN ({placeholders}) AND status = 'running' AND locked_by = %s",
+        (*chosen, WORKER_ID),
+        fetch_all=True
+    ) or []
+
+
+def _requeue(action_id: int, server_id: int, attempts: int, error: Optional[str], next_attempt_at: datetime.datetime) -> bool:
+    """
+    Puts an action back to pending. If a newer action for the server was queued
+    in the meantime, that one wins and this one is marked obsolete.
+
+    Returns:
+        bool: True if the action was requeued
+    """
+    superseded = DatabaseManager.execute_query(
+        "SELECT id FROM server_actions WHERE idempotency_key = %s",
+        (pending_key(server_id),)
+    )
+    if not superseded:
+        try:
+            DatabaseManager.execute_query(
+                "UPDATE server_actions SET status = 'pending', idempotency_key = %s, attempts = %s, last_error = %s, "
+                "locked_by = NULL, next_attempt_at = %s WHERE id = %s",
+                (pending_key(server_id), attempts, error, next_attempt_at, action_id)
+            )
+            return True
+        except IntegrityError:
+            pass
+    DatabaseManager.execute_query(
+        "UPDATE server_actions SET status = 'obsolete', last_error = 'superseded by a newer action', locked_by = NULL WHERE id = %s",
+        (action_id,)
+    )
+    return False
+
+
+def _finish(action_id: int, action: str, server_id: int, attempts: int, outcome: str, message: Optional[str]) -> str:
+    if outcome in ("done", "obsolete"):
+        DatabaseManager.execute_query(
+            "UPDATE server_actions SET status = %s, attempts = %s, last_error = %s, locked_by = NULL WHERE id = %s",
+            (outcome, attempts + 1, message, action_id)
+        )
+        return outcome
+
+    attempts += 1
+    if attempts >= ACTION_MAX_ATTEMPTS:
+        DatabaseManager.execute_query(
+            "UPDATE server_actions SET status = 'dead', attempts = %s, last_error = %s, locked_by = NULL WHERE id = %s",
+            (attempts, message[:2000], action_id)
+        )
+        webhook_log(f"Server action {action} on server {server_id} failed {attempts} times and was dead-lettered: {message}", 2, database_log=True)
+        return "dead"
+
+    delay = ACTION_BACKOFF_BASE * (2 ** (attempts - 1))
+    if _requeue(action_id, server_id, attempts, message[:2000], datetime.datetime.now() + datetime.timedelta(seconds=delay)):
+        return "retry"
+    return "obsolete"
+
+
+def _process_one(row) -> str:
+    action_id, action, server_id, reason, attempts = row
+    try:
+        outcome, message = _execute(action, server_id, reason)
+    except Exception as e:
+        outcome, message = "error", str(e) or type(e).__name__
+    return _finish(action_id, action, server_id, attempts, outcome, message)
+
+
+def requeue_stale_actions() -> None:
+    """Returns actions left 'running' by a crashed process to the queue."""
+    rows = DatabaseManager.execute_query(
+        "SELECT id, server_id, attempts, last_error FROM server_actions WHERE status = 'running' AND locked_at < %s",
+        (datetime.datetime.now() - datetime.timedelta(seconds=ACTION_LOCK_TIMEOUT),),
+        fetch_all=True
+    ) or []
+    for action_id, server_id, attempts, last_error in rows:
+        _requeue(action_id, server_id, attempts, last_error, datetime.datetime.now())
+
+
+def process_actions(limit: int = ACTION_BATCH_SIZE) -> dict:
+    """
+    Executes due actions; run by the scheduler.
+
+    Returns:
+        dict: Count of actions per outcome (done, obsolete, retry, dead)
+    """
+    from .user_manager import flush_last_seen
+
+    requeue_stale_actions()
+    rows = _claim(limit)
+    outcomes = {"done": 0, "obsolete": 0, "retry": 0, "dead": 0}
+    if not rows:
+        return outcomes
+
+    # Inactivity checks read last_seen from the users table
+    flush_last_seen()
+    # Panel calls share the "panel" pool's concurrency limit; the queue does its own retries
+    futures = [submit("panel", _process_one, row, retries=0) for row in rows]
+    for future in futures:
+        outcomes[future.result()] += 1
+    return outcomes
+
+
+def action_counts() -> dict:
+    """
+    Returns:
+        dict: status -> number of actions
+    """
+    rows = DatabaseManager.execute_query("SELECT status, COUNT(*) FROM server_actions GROUP BY status", fetch_all=True)
+    return {status: count for status, count in rows or []}
+
+
+def get_dead_actions(limit: int = 200) -> List[tuple]:
+    """
+    Returns:
+        list[tuple]: (id, action, server_id, node_id, reason, attempts, last_error, created_at, updated_at), newest first
+    """
+    return DatabaseManager.execute_query(
+        "SELECT id, action, server_id, node_id, reason, attempts, last_error, created_at, updated_at "
+        "FROM server_actions WHERE status = 'dead' ORDER BY updated_at DESC LIMIT %s",
+        (limit,),
+        fetch_all=True
+    ) or []
+
+
+def retry_action(action_id: int) -> bool:
+    """
+    Moves a dead action back to the queue with a fresh attempt count. Its reason
+    is checked again before it runs.
+
+    Returns:
+        bool: False if the action isn't dead or a newer action for the server is queued
+    """
+    row = DatabaseManager.execute_query(
+        "SELECT server_id, last_error FROM server_actions WHERE id = %s AND status = 'dead'",
+        (action_id,)
+    )
+    if not row:
+        return False
+    return _requeue(action_id, row[0], 0, row[1], datetime.datetime.now())
+
+
+def dismiss_action(action_id: int) -> None:
+    """Marks a dead action as done without running it."""
+    DatabaseManager.execute_query(
+        "UPDATE server_actions SET status = 'done', last_error = CONCAT('dismissed: ', COALESCE(last_error, '')) WHERE id = %s AND status = 'dead'",
+        (action_id,)
+    )
@@ -13,26 +13,30 @@ Functions in this module interact primarily with the Pterodactyl API
 to manage game servers across the system.
 """
 
-import requests
+import copy
 import json
 import threading
-from config import PTERODACTYL_URL, PTERODACTYL_ADMIN_KEY, AUTODEPLOY_NEST_ID, PTERODACTYL_CLIENT_KEY
+from config import AUTODEPLOY_NEST_ID, PTERODACTYL_CLIENT_KEY
 from pterocache import PteroCache
 from managers.database_manager import DatabaseManager
 from .logging import webhook_log
+from .inventory import inventory
+from .allocations import allocation_index, is_allocation_conflict, ALLOCATION_CONFLICT_RETRIES
+from .ptero_client import ptero
+from .cache_sync import register_handler, publish
 import time
-from security import safe_requests
-import secrets
 
 # Initialize cache
 cache = PteroCache()
 
-# API authentication headers
-HEADERS = {
-    "Authorization": f"Bearer {PTERODACTYL_ADMIN_KEY}",
-    'Accept': 'application/json',
-    'Content-Type': 'application/json'
-}
+try:
+    from config import USER_SERVERS_CACHE_TTL  # type: ignore
+except ImportError:
+    USER_SERVERS_CACHE_TTL = 30
+
+# Per-user ?include=servers responses: pterodactyl_id -> (expires_at, response)
+_user_servers_cache = {}
+_user_servers_lock = threading.Lock()
 
 def get_nodes(all: bool = False) -> list[dict]:
     """
@@ -54,6 +58,9 @@ def get_eggs() -> list[dict]:
     """
     Returns cached list of server eggs from Pterodactyl.
     
+    The list is empty until the cache's first refresh has completed
+    (see eggs_ready()).
+    
     Returns:
         list[dict]: List of egg information with format:
             {
@@ -65,6 +72,13 @@ def get_eggs() -> list[dict]:
     """
     return cache.egg_cache
 
+def eggs_ready() -> bool:
+    """
+    Returns:
+        bool: True once the egg and node lists have been loaded from the panel
+    """
+    return cache.ready
+
 def get_autodeploy_info(project_id: int) -> list[dict]:
     """
     Gets autodeploy information for a project.
@@ -78,8 +92,7 @@ def get_autodeploy_info(project_id: int) -> list[dict]:
     res = DatabaseManager.execute_query("SELECT * FROM projects WHERE id = %s", (project_id,))
     if res is not None:
         egg_id = res[8]
-        egg_info = safe_requests.get(f"{PTERODACTYL_URL}api/application/nests/{AUTODEPLOY_NEST_ID}/eggs/{egg_id}?include=variables", 
-            headers=HEADERS, timeout=60).json()
+        egg_info = ptero.get(f"api/application/nests/{AUTODEPLOY_NEST_ID}/eggs/{egg_id}?include=variables").json()
         attributes = egg_info['attributes']
         
         # Convert res[7] to a dictionary
@@ -92,8 +105,14 @@ def get_autodeploy_info(project_id: int) -> list[dict]:
                 "startup": attributes['startup']}], environment
     return None
 
-def improve_list_servers(pterodactyl_id: int = None):
+def improve_list_servers(pterodactyl_id: int = None, use_cache: bool = True):
     """
+    Returns a user's panel account with their servers, or the whole server list.
+    
+    Per-user responses are cached for USER_SERVERS_CACHE_TTL seconds. Checks that
+    enforce limits (server count, one free server) must pass use_cache=False so
+    they see servers created moments ago; the fresh response refreshes the cache.
+    
     Example Response:
     {
         "object": "user",
@@ -167,16 +186,72 @@ def improve_list_servers(pterodactyl_id: int = None):
     }
     """
     if pterodactyl_id is None:
-        response = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers?per_page=100000", headers=HEADERS, timeout=60)
-        if response.status_code == 200:
-            return response.json()
-        return None
+        # The whole list comes from the shared inventory, fetched page by page
+        servers = inventory.servers()
+        if servers is None:
+            return None
+        return {"object": "list", "data": servers}
     else:
-        response = safe_requests.get(f"{PTERODACTYL_URL}api/application/users/{pterodactyl_id}?include=servers", headers=HEADERS, timeout=60)
+        pterodactyl_id = int(pterodactyl_id)
+        with _user_servers_lock:
+            cached = _user_servers_cache.get(pterodactyl_id)
+        if use_cache and cached and cached[0] > time.monotonic():
+            return copy.deepcopy(cached[1])
+        
+        response = ptero.get(f"api/application/users/{pterodactyl_id}?include=servers")
         if response.status_code == 200:
-            return response.json()
+            data = response.json()
+            with _user_servers_lock:
+                _user_servers_cache[pterodactyl_id] = (time.monotonic() + USER_SERVERS_CACHE_TTL, data)
+            return copy.deepcopy(data)
         return None
 
+def invalidate_user_servers(pterodactyl_id: int = None):
+    """
+    Drops the cached improve_list_servers() response for a user, or for everyone.
+    
+    Args:
+        pterodactyl_id: Pterodactyl user ID, None to clear the whole cache
+    
+    Returns:
+        None
+    """
+    with _user_servers_lock:
+        if pterodactyl_id is None:
+            _user_servers_cache.clear()
+        else:
+            _user_servers_cache.pop(int(pterodactyl_id), None)
+
+def _invalidate_server_locally(owner_id: int = None):
+    inventory.invalidate()
+    # Unknown owner: clearing everyone is cheap and keeps lists correct
+    invalidate_user_servers(owner_id)
+
+
+# Other processes drop their copies when a server changes here
+register_handler("server", _invalidate_server_locally)
+
+
+def invalidate_server(server_id: int, owner_id: int = None):
+    """
+    Invalidates cached state after a server changes: the shared inventory and the
+    owner's server list (looked up in the inventory when owner_id isn't given).
+    
+    The invalidation is applied in this process right away and broadcast to the
+    other processes through managers.cache_sync.
+    
+    Args:
+        server_id: Pterodactyl server ID
+        owner_id: Pterodactyl user ID of the owner, if known
+    
+    Returns:
+        None
+    """
+    if owner_id is None:
+        owner_id = inventory.owner_of(server_id)
+    _invalidate_server_locally(owner_id)
+    publish("server", owner_id)
+
 def get_server_information(server_id: int):
     """
     Returns dictionary of server information from pterodactyl api.
@@ -214,7 +289,7 @@ def get_server_information(server_id: int):
         }
     }
     """
-    response = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers/{server_id}", headers=HEADERS, timeout=60)
+    response = ptero.get(f"api/application/servers/{server_id}")
     if response.status_code == 200:
         return response.json()
     return None
@@ -230,7 +305,8 @@ def suspend_server(server_id: int):
     Returns:
         None
     """
-    response = requests.post(f"{PTERODACTYL_URL}api/application/servers/{server_id}/suspend", headers=HEADERS, timeout=60)
+    response = ptero.post(f"api/application/servers/{server_id}/suspend")
+    invalidate_server(server_id)
     return response.status_code
 
 def unsuspend_server(server_id: int):
@@ -251,12 +327,19 @@ def unsuspend_server(server_id: int):
         ]
     }
     """
-    response = requests.post(f"{PTERODACTYL_URL}api/application/servers/{server_id}/unsuspend", headers=HEADERS, timeout=60)
+    response = ptero.post(f"api/application/servers/{server_id}/unsuspend")
+    invalidate_server(server_id)
     return response.status_code
 
 def get_node_allocation(node_id: int):
     """
-    Gets random allocation for a specific node.
+    Reserves a random free allocation on a specific node.
+    
+    The allocation comes from the shared allocation index and is leased for
+    ALLOCATION_LEASE_TTL seconds, so concurrent creations and transfers in this
+    process never get the same one. Call allocation_index.release() if it ends up
+    unused, and allocation_index.discard() if the panel reports it taken by
+    another process (see managers.allocations).
     
     Args:
         node_id: ID of the node
@@ -265,13 +348,7 @@ def get_node_allocation(node_id: int):
         int: Random available allocation ID
         None: If no free allocation found
     """
-    response = safe_requests.get(f"{PTERODACTYL_URL}api/application/nodes/{node_id}/allocations?per_page=100000", headers=HEADERS, timeout=60)
-    if response.status_code == 200:
-        allocations = response.json()['data']
-        free_allocations = [allocation['attributes']['id'] for allocation in allocations if not allocation['attributes']['assigned']]
-        if free_allocations:
-            return secrets.choice(free_allocations)
-    return None
+    return allocation_index.reserve(node_id)
 
 def transfer_server(server_id: int, target_node_id: int) -> int:
     """
@@ -287,7 +364,7 @@ def transfer_server(server_id: int, target_node_id: int) -> int:
     # Get server details
     server_info = get_server_information(server_id)
     if not server_info:
-        threading.Thread(target=webhook_log, args=(f"Failed to get server info for server {server_id}", 2)).start()
+        webhook_log(f"Failed to get server info for server {server_id}", 2)
         return 404
 
     # Get allocation on target node
@@ -303,15 +380,20 @@ def transfer_server(server_id: int, target_node_id: int) -> int:
     }
     
     # Perform server transfer
-    transfer_url = f"{PTERODACTYL_URL}api/application/servers/{server_id}/transfer"
+    transfer_url = f"api/application/servers/{server_id}/transfer"
     
     try:
-        response = requests.post(
-            transfer_url, 
-            headers=HEADERS, 
-            json=transfer_data, 
-            timeout=60
-        )
+        response = ptero.post(transfer_url, json=transfer_data)
+        # Another process may have leased the same allocation; the panel rejects the second use
+        for _ in range(ALLOCATION_CONFLICT_RETRIES):
+            if not is_allocation_conflict(response):
+                break
+            allocation_index.discard(allocation_id)
+            allocation_id = get_node_allocation(target_node_id)
+            if allocation_id is None:
+                break
+            transfer_data["allocation_id"] = allocation_id
+            response = ptero.post(transfer_url, json=transfer_data)
         
         # If we get a connection error (504), try to forcefully stop the server and retry
         if response.status_code == 504:
@@ -328,11 +410,11 @@ def transfer_server(server_id: int, target_node_id: int) -> int:
             }
             
             # Send kill command to the server using identifier and client API
-            kill_url = f"{PTERODACTYL_URL}api/client/servers/{server_identifier}/power"
+            kill_url = f"api/client/servers/{server_identifier}/power"
             kill_data = {"signal": "kill"}
             
             try:
-                kill_response = requests.post(kill_url, headers=client_headers, json=kill_data, timeout=30)
+                kill_response = ptero.post(kill_url, headers=client_headers, json=kill_data, timeout=30)
                 print(f"Force stop command sent to server {server_id} ({server_identifier}). Status: {kill_response.status_code}", 1)
                 
                 # Wait a moment for the server to fully stop
@@ -340,43 +422,42 @@ def transfer_server(server_id: int, target_node_id: int) -> int:
                 
                 # Try the transfer again
                 print(f"Retrying transfer for server {server_id}", 1)
-                response = requests.post(
-                    transfer_url, 
-                    headers=HEADERS, 
-                    json=transfer_data, 
-                    timeout=60
-                )
+                response = ptero.post(transfer_url, json=transfer_data)
             except Exception as e:
                 print(f"Error stopping server {server_id}: {str(e)}", 2)
         
         # Log the response for debugging
         if response.status_code not in [202, 204]:
+            if is_allocation_conflict(response):
+                allocation_index.discard(allocation_id)
+            else:
+                allocation_index.release(allocation_id)
             print(f"Server transfer failed - Status: {response.status_code}, Response: {response.text}", 2)
         else:
             # Get the user who owns the server
             user_id = server_info['attributes']['user']
+            invalidate_server(server_id, user_id)
             print(f"User {user_id} transferred server {server_id} to node {target_node_id}")
         
         return response.status_code
     
     except Exception as e:
+        allocation_index.release(allocation_id)
         print(f"Server transfer error for server {server_id}: {str(e)}", 2)
         return 500
 
-def get_all_servers():
+def get_all_servers(max_age: float = None):
     """
-    Returns a list of all servers from the Pterodactyl API.
+    Returns a list of all servers from the shared server inventory.
     
-    Makes a GET request to /api/application/servers to fetch all servers.
+    Args:
+        max_age: Maximum snapshot age in seconds, defaults to INVENTORY_MAX_AGE
     
     Returns:
         list: List of server objects
-        None: If the request fails
+        None: If the fleet couldn't be fetched
     """
-    response = safe_requests.get(f"{PTERODACTYL_URL}api/application/servers?per_page=100000", headers=HEADERS, timeout=60)
-    if response.status_code == 200:
-        return response.json()['data']
-    return None
+    return inventory.servers(max_age)
 
 
 def get_server(server_id: int):
@@ -405,7 +486,9 @@ def delete_server(server_id: int):
     Returns:
         bool: True if successful, False otherwise
     """
-    response = requests.delete(f"{PTERODACTYL_URL}api/application/servers/{server_id}", headers=HEADERS, timeout=60)
+    owner_id = inventory.owner_of(server_id)
+    response = ptero.delete(f"api/application/servers/{server_id}")
+    invalidate_server(server_id, owner_id)
     if response.status_code == 204:
         return True
     return False
@@ -0,0 +1,184 @@
+"""
+Platform Stats Module
+=================
+
+This module maintains a materialised snapshot of the platform statistics shown
+on the admin stats page and by the Discord /economy_stats command:
+- Users, clients, tickets, messages and circulating credits
+- Server totals (free/paid), plan breakdown and monthly credit usage
+- A history of snapshots in the platform_stats table for trend charts
+
+A scheduled job (app.py) computes a new snapshot every STATS_SNAPSHOT_INTERVAL
+seconds in one process of the cluster; readers get the latest one from memory
+and re-read the newest stored row once theirs is older than the interval,
+instead of querying the database and downloading the server list on every view.
+"""
+
+import datetime
+import json
+import threading
+import time
+from typing import List, Optional
+from .database_manager import DatabaseManager
+from .credit_manager import convert_to_product
+from .inventory import inventory
+
+try:
+    from config import STATS_SNAPSHOT_INTERVAL  # type: ignore
+except ImportError:
+    STATS_SNAPSHOT_INTERVAL = 300
+
+try:
+    from config import STATS_HISTORY_DAYS  # type: ignore
+except ImportError:
+    STATS_HISTORY_DAYS = 30
+
+# Columns of platform_stats besides id, captured_at and plan_counts
+STAT_FIELDS = (
+    "total_users", "total_clients", "total_tickets", "total_ticket_messages", "credits_circulation",
+    "total_servers", "free_servers", "paid_servers", "monthly_credits_used"
+)
+
+_latest = None
+_latest_lock = threading.Lock()
+# time.monotonic() of the last read of platform_stats, so a stalled job doesn't
+# turn every view into a query
+_latest_checked = 0.0
+
+
+def compute_stats() -> dict:
+    """
+    Computes the platform statistics from the database and the server inventory.
+
+    Returns:
+        dict: STAT_FIELDS plus plan_counts (plan name -> servers) and captured_at
+    """
+    # One pass over users and one statement for both ticket counts
+    users = DatabaseManager.execute_query(
+        "SELECT COUNT(*), COALESCE(SUM(role = 'client'), 0), COALESCE(SUM(CASE WHEN role != 'admin' THEN credits ELSE 0 END), 0) FROM users"
+    )
+    tickets = DatabaseManager.execute_query(
+        "SELECT (SELECT COUNT(*) FROM tickets), (SELECT COUNT(*) FROM ticket_comments)"
+    )
+
+    stats = {
+        "captured_at": datetime.datetime.now().replace(microsecond=0),
+        "total_users": int(users[0]) if users else 0,
+        "total_clients": int(users[1]) if users else 0,
+        "credits_circulation": float(users[2]) if users else 0.0,
+        "total_tickets": int(tickets[0]) if tickets else 0,
+        "total_ticket_messages": int(tickets[1]) if tickets else 0,
+        "total_servers": 0,
+        "free_servers": 0,
+        "paid_servers": 0,
+        "monthly_credits_used": 0.0,
+        "plan_counts": {}
+    }
+
+    servers = inventory.servers()
+    if servers is not None:
+        plan_counts = stats["plan_counts"]
+        stats["total_servers"] = len(servers)
+        for s in servers:
+            try:
+                product = convert_to_product(s)
+                price = float(product.get("price", 0) or 0)
+                name = product.get("name", "Unknown")
+                if price == 0:
+                    stats["free_servers"] += 1
+                else:
+                    stats["paid_servers"] += 1
+                stats["monthly_credits_used"] += price
+                plan_counts[name] = plan_counts.get(name, 0) + 1
+            except Exception:
+                # If mapping fails, count under Unknown
+                plan_counts["Unknown"] = plan_counts.get("Unknown", 0) + 1
+    return stats
+
+
+def refresh_stats() -> dict:
+    """
+    Computes a new snapshot, records it in platform_stats and makes it the latest.
+    Old history beyond STATS_HISTORY_DAYS is pruned.
+
+    Returns:
+        dict: The new snapshot
+    """
+    global _latest
+    stats = compute_stats()
+    columns = ", ".join(("captured_at",) + STAT_FIELDS + ("plan_counts",))
+    placeholders = ", ".join(["%s"] * (len(STAT_FIELDS) + 2))
+    DatabaseManager.execute_query(
+        f"INSERT INTO platform_stats ({columns}) VALUES ({placeholders})",
+        (stats["captured_at"],) + tuple(stats[field] for field in STAT_FIELDS) + (json.dumps(stats["plan_counts"]),)
+    )
+    DatabaseManager.execute_query(
+        "DELETE FROM platform_stats WHERE captured_at < %s",
+        (stats["captured_at"] - datetime.timedelta(days=STATS_HISTORY_DAYS),)
+    )
+    with _latest_lock:
+        _latest = stats
+    return stats
+
+
+def _row_to_stats(row) -> dict:
+    stats = {"captured_at": row[0]}
+    stats.update(zip(STAT_FIELDS, row[1:1 + len(STAT_FIELDS)]))
+    stats["plan_counts"] = json.loads(row[-1]) if row[-1] else {}
+    return stats
+
+
+def _is_current(stats: Optional[dict]) -> bool:
+    if stats is None:
+        return False
+    age = (datetime.datetime.now() - stats["captured_at"]).total_seconds()
+    return age <= STATS_SNAPSHOT_INTERVAL or time.monotonic() - _latest_checked < STATS_SNAPSHOT_INTERVAL / 10
+
+
+def get_stats() -> dict:
+    """
+    Returns the latest snapshot without recomputing it.
+
+    The snapshot job runs in one process only, so once the in-memory snapshot is
+    older than STATS_SNAPSHOT_INTERVAL the newest stored row is read again. A
+    snapshot is computed here only if none has ever been recorded.
+
+    Returns:
+        dict: See compute_stats()
+    """
+    global _latest, _latest_checked
+    latest = _latest
+    if _is_current(latest):
+        return latest
+
+    columns = ", ".join(("captured_at",) + STAT_FIELDS + ("plan_counts",))
+    row = DatabaseManager.execute_query(f"SELECT {columns} FROM platform_stats ORDER BY captured_at DESC LIMIT 1")
+    if row is None:
+        return refresh_stats()
+    stored = _row_to_stats(row)
+    with _latest_lock:
+        _latest_checked = time.monotonic()
+        if _latest is None or stored["captured_at"] > _latest["captured_at"]:
+            _latest = stored
+        return _latest
+
+
+def get_stats_history(days: float = 7, fields: Optional[tuple] = None) -> List[dict]:
+    """
+    Returns recorded snapshots for trend charts, oldest first.
+
+    Args:
+        days: How far back to go
+        fields: STAT_FIELDS to include, defaults to all of them
+
+    Returns:
+        list[dict]: {"captured_at": datetime, <field>: value, ...}
+    """
+    fields = STAT_FIELDS if fields is None else tuple(f for f in fields if f in STAT_FIELDS)
+    since = datetime.datetime.now() - datetime.timedelta(days=days)
+    rows = DatabaseManager.execute_query(
+        f"SELECT captured_at, {', '.join(fields)} FROM platform_stats WHERE captured_at >= %s ORDER BY captured_at",
+        (since,),
+        fetch_all=True
+    )
+    return [dict(zip(("captured_at",) + fields, row)) for row in rows or []]
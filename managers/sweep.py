@@ -0,0 +1,458 @@
+"""
+Fleet Sweep Module
+=================
+
+This module runs the periodic fleet jobs as one pipeline:
+- The server list and the users table are loaded once per sweep (Fleet)
+- Pluggable rules (billing, unsuspend, suspended-user cleanup, inactive-free
+  cleanup) run in order over the same in-memory dataset
+- Rules only plan work; the consolidated plan (credit charges, server actions,
+  emails and log lines) is executed once at the end
+- Each rule has its own interval, tracked cluster-wide in job_runs, and
+  per-rule timings are reported
+
+Rules run in registration order and see each other's effects: billing lowers
+the in-memory balances the unsuspend rule reads, and a server gets at most one
+action per sweep (the first rule to claim it wins).
+
+Adding a rule:
+    @sweep_rule("my_rule", interval=3600)
+    def my_rule(fleet: Fleet, plan: SweepPlan):
+        ...
+"""
+
+import datetime
+import time
+from typing import Callable, Dict, List, Optional
+from flask import current_app
+from .database_manager import DatabaseManager
+from .credit_ledger import apply_credits_bulk, charged_in_batch
+from .credit_manager import convert_to_products
+from .email_manager import send_email
+from .inventory import inventory
+from .job_lock import record_job_start, record_job_finish, last_started
+from .logging import webhook_log
+from .server_actions import enqueue_actions
+from .user_manager import flush_last_seen
+
+try:
+    from config import SWEEP_INTERVAL  # type: ignore
+except ImportError:
+    SWEEP_INTERVAL = 60
+
+# Oldest server inventory (seconds) a sweep acts on
+FLEET_MAX_STALE = 300
+
+# Free tier servers are suspended after this much owner inactivity, deleted after the second
+FREE_TIER_SUSPEND_AFTER = datetime.timedelta(days=15)
+FREE_TIER_DELETE_AFTER = datetime.timedelta(days=17)
+# Servers the owner can't afford are deleted after being suspended this many days
+SUSPENDED_DELETE_AFTER_DAYS = 3
+
+
+class Fleet:
+    """
+    Everything the rules read, loaded once per sweep.
+
+    Attributes:
+        servers: Server objects from the shared inventory
+        products: server id -> product the server's specs map to
+        owners: pterodactyl id -> {"email", "credits", "last_seen", "suspended"};
+                rules may change "credits" to pass balances on to later rules
+        by_owner: pterodactyl id -> list of servers
+        now: Time the sweep started
+    """
+
+    def __init__(self, servers: List[dict], owners: Dict[int, dict]):
+        self.servers = servers
+        self.owners = owners
+        self.now = datetime.datetime.now()
+        self.products = {
+            server['attributes']['id']: product
+            for server, product in zip(servers, convert_to_products(servers))
+        }
+        self.by_owner: Dict[int, List[dict]] = {}
+        for server in servers:
+            self.by_owner.setdefault(server['attributes']['user'], []).append(server)
+
+    @classmethod
+    def load(cls, dry_run: bool = False) -> Optional["Fleet"]:
+        """
+        Rules bill and delete based on the server list, so a snapshot that couldn't
+        be refreshed within FLEET_MAX_STALE seconds is refused.
+
+        Args:
+            dry_run: Read only; buffered last seen times are not written first
+
+        Returns:
+            Fleet: Current fleet and panel-linked users
+            None: If no fresh enough server list could be fetched
+        """
+        snapshot = inventory.snapshot()
+        if snapshot is None or snapshot.age > FLEET_MAX_STALE:
+            return None
+        servers = snapshot.servers
+        if not dry_run:
+            # Write buffered last seen times so the inactivity rules see them
+            flush_last_seen()
+        rows = DatabaseManager.execute_query(
+            "SELECT pterodactyl_id, email, credits, last_seen, suspended FROM users WHERE pterodactyl_id IS NOT NULL",
+            fetch_all=True
+        )
+        owners = {
+            int(row[0]): {"email": row[1], "credits": float(row[2]), "last_seen": row[3], "suspended": bool(row[4])}
+            for row in rows or []
+        }
+        return cls(servers, owners)
+
+
+class SweepPlan:
+    """
+    Work planned by the rules of one sweep.
+
+    Attributes:
+        charges: (email, amount) credit changes for the ledger
+        actions: (action, server_id, node_id, reason, rule) server actions, at most one per server
+        emails: (email, subject, body) notifications
+        logs: (message, status, database_log) webhook log lines
+        timings: rule name -> seconds spent planning
+        batch_key: Ledger batch of the charges, so a retried sweep never bills twice
+        charged: Emails the batch already charged; their balances are already debited
+    """
+
+    def __init__(self):
+        self.charges = []
+        self.actions = []
+        self.emails = []
+        self.logs = []
+        self.timings: Dict[str, float] = {}
+        self.batch_key: Optional[str] = None
+        self.charged = set()
+        self._claimed = set()
+        self._rule = None
+
+    def checkpoint(self, fleet: Fleet) -> tuple:
+        """ Marks the plan and the in-memory balances before a rule runs """
+        credits = {user_id: owner["credits"] for user_id, owner in fleet.owners.items()}
+        return (len(self.charges), len(self.actions), len(self.emails), len(self.logs), set(self._claimed), credits)
+
+    def rollback(self, fleet: Fleet, checkpoint: tuple) -> None:
+        """ Drops everything a rule planned after the checkpoint, so a rule that raised leaves no partial work """
+        charges, actions, emails, logs, claimed, credits = checkpoint
+        del self.charges[charges:]
+        del self.actions[actions:]
+        del self.emails[emails:]
+        del self.logs[logs:]
+        self._claimed = claimed
+        for user_id, owner in fleet.owners.items():
+            owner["credits"] = credits[user_id]
+
+    def add_action(self, action: str, server: dict, reason: str) -> bool:
+        """
+        Plans a server action unless an earlier rule already claimed the server.
+
+        Returns:
+            bool: True if the action was planned
+        """
+        server_id = server['attributes']['id']
+        if server_id in self._claimed:
+            return False
+        self._claimed.add(server_id)
+        self.actions.append((action, server_id, server['attributes']['node'], reason, self._rule))
+        return True
+
+    def log(self, message: str, status: int = -1, database_log: bool = False) -> None:
+        self.logs.append((message, status, database_log))
+
+    def email(self, email: str, subject: str, body: str) -> None:
+        self.emails.append((email, subject, body))
+
+
+class SweepRule:
+    def __init__(self, name: str, func: Callable, interval: float, first_run: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        # Like an interval job, a rule first runs one interval after startup unless told otherwise
+        first_run = interval if first_run is None else first_run
+        self.last_run = time.monotonic() - interval + first_run
+
+
+# Rules in run order
+RULES: List[SweepRule] = []
+
+
+def sweep_rule(name: str, interval: float, first_run: Optional[float] = None):
+    """
+    Registers a rule; rules run in registration order.
+
+    Args:
+        name: Rule name used in run_sweep() and reports
+        interval: Seconds between runs of the rule
+        first_run: Seconds after startup of the first run (default: one interval)
+    """
+    def register(func):
+        RULES.append(SweepRule(name, func, interval, first_run))
+        return func
+    return register
+
+
+@sweep_rule("billing", interval=3600)
+def billing_rule(fleet: Fleet, plan: SweepPlan):
+    """
+    Charges each owner for their running servers, server by server, and
+    suspends the servers they can no longer afford.
+    """
+    unknown_owners = 0
+    for user_id, servers in fleet.by_owner.items():
+        billable = [server for server in servers if not server['attributes']['suspended']]
+        if not billable:
+            continue
+        owner = fleet.owners.get(user_id)
+        if owner is None:
+            unknown_owners += 1
+            continue
+        # Charged by an earlier attempt of this batch: the balance was debited after
+        # billing, so planning from it again would suspend servers already paid for
+        if owner["email"] in plan.charged:
+            continue
+        user_credits = owner["credits"]
+        remaining_credits = user_credits
+
+        for server in billable:
+            hourly_cost = float(fleet.products[server['attributes']['id']]['price'])/30.0/24.0
+            # Check if user has enough credits for this server
+            if remaining_credits >= hourly_cost:
+                remaining_credits -= hourly_cost
+            elif plan.add_action("suspend", server, "out_of_credits"):
+                server_name = server['attributes']['name']
+                plan.log(f"User {owner['email']} can't afford server {server_name} (ID: {server['attributes']['id']}). Suspending.", database_log=True)
+                plan.email(owner["email"], "Server suspended", f"Your server: {server_name} has been suspended due to your account running out of credits. If your account balance remains the same in 4 days, your server will be deleted permanently.")
+
+        # Record the user's charge for this hour
+        if user_credits > 0:
+            credits_used = user_credits - remaining_credits
+            if credits_used > 0:
+                plan.charges.append((owner["email"], -credits_used))
+                owner["credits"] = remaining_credits
+
+    if unknown_owners:
+        plan.log(f"Credit processing skipped {unknown_owners} server owner(s) with no local account")
+
+
+@sweep_rule("suspended_users", interval=120)
+def suspended_users_rule(fleet: Fleet, plan: SweepPlan):
+    """Deletes every server of a suspended user."""
+    for user_id, servers in fleet.by_owner.items():
+        owner = fleet.owners.get(user_id)
+        if owner is None or not owner["suspended"]:
+            continue
+        for server in servers:
+            if plan.add_action("delete", server, "user_suspended"):
+                plan.log(f"Server {server['attributes']['name']} (ID: {server['attributes']['id']}) deleted due to user suspension", 1)
+
+
+@sweep_rule("inactive_free", interval=3600, first_run=60)
+def inactive_free_rule(fleet: Fleet, plan: SweepPlan):
+    """
+    Suspends free tier servers of owners inactive for 15+ days (grace period)
+    and deletes them after 17+ days.
+    """
+    for server in fleet.servers:
+        if int(fleet.products[server['attributes']['id']]['price']) != 0:
+            continue
+        owner = fleet.owners.get(server['attributes']['user'])
+        if owner is None or owner["last_seen"] is None:
+            continue
+        server_id = server['attributes']['id']
+        server_name = server['attributes']['name']
+        inactivity = fleet.now - owner["last_seen"]
+
+        if inactivity > FREE_TIER_DELETE_AFTER:
+            if plan.add_action("delete", server, "inactive_free_tier"):
+                plan.log(f"Deleted free tier server {server_name} (ID: {server_id}) due to owner inactivity (17+ days)", database_log=True)
+        elif inactivity > FREE_TIER_SUSPEND_AFTER and not server['attributes'].get('suspended', False):
+            if plan.add_action("suspend", server, "inactive_free_tier"):
+                plan.log(f"Suspended free tier server {server_name} (ID: {server_id}) due to owner inactivity (15+ days)", database_log=True)
+                plan.email(
+                    owner["email"],
+                    "Server Suspended Due to Inactivity",
+                    "Your free-tier server has been suspended due to inactivity (no login for over 15 days).\n\n"
+                    "To keep your server, please log in to your account within the next 2 days. "
+                    "Servers inactive for 17+ days are automatically deleted.\n\n"
+                    "If you believe this was a mistake or need assistance, please contact support."
+                )
+
+
+@sweep_rule("unsuspend", interval=60)
+def unsuspend_rule(fleet: Fleet, plan: SweepPlan):
+    """
+    Unsuspends the suspended servers each owner can afford (cheapest first) and
+    deletes unaffordable ones that have been suspended for more than 3 days.
+    """
+    missing = 0
+    for user_id, servers in fleet.by_owner.items():
+        suspended_servers = [server for server in servers if server['attributes']['suspended']]
+        if not suspended_servers:
+            continue
+        owner = fleet.owners.get(user_id)
+        if owner is None:
+            missing += 1
+            continue
+
+        # Sort servers by cost (cheapest first) to maximize number of servers that can be unsuspended
+        priced_servers = sorted(((fleet.products[server['attributes']['id']], server) for server in suspended_servers), key=lambda pair: pair[0]['price'])
+        inactive = owner["last_seen"] is not None and fleet.now - owner["last_seen"] > FREE_TIER_SUSPEND_AFTER
+
+        remaining_credits = owner["credits"]
+        for product, server in priced_servers:
+            server_id = server['attributes']['id']
+            server_name = server['attributes']['name']
+            hourly_cost = float(product['price'])/30.0/24.0
+
+            # Free tier servers of inactive owners stay suspended (inactivity policy)
+            if int(product['price']) == 0 and inactive:
+                continue
+
+            if remaining_credits >= hourly_cost:
+                if plan.add_action("unsuspend", server, "credits_available"):
+                    plan.log(f"Unsuspending server {server_name} (ID: {server_id}) for user {owner['email']} (has {remaining_credits:.2f} credits)", database_log=True)
+                remaining_credits -= hourly_cost
+            else:
+                try:
+                    suspension_time = datetime.datetime.strptime(server['attributes']['updated_at'], "%Y-%m-%dT%H:%M:%S+00:00")
+                    if (fleet.now - suspension_time).days > SUSPENDED_DELETE_AFTER_DAYS:
+                        if plan.add_action("delete", server, "suspended_too_long"):
+                            plan.log(f"Deleting server {server_name} (ID: {server_id}) due to suspension for more than 3 days", database_log=True)
+                except (ValueError, KeyError) as e:
+                    plan.log(f"Error processing suspension duration for server {server_id}: {str(e)}", 1)
+
+    if missing:
+        plan.log(f"Unsuspension check skipped {missing} owner(s) with no local account", 1)
+
+
+def rule_job_id(name: str) -> str:
+    """ job_runs key of a rule """
+    return f"sweep:{name}"
+
+
+def due_rules() -> List[str]:
+    """
+    Rules are due once their interval has elapsed since they last ran anywhere in
+    the cluster (job_runs); rules that never ran use this process's start time.
+    Half a sweep interval of tolerance keeps rules from slipping a whole tick.
+
+    Returns:
+        list[str]: Names of the rules that are due
+    """
+    rows = DatabaseManager.execute_query(
+        "SELECT job_id, last_started_at FROM job_runs WHERE job_id LIKE %s",
+        (rule_job_id("%"),),
+        fetch_all=True
+    )
+    last_started = {job_id: started_at for job_id, started_at in rows or []}
+    now = datetime.datetime.now()
+    due = []
+    for rule in RULES:
+        started_at = last_started.get(rule_job_id(rule.name))
+        elapsed = (now - started_at).total_seconds() if started_at else time.monotonic() - rule.last_run
+        if elapsed >= rule.interval - SWEEP_INTERVAL / 2:
+            due.append(rule.name)
+    return due
+
+
+def execute_plan(plan: SweepPlan) -> None:
+    """Writes the charges, queues the server actions, then sends emails and logs."""
+    # Charges are relative ledger updates so concurrent top-ups aren't overwritten
+    apply_credits_bulk(plan.charges, "hourly_billing", batch_key=plan.batch_key)
+    by_reason = {}
+    for action, server_id, node_id, reason, _ in plan.actions:
+        by_reason.setdefault(reason, []).append((action, server_id, node_id))
+    for reason, actions in by_reason.items():
+        enqueue_actions(actions, reason=reason)
+
+    app = current_app._get_current_object()
+    for email, subject, body in plan.emails:
+        try:
+            send_email(email, subject, body, app)
+        except Exception as e:
+            webhook_log(f"Failed to send sweep email to {email}: {str(e)}", 2)
+    for message, status, database_log in plan.logs:
+        webhook_log(message, status, database_log=database_log)
+
+
+def run_sweep(rules: Optional[List[str]] = None, dry_run: bool = False) -> Optional[dict]:
+    """
+    Loads the fleet once and runs rules over it.
+
+    Args:
+        rules: Rule names to run; defaults to the rules that are due
+        dry_run: Plan without writing, queueing, emailing or logging anything
+
+    Returns:
+        dict: Report with the rules run, the plan, actions per rule and timings (seconds)
+        None: If the server list couldn't be fetched
+    """
+    selected = [rule for rule in RULES if rule.name in (due_rules() if rules is None else rules)]
+    if not selected:
+        return {"dry_run": dry_run, "rules": [], "servers": 0, "charges": [], "actions": [], "rule_actions": {}, "timings": {}}
+
+    started = time.perf_counter()
+    fleet = Fleet.load(dry_run=dry_run)
+    if fleet is None:
+        webhook_log("Failed to get a current server list for fleet sweep; skipping it", 2, database_log=True)
+        return None
+    load_time = time.perf_counter() - started
+
+    plan = SweepPlan()
+    if not dry_run and any(rule.name == "billing" for rule in selected):
+        # One batch per billing period: the period is identified by the last billing run
+        # that completed, so a retry after a failed execute reuses the same key
+        previous = last_started(rule_job_id("billing"))
+        plan.batch_key = f"hourly_billing:{previous:%Y%m%d%H%M%S}" if previous else "hourly_billing:first"
+        plan.charged = charged_in_batch(plan.batch_key)
+
+    completed = []
+    for rule in selected:
+        phase = time.perf_counter()
+        plan._rule = rule.name
+        rule_started = datetime.datetime.now()
+        checkpoint = plan.checkpoint(fleet)
+        try:
+            rule.func(fleet, plan)
+        except Exception as e:
+            plan.rollback(fleet, checkpoint)
+            webhook_log(f"Error in sweep rule {rule.name}: {str(e)}", 2)
+            if not dry_run:
+                # Only the status is recorded; the rule stays due and runs again next sweep
+                record_job_finish(rule_job_id(rule.name), time.perf_counter() - phase, str(e))
+        else:
+            completed.append((rule, rule_started))
+        plan.timings[rule.name] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    if not dry_run:
+        # If this raises nothing is recorded, so every rule runs again on the next sweep
+        execute_plan(plan)
+        for rule, rule_started in completed:
+            rule.last_run = time.monotonic()
+            record_job_start(rule_job_id(rule.name), rule_started)
+            record_job_finish(rule_job_id(rule.name), plan.timings[rule.name])
+    execute_time = time.perf_counter() - phase
+
+    timings = {"load": load_time, "rules": plan.timings, "execute": execute_time, "total": time.perf_counter() - started}
+    actions_per_rule = {rule.name: 0 for rule in selected}
+    for action in plan.actions:
+        actions_per_rule[action[4]] += 1
+    return {
+        "dry_run": dry_run,
+        "rules": [rule.name for rule in selected],
+        "servers": len(fleet.servers),
+        "billed_users": len(plan.charges),
+        "credits_charged": -sum(amount for _, amount in plan.charges),
+        "charges": plan.charges,
+        "actions": plan.actions,
+        "rule_actions": actions_per_rule,
+        "emails": len(plan.emails),
+        "timings": timings,
+    }
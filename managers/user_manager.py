@@ -12,20 +12,40 @@ Functions in this module interact with both the local database and the Pterodact
 to manage user accounts across the system.
 """
 
+import atexit
 import bcrypt
-import requests
 import threading
 import datetime
-from config import PTERODACTYL_URL, PTERODACTYL_ADMIN_KEY
+import time
+from flask import g, has_request_context
 from managers.database_manager import DatabaseManager
+from .cache_sync import register_handler, publish
 from .logging import webhook_log
+from .ptero_client import ptero
+from .executor import submit
 
-# API authentication headers
-HEADERS = {
-    "Authorization": f"Bearer {PTERODACTYL_ADMIN_KEY}",
-    'Accept': 'application/json',
-    'Content-Type': 'application/json'
-}
+try:
+    from config import LAST_SEEN_FLUSH_INTERVAL  # type: ignore
+except ImportError:
+    LAST_SEEN_FLUSH_INTERVAL = 30
+
+try:
+    from config import LAST_SEEN_BUFFER_MAX  # type: ignore
+except ImportError:
+    LAST_SEEN_BUFFER_MAX = 5000
+
+try:
+    from config import PRINCIPAL_CACHE_TTL  # type: ignore
+except ImportError:
+    PRINCIPAL_CACHE_TTL = 30
+
+# email -> (expires_at, principal); shared by the requests of this process
+_principal_cache = {}
+_principal_lock = threading.Lock()
+
+# Pending last_seen writes: email -> datetime, flushed by flush_last_seen()
+_last_seen_buffer = {}
+_last_seen_lock = threading.Lock()
 
 def get_ptero_id(email: str):
     """
@@ -129,6 +149,53 @@ def update_last_seen(email: str, everyone: bool = False):
         query = "UPDATE users SET last_seen = %s WHERE email = %s"
         DatabaseManager.execute_query(query, (datetime.datetime.now(), email))
 
+def record_last_seen(email: str):
+    """
+    Buffers a last seen update for the user; the write happens on the next flush.
+    
+    Repeated calls for the same user collapse into one row update. If the buffer
+    grows past LAST_SEEN_BUFFER_MAX it is flushed early in the background.
+    
+    Args:
+        email: User's email
+    
+    Returns:
+        None
+    """
+    with _last_seen_lock:
+        _last_seen_buffer[email] = datetime.datetime.now()
+        full = len(_last_seen_buffer) >= LAST_SEEN_BUFFER_MAX
+    if full:
+        submit("db", flush_last_seen)
+
+def flush_last_seen():
+    """
+    Writes all buffered last seen times in one batched update.
+    Runs every LAST_SEEN_FLUSH_INTERVAL seconds, at shutdown, and before the inactivity jobs.
+    
+    Returns:
+        int: Number of users written
+    """
+    global _last_seen_buffer
+    with _last_seen_lock:
+        pending, _last_seen_buffer = _last_seen_buffer, {}
+    if not pending:
+        return 0
+    
+    query = "UPDATE users SET last_seen = %s WHERE email = %s"
+    try:
+        DatabaseManager.execute_many(query, [(seen, email) for email, seen in pending.items()])
+    except Exception:
+        # Put the entries back unless a newer timestamp arrived meanwhile
+        with _last_seen_lock:
+            for email, seen in pending.items():
+                if _last_seen_buffer.get(email, seen) <= seen:
+                    _last_seen_buffer[email] = seen
+        raise
+    return len(pending)
+
+atexit.register(flush_last_seen)
+
 def get_last_seen(email: str):
     """
     Returns datetime object of when user with that email was last seen.
@@ -139,10 +206,99 @@ def get_last_seen(email: str):
     Returns:
         datetime.datetime: Last seen time
     """
+    with _last_seen_lock:
+        buffered = _last_seen_buffer.get(email)
+    if buffered is not None:
+        return (buffered,)
     query = "SELECT last_seen FROM users WHERE email = %s"
     result = DatabaseManager.execute_query(query, (email,))
     return result
 
+def get_principal(email: str):
+    """
+    Returns the authorization-relevant fields of a user, loaded in one query.
+    
+    Memoised in flask.g for the rest of the request and cached across requests for
+    PRINCIPAL_CACHE_TTL seconds. Call invalidate_principal() after changing any of
+    these fields; it reaches every process through managers.cache_sync. Credits
+    changed by the hourly billing run are only refreshed when the entry expires.
+    
+    Args:
+        email: User's email
+    
+    Returns:
+        dict: id, email, role, suspended, verified, credits, pterodactyl_id
+        None: If user not found
+    """
+    memo = None
+    if has_request_context():
+        memo = g.setdefault('_principals', {})
+        if email in memo:
+            return memo[email]
+    
+    with _principal_lock:
+        cached = _principal_cache.get(email)
+    if cached is not None and cached[0] > time.monotonic():
+        principal = cached[1]
+    else:
+        principal = None
+        query = "SELECT id, role, suspended, email_verified_at, credits, pterodactyl_id FROM users WHERE email = %s"
+        result = DatabaseManager.execute_query(query, (email,))
+        if result:
+            principal = {
+                "id": result[0],
+                "email": email,
+                "role": result[1],
+                "suspended": bool(result[2]),
+                "verified": result[3] is not None,
+                "credits": result[4],
+                "pterodactyl_id": result[5]
+            }
+            with _principal_lock:
+                _principal_cache[email] = (time.monotonic() + PRINCIPAL_CACHE_TTL, principal)
+    
+    if memo is not None:
+        memo[email] = principal
+    return principal
+
+def _invalidate_principal_locally(user_id: int = None):
+    with _principal_lock:
+        if user_id is None:
+            _principal_cache.clear()
+            return
+        for email, (_, principal) in list(_principal_cache.items()):
+            if principal["id"] == user_id:
+                del _principal_cache[email]
+
+
+# Other processes drop their copies when a user's role or status changes here
+register_handler("principal", _invalidate_principal_locally)
+
+
+def invalidate_principal(email: str):
+    """
+    Drops the cached principal for a user after a role, suspension, verification
+    or credit change, in this process right away and in the others within
+    CACHE_SYNC_INTERVAL seconds.
+    
+    Args:
+        email: User's email
+    
+    Returns:
+        None
+    """
+    if has_request_context():
+        g.setdefault('_principals', {}).pop(email, None)
+    with _principal_lock:
+        cached = _principal_cache.pop(email, None)
+    if cached is not None:
+        user_id = cached[1]["id"]
+    else:
+        row = get_id(email)
+        user_id = row[0] if row else None
+    # Unknown user id: every process clears all of its principals
+    publish("principal", user_id)
+
 def is_admin(email: str):
     """
     Checks if user is an admin.
@@ -153,9 +309,8 @@ def is_admin(email: str):
     Returns:
         bool: Whether user is an admin
     """
-    query = "SELECT role FROM users WHERE email = %s"
-    result = DatabaseManager.execute_query(query, (email,))
-    return result and result[0] == "admin"
+    principal = get_principal(email)
+    return principal is not None and principal["role"] == "admin"
 
 def is_support(email: str):
     """
@@ -167,9 +322,8 @@ def is_support(email: str):
     Returns:
         bool: Whether user is a support staff.
     """
-    query = "SELECT role FROM users WHERE email = %s"
-    result = DatabaseManager.execute_query(query, (email,))
-    return result and result[0] == "support"
+    principal = get_principal(email)
+    return principal is not None and principal["role"] == "support"
 
 def check_if_user_suspended(pterodactyl_id: str):
     """
@@ -205,11 +359,11 @@ def instantly_delete_user(email: str, skip_email: bool = False):
     # Get Pterodactyl ID
     ptero_id = get_ptero_id(email)
     if not ptero_id:
-        threading.Thread(target=webhook_log, args=(f"User {email} not found in database", 2)).start()
+        webhook_log(f"User {email} not found in database", 2)
         return 404
         
     # Try to delete from Pterodactyl first
-    response = requests.delete(f"{PTERODACTYL_URL}api/application/users/{ptero_id[0]}", headers=HEADERS, timeout=60)
+    response = ptero.delete(f"api/application/users/{ptero_id[0]}")
     
     # If Pterodactyl deletion succeeded or user not found in panel, delete locally
     if response.status_code == 204 or response.status_code == 404:
@@ -230,7 +384,7 @@ def instantly_delete_user(email: str, skip_email: bool = False):
                 from .email_manager import send_email
                 from flask import current_app
                 message = f"Your account has been deleted from our system. If you believe this was done in error, please contact support."
-                threading.Thread(target=send_email, args=(email, "Account Deleted", message, current_app._get_current_object())).start()
+                send_email(email, "Account Deleted", message, current_app._get_current_object())
                 
             return 204
         else:
@@ -250,7 +404,7 @@ def delete_user(pterodactyl_id: int):
     Returns:
         bool: True if successful, False otherwise
     """
-    response = requests.delete(f"{PTERODACTYL_URL}api/application/users/{pterodactyl_id}", headers=HEADERS, timeout=60)
+    response = ptero.delete(f"api/application/users/{pterodactyl_id}")
     if response.status_code == 204:
         return True
     return False
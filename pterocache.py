@@ -1,65 +1,212 @@
 
 
+import hashlib
+import random
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from config import *
 import requests
-from security import safe_requests
+
+try:
+    from config import PTEROCACHE_REFRESH_INTERVAL  # type: ignore
+except ImportError:
+    PTEROCACHE_REFRESH_INTERVAL = 60
+
+# Eggs almost never change; nodes are polled often to track "full" renames
+try:
+    from config import PTEROCACHE_EGG_INTERVAL  # type: ignore
+except ImportError:
+    PTEROCACHE_EGG_INTERVAL = 900
+
+try:
+    from config import PTEROCACHE_EGG_WORKERS  # type: ignore
+except ImportError:
+    PTEROCACHE_EGG_WORKERS = 4
+
+try:
+    from config import PTEROCACHE_REFRESH_JITTER  # type: ignore
+except ImportError:
+    PTEROCACHE_REFRESH_JITTER = 0.1
+
 
 class PteroCache():
-    
+    """
+    Shared, background-refreshed cache of eggs and nodes.
+
+    PteroCache() always returns the same instance. Creating it does no I/O; the daemon
+    refresh thread is started by start() (app.py) or by the first read. It refreshes nodes every
+    PTEROCACHE_REFRESH_INTERVAL seconds and eggs every PTEROCACHE_EGG_INTERVAL seconds
+    (each +/- PTEROCACHE_REFRESH_JITTER), building a new snapshot and swapping it in with
+    one assignment, so readers never block or see a half-built list. Responses are
+    content-hashed and the lists are only rebuilt when something changed. If a refresh
+    fails the last good values are kept. Until the first refresh completes the lists
+    are empty and `ready` is False.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
     def __init__(self) -> None:
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self._initialized = True
+
+        # Imported here: managers imports this module while the package is still initialising
+        from managers.ptero_client import ptero
+        self.ptero = ptero
         self.HEADERS = {"Authorization": f"Bearer {PTERODACTYL_ADMIN_KEY}",
            'Accept': 'application/json',
            'Content-Type': 'application/json'}
-        self.egg_cache = None
-        self.available_nodes = None
-        self.all_nodes = None
-        self.update_all()
-        
-
-    def update_all(self):
-        self.update_egg_cache()
-        self.update_node_cache()
-    
-
-    def fetch_eggs(self, nest_id, results):
-        """ Fetch eggs from a given nest and store the response """
-        try:
-            response = safe_requests.get(
-                f"{PTERODACTYL_URL}api/application/nests/{nest_id}/eggs",
-                headers=self.HEADERS,
-                timeout=60,
-            )
-            response.raise_for_status()
-            results.append(response.json())  # Append the response data to the shared list
-        except requests.RequestException as e:
-            print(f"Error fetching eggs for nest {nest_id}: {e}")
+        self._snapshot = {"egg_cache": [], "available_nodes": [], "all_nodes": []}
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._metrics = {"refreshes": 0, "failures": 0, "last_duration": None, "total_duration": 0.0, "last_success": None,
+                         "egg_refreshes": 0, "node_refreshes": 0, "unchanged": 0}
+        # Content hashes of the last responses used to build each list
+        self._egg_hash = None
+        self._node_hash = None
+        self._executor = ThreadPoolExecutor(max_workers=PTEROCACHE_EGG_WORKERS, thread_name_prefix="pterocache-eggs")
+        self._thread = None
+
+    def start(self):
+        """ Starts the refresh thread unless it is already running """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._instance_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="pterocache-refresh", daemon=True)
+                self._thread.start()
+
+    @property
+    def ready(self):
+        """ True once the egg and node lists have been loaded at least once """
+        return self._metrics["last_success"] is not None
+
+    @property
+    def egg_cache(self):
+        self.start()
+        return self._snapshot["egg_cache"]
+
+    @property
+    def available_nodes(self):
+        self.start()
+        return self._snapshot["available_nodes"]
+
+    @property
+    def all_nodes(self):
+        self.start()
+        return self._snapshot["all_nodes"]
+
+    @staticmethod
+    def _jittered(interval):
+        return interval * random.uniform(1 - PTEROCACHE_REFRESH_JITTER, 1 + PTEROCACHE_REFRESH_JITTER)
+
+    def _run(self):
+        next_eggs = next_nodes = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            eggs_due = now >= next_eggs
+            nodes_due = now >= next_nodes
+            if eggs_due or nodes_due:
+                self.update_all(eggs=eggs_due, nodes=nodes_due)
+                if eggs_due:
+                    next_eggs = time.monotonic() + self._jittered(PTEROCACHE_EGG_INTERVAL)
+                if nodes_due:
+                    next_nodes = time.monotonic() + self._jittered(PTEROCACHE_REFRESH_INTERVAL)
+            self._stop.wait(max(0.0, min(next_eggs, next_nodes) - time.monotonic()))
+
+    def stop(self):
+        self._stop.set()
+
+    def update_all(self, eggs=True, nodes=True):
+        """ Refresh eggs and/or nodes, swapping in whatever part changed """
+        with self._refresh_lock:
+            started = time.perf_counter()
+            snapshot = dict(self._snapshot)
+            failed = False
+            changed = False
+
+            if eggs:
+                self._metrics["egg_refreshes"] += 1
+                egg_list = self.update_egg_cache()
+                if egg_list is False:
+                    failed = True
+                elif egg_list is not None:
+                    snapshot["egg_cache"] = egg_list
+                    changed = True
+            if nodes:
+                self._metrics["node_refreshes"] += 1
+                node_lists = self.update_node_cache()
+                if node_lists is False:
+                    failed = True
+                elif node_lists is not None:
+                    snapshot["available_nodes"], snapshot["all_nodes"] = node_lists
+                    changed = True
+
+            if changed:
+                self._snapshot = snapshot
+            elif not failed:
+                self._metrics["unchanged"] += 1
+
+            duration = time.perf_counter() - started
+            self._metrics["refreshes"] += 1
+            self._metrics["last_duration"] = duration
+            self._metrics["total_duration"] += duration
+            if failed:
+                self._metrics["failures"] += 1
+            else:
+                self._metrics["last_success"] = time.time()
+
+    def metrics(self):
+        """ Refresh counts and latency (seconds) """
+        metrics = dict(self._metrics)
+        metrics["avg_duration"] = metrics["total_duration"] / metrics["refreshes"] if metrics["refreshes"] else None
+        return metrics
+
+    def fetch_eggs(self, nest_id):
+        """ Fetch eggs from a given nest, returns the response """
+        response = self.ptero.get(f"api/application/nests/{nest_id}/eggs")
+        response.raise_for_status()
+        return response
 
     def update_egg_cache(self):
+        """
+        Returns the new egg list, None if nothing changed since the last build,
+        or False if any nest couldn't be fetched
+        """
         disabled_nests = {15, 23, 19}
         disabled_eggs = {55, 3}
-        
+
         try:
             available_eggs = []
-            nests = safe_requests.get(f"{PTERODACTYL_URL}api/application/nests", headers=self.HEADERS, timeout=60)
+            nests = self.ptero.get("api/application/nests")
             nests.raise_for_status()
             nests_data = nests.json()
 
-            threads = []
-            results = []  # Shared list for storing API responses
-            
-            for nest in nests_data.get('data', []):
-                nest_id = nest['attributes']['id']
-                if nest_id not in disabled_nests:
-                    thread = threading.Thread(target=self.fetch_eggs, args=(nest_id, results))
-                    threads.append(thread)
-                    thread.start()
-
-            for thread in threads:
-                thread.join()
-
-            # Process results after all threads complete
-            for data in results:
+            nest_ids = [nest['attributes']['id'] for nest in nests_data.get('data', [])
+                        if nest['attributes']['id'] not in disabled_nests]
+            # Bounded pool instead of a thread per nest; map keeps nest order stable for hashing
+            responses = list(self._executor.map(self.fetch_eggs, nest_ids))
+
+            digest = hashlib.sha256()
+            for response in responses:
+                digest.update(response.content)
+            content_hash = digest.hexdigest()
+            if content_hash == self._egg_hash:
+                return None
+
+            # Process results after all nests are fetched
+            for response in responses:
+                data = response.json()
                 for egg in data.get('data', []):
                     attributes = egg['attributes']
                     if attributes['id'] not in disabled_eggs:
@@ -70,19 +217,35 @@ class PteroCache():
                             "startup": attributes['startup']
                         })
 
-            self.egg_cache = available_eggs
+            self._egg_hash = content_hash
+            return available_eggs
 
-        except (requests.RequestException, KeyError) as e:
+        except (requests.RequestException, KeyError, ValueError) as e:
+            # A partial list would hide eggs, keep the previous one instead
             print(f"Error updating egg cache: {e}")
-            return None
-            
+            return False
+
     def update_node_cache(self):
-        available_nodes = []
-        all_nodes = []
-        nodes = safe_requests.get(f"{PTERODACTYL_URL}api/application/nodes", headers=self.HEADERS, timeout=60).json()
-        for node in nodes['data']:
-            all_nodes.append({"node_id": node['attributes']['id'], "name": node['attributes']['name']})
-            if "full" not in node['attributes']['name'].lower():
-                available_nodes.append({"node_id": node['attributes']['id'], "name": node['attributes']['name']})
-        self.available_nodes = available_nodes
-        self.all_nodes = all_nodes
+        """
+        Returns (available_nodes, all_nodes), None if nothing changed since the
+        last build, or False on error
+        """
+        try:
+            available_nodes = []
+            all_nodes = []
+            nodes = self.ptero.get("api/application/nodes")
+            nodes.raise_for_status()
+            content_hash = hashlib.sha256(nodes.content).hexdigest()
+            if content_hash == self._node_hash:
+                return None
+
+            for node in nodes.json()['data']:
+                all_nodes.append({"node_id": node['attributes']['id'], "name": node['attributes']['name']})
+                if "full" not in node['attributes']['name'].lower():
+                    available_nodes.append({"node_id": node['attributes']['id'], "name": node['attributes']['name']})
+            self._node_hash = content_hash
+            return available_nodes, all_nodes
+
+        except (requests.RequestException, KeyError, ValueError) as e:
+            print(f"Error updating node cache: {e}")
+            return False
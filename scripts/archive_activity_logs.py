@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+CLI: Activity Log Archival
+========================================
+
+Exports activity logs from whole months older than the retention period to
+gzipped JSONL archives and deletes them from the activity_logs table.
+
+Usage:
+  python scripts/archive_activity_logs.py              # archive and prune
+  python scripts/archive_activity_logs.py --dry-run    # only count rows that would be archived
+  python scripts/archive_activity_logs.py --days 180   # override ACTIVITY_LOG_RETENTION_DAYS
+
+Notes:
+- The app runs the same job daily.
+- Archives are written to ACTIVITY_LOG_ARCHIVE_DIR (or --archive-dir) as
+  activity_logs-YYYY-MM-<first id>.jsonl.gz, one file per month per batch.
+  Relative directories are resolved against the project root.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so imports like `managers.*` work when running directly
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from managers.maintenance import archive_activity_logs, ACTIVITY_LOG_RETENTION_DAYS, ACTIVITY_LOG_ARCHIVE_DIR
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archive and prune old activity logs")
+    parser.add_argument("--days", type=int, default=ACTIVITY_LOG_RETENTION_DAYS, help="Retention period in days")
+    parser.add_argument("--archive-dir", default=ACTIVITY_LOG_ARCHIVE_DIR, help="Directory for the archive files")
+    parser.add_argument("--dry-run", action="store_true", help="Only count rows that would be archived")
+    args = parser.parse_args()
+
+    report = archive_activity_logs(retention_days=args.days, archive_dir=args.archive_dir, dry_run=args.dry_run)
+    action = "Would archive" if args.dry_run else "Archived"
+    print(f"{action} {report['rows']} activity logs created before {report['cutoff']:%Y-%m-%d}")
+    if report["months"]:
+        print(f"Months: {', '.join(report['months'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,8 +12,7 @@ This CLI prints counts for:
 
 It reuses existing system logic:
 - convert_to_product() from managers.credit_manager
-- HEADERS from managers.utils
-- PTERODACTYL_URL from config
+- The shared Pterodactyl client (managers.ptero_client)
 - DatabaseManager for role lookups
 
 Usage:
@@ -26,7 +25,7 @@ Notes:
 """
 
 import sys
-from typing import Dict, Tuple
+from typing import Dict
 from pathlib import Path
 
 # Ensure project root is on sys.path so imports like `managers.*` work when running directly
@@ -36,22 +35,12 @@ if str(PROJECT_ROOT) not in sys.path:
 
 from managers.credit_manager import convert_to_product
 from managers.database_manager import DatabaseManager
-from managers.utils import HEADERS
-from security import safe_requests
-from config import PTERODACTYL_URL
+from managers.ptero_client import ptero, PteroPageError
 
 
-def fetch_all_servers() -> Tuple[int, list]:
-    """Fetch all servers from Pterodactyl. Returns (status_code, data_list)."""
-    resp = safe_requests.get(
-        f"{PTERODACTYL_URL}api/application/servers?per_page=100000",
-        headers=HEADERS,
-        timeout=60,
-    )
-    if resp.status_code != 200:
-        return resp.status_code, []
-    payload = resp.json() or {}
-    return 200, payload.get("data", [])
+def fetch_all_servers() -> list:
+    """Fetch all servers from Pterodactyl, page by page. Raises PteroPageError on failure."""
+    return list(ptero.iter_pages("api/application/servers"))
 
 
 essential_user_fields = ("id", "email")
@@ -60,11 +49,7 @@ def fetch_user_email(user_id: int, cache: Dict[int, str]) -> str:
     """Map Pterodactyl user_id -> email using API, cached to avoid repeated calls."""
     if user_id in cache:
         return cache[user_id]
-    resp = safe_requests.get(
-        f"{PTERODACTYL_URL}api/application/users/{user_id}",
-        headers=HEADERS,
-        timeout=60,
-    )
+    resp = ptero.get(f"api/application/users/{user_id}")
     if resp.status_code != 200:
         cache[user_id] = ""
         return ""
@@ -92,9 +77,10 @@ def get_role_by_email(email: str, cache: Dict[str, str]) -> str:
 
 
 def main() -> int:
-    status, servers = fetch_all_servers()
-    if status != 200:
-        print(f"Error: Failed to fetch servers from Pterodactyl (status {status})")
+    try:
+        servers = fetch_all_servers()
+    except PteroPageError as e:
+        print(f"Error: Failed to fetch servers from Pterodactyl ({e})")
         return 1
 
     total_servers = len(servers)
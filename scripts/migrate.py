@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+CLI: Schema Migrations
+========================================
+
+Applies pending schema migrations (managers.migrations.MIGRATIONS) and can
+check that the registered hot queries are served by an index.
+
+Usage:
+  python scripts/migrate.py            # apply pending migrations
+  python scripts/migrate.py --check    # apply, then EXPLAIN hot queries (exit 1 on a full scan)
+
+Notes:
+- Safe to run repeatedly; applied versions are recorded in schema_migrations.
+- This is the only place migrations are applied: the app refuses to start while
+  any are pending. Run it once per deploy, before restarting the workers.
+- Concurrent runs are serialized; the second one exits with status 2.
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so imports like `managers.*` work when running directly
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from managers.migrations import apply_migrations, check_hot_queries, MigrationLockError
+
+
+def main() -> int:
+    try:
+        applied = apply_migrations()
+    except MigrationLockError as e:
+        print(str(e))
+        return 2
+    if applied:
+        print(f"Applied migrations: {', '.join(applied)}")
+    else:
+        print("Schema is up to date")
+
+    if "--check" in sys.argv[1:]:
+        failures = check_hot_queries()
+        if failures:
+            print("")
+            print("Hot queries without an index:")
+            for name, reason in failures:
+                print(f"- {name}: {reason}")
+            return 1
+        print("All hot queries use an index")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
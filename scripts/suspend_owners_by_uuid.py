@@ -10,9 +10,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from managers.database_manager import DatabaseManager
-from managers.utils import HEADERS
-from config import PTERODACTYL_URL
-from security import safe_requests
+from managers.ptero_client import ptero, PteroPageError
 
 
 def read_uuid_file(path: Path) -> List[str]:
@@ -20,22 +18,14 @@ def read_uuid_file(path: Path) -> List[str]:
         return [line.strip() for line in handle if line.strip()]
 
 
-def fetch_target_servers(uuids: Set[str]) -> Tuple[int, Dict[str, dict]]:
-    resp = safe_requests.get(
-        f"{PTERODACTYL_URL}api/application/servers?per_page=100000",
-        headers=HEADERS,
-        timeout=60,
-    )
-    if resp.status_code != 200:
-        return resp.status_code, {}
-    payload = resp.json() or {}
+def fetch_target_servers(uuids: Set[str]) -> Dict[str, dict]:
     result: Dict[str, dict] = {}
-    for entry in payload.get("data", []):
+    for entry in ptero.iter_pages("api/application/servers"):
         attributes = entry.get("attributes", {})
         server_uuid = attributes.get("uuid")
         if server_uuid in uuids and server_uuid not in result:
             result[server_uuid] = attributes
-    return 200, result
+    return result
 
 
 def suspend_panel_user(panel_id: int, apply: bool) -> Tuple[str, str]:
@@ -75,9 +65,10 @@ def main() -> int:
         print("No UUIDs to process.")
         return 0
 
-    status, servers = fetch_target_servers(set(uuids))
-    if status != 200:
-        print(f"Failed to fetch servers from Pterodactyl (status {status}).")
+    try:
+        servers = fetch_target_servers(set(uuids))
+    except PteroPageError as e:
+        print(f"Failed to fetch servers from Pterodactyl ({e}).")
         return 1
 
     processed_users: Set[int] = set()
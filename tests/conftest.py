@@ -0,0 +1,151 @@
+"""
+Test Fixtures
+=================
+
+This module prepares the managers package for tests without a live panel or database:
+- A config module built from configexample.py (blank values become empty strings)
+- The products module from productsexample.py
+- A fake database connection behind DatabaseManager.get_connection, so
+  execute_query() and transaction() run their real commit/rollback logic
+
+Run the suite from the project root:
+    python -m pytest -q
+"""
+
+import importlib.util
+import os
+import re
+import sys
+import types
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def _install_config():
+    with open(os.path.join(PROJECT_ROOT, "configexample.py")) as f:
+        source = f.read()
+    source = re.sub(r"^(\w+)(\s*:\s*\w+)?\s*=[ \t]*$", r'\1 = ""', source, flags=re.M)
+    config = types.ModuleType("config")
+    exec(compile(source, "configexample.py", "exec"), config.__dict__)
+    # Required by managers.logging but missing from the example
+    config.TICKET_WEBHOOK_URL = ""
+    sys.modules["config"] = config
+
+
+def _install_products():
+    spec = importlib.util.spec_from_file_location("products", os.path.join(PROJECT_ROOT, "productsexample.py"))
+    products = importlib.util.module_from_spec(spec)
+    sys.modules["products"] = products
+    spec.loader.exec_module(products)
+
+
+if "config" not in sys.modules:
+    _install_config()
+if "products" not in sys.modules:
+    _install_products()
+
+
+def normalize(sql: str) -> str:
+    """ Collapses whitespace so tests can match statements by fragment """
+    return " ".join(sql.split())
+
+
+class FakeCursor:
+    def __init__(self, db: "FakeDatabase", connection: "FakeConnection"):
+        self.db = db
+        self.connection = connection
+        self.rowcount = -1
+        self._rows = []
+
+    def execute(self, query, values=None):
+        sql = normalize(query)
+        self.connection.statements.append((sql, values))
+        rows, rowcount, error = self.db.answer(sql)
+        if error is not None:
+            raise error
+        self._rows = list(rows)
+        self.rowcount = rowcount
+
+    def executemany(self, query, values):
+        sql = normalize(query)
+        self.connection.statements.append((sql, list(values)))
+        rows, rowcount, error = self.db.answer(sql)
+        if error is not None:
+            raise error
+        self.rowcount = rowcount
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db: "FakeDatabase"):
+        self.db = db
+        self.statements = []
+
+    def commit(self):
+        self.db.committed.append(self.statements)
+        self.statements = []
+
+    def rollback(self):
+        self.db.rolled_back.append(self.statements)
+        self.statements = []
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """
+    Records statements per connection and answers them from scripted results.
+
+    Attributes:
+        committed: Statement lists, one per commit, as (sql, values)
+        rolled_back: Statement lists discarded by a rollback
+    """
+
+    def __init__(self):
+        self.committed = []
+        self.rolled_back = []
+        self._script = []
+
+    def on(self, fragment: str, rows=(), rowcount: int = 0, error: Exception = None) -> None:
+        """
+        Answers the next statement containing `fragment`. Each scripted answer is
+        used once, in the order given; unscripted statements return no rows.
+        """
+        self._script.append((normalize(fragment), rows, rowcount, error))
+
+    def answer(self, sql: str):
+        for index, (fragment, rows, rowcount, error) in enumerate(self._script):
+            if fragment in sql:
+                del self._script[index]
+                return rows, rowcount, error
+        return (), 0, None
+
+    def get_connection(self, database=None):
+        connection = FakeConnection(self)
+        return connection, FakeCursor(self, connection)
+
+    @property
+    def statements(self):
+        """ Every committed statement, in order """
+        return [statement for unit in self.committed for statement in unit]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    from managers.database_manager import DatabaseManager
+
+    fake = FakeDatabase()
+    monkeypatch.setattr(DatabaseManager, "get_connection", fake.get_connection)
+    return fake
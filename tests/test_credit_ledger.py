@@ -0,0 +1,115 @@
+import pytest
+
+from managers import credit_ledger
+from managers.credit_ledger import apply_credits, apply_credits_bulk, charged_in_batch
+
+
+def test_debit_is_guarded_by_the_balance(db):
+    db.on("UPDATE users", rowcount=1)
+    db.on("SELECT credits FROM users", rows=[(15.0,)])
+
+    assert apply_credits("a@example.com", -5, "server_create") == 15.0
+
+    (update, update_values), (insert, insert_values), _ = db.statements
+    assert "WHERE email = %s AND credits >= %s" in update
+    assert update_values == (-5.0, "a@example.com", 5.0)
+    assert insert.startswith("INSERT INTO credit_transactions")
+    assert insert_values == (-5.0, "server_create", "a@example.com")
+    assert len(db.committed) == 1
+
+
+def test_rejected_debit_writes_no_ledger_entry(db):
+    db.on("UPDATE users", rowcount=0)
+
+    assert apply_credits("a@example.com", -50, "server_create") is None
+
+    assert len(db.statements) == 1
+    assert "credit_transactions" not in db.statements[0][0]
+
+
+def test_allowed_overdraft_clamps_at_zero(db):
+    db.on("UPDATE users", rowcount=1)
+    db.on("SELECT credits FROM users", rows=[(0.0,)])
+
+    assert apply_credits("a@example.com", -50, "refund", allow_negative=True) == 0.0
+
+    update, values = db.statements[0]
+    assert "GREATEST(credits + %s, 0)" in update
+    assert "credits >=" not in update
+    assert values == (-50.0, "a@example.com")
+
+
+def test_changes_on_a_callers_cursor_commit_with_its_transaction(db):
+    from managers.database_manager import DatabaseManager
+
+    db.on("UPDATE users", rowcount=1)
+    db.on("SELECT credits FROM users", rows=[(9.0,)])
+    db.on("UPDATE users", rowcount=1)
+    db.on("SELECT credits FROM users", rows=[(10.0,)])
+
+    with DatabaseManager.transaction() as cursor:
+        assert apply_credits("a@example.com", -1, "server_create", cursor=cursor) == 9.0
+        assert db.committed == []
+        assert apply_credits("a@example.com", 1, "server_create_refund", allow_negative=True, cursor=cursor) == 10.0
+
+    assert len(db.committed) == 1
+    assert len(db.committed[0]) == 6
+
+
+def test_bulk_collapses_repeated_emails_and_drops_zero_totals(db):
+    db.on("UPDATE users u JOIN", rowcount=2)
+
+    updated = apply_credits_bulk(
+        [("a@example.com", -1), ("b@example.com", 2), ("a@example.com", -1.5), ("c@example.com", 0)],
+        "hourly_billing",
+        batch_key="hourly_billing:first"
+    )
+
+    assert updated == 2
+    (update, update_values), (insert, insert_values) = db.statements
+    assert update_values == ("a@example.com", -2.5, "b@example.com", 2.0, "hourly_billing:first")
+    assert insert_values == ("hourly_billing", "hourly_billing:first", "a@example.com", -2.5, "b@example.com", 2.0, "hourly_billing:first")
+
+
+def test_bulk_skips_users_already_charged_in_the_batch(db):
+    apply_credits_bulk([("a@example.com", -1)], "hourly_billing", batch_key="hourly_billing:20240101120000")
+
+    for sql, values in db.statements:
+        assert "LEFT JOIN credit_transactions t ON t.batch_key = %s AND t.email = u.email" in sql
+        assert "WHERE t.id IS NULL" in sql
+        assert values[-1] == "hourly_billing:20240101120000"
+
+
+def test_bulk_commits_each_chunk_on_its_own(db, monkeypatch):
+    monkeypatch.setattr(credit_ledger, "BULK_CHUNK_SIZE", 2)
+    for rowcount in (2, 2, 1):
+        db.on("UPDATE users u JOIN", rowcount=rowcount)
+
+    updated = apply_credits_bulk([(f"user{i}@example.com", -1) for i in range(5)], "hourly_billing")
+
+    assert updated == 5
+    assert len(db.committed) == 3
+    assert all(len(unit) == 2 for unit in db.committed)
+
+
+def test_failed_chunk_is_rolled_back_and_earlier_chunks_stay_committed(db, monkeypatch):
+    monkeypatch.setattr(credit_ledger, "BULK_CHUNK_SIZE", 2)
+    db.on("UPDATE users u JOIN", rowcount=2)
+    db.on("UPDATE users u JOIN", error=RuntimeError("lock wait timeout"))
+
+    with pytest.raises(RuntimeError):
+        apply_credits_bulk([(f"user{i}@example.com", -1) for i in range(4)], "hourly_billing", batch_key="k")
+
+    assert len(db.committed) == 1
+    assert len(db.rolled_back) == 1
+
+
+def test_bulk_without_changes_touches_nothing(db):
+    assert apply_credits_bulk([("a@example.com", 0)], "hourly_billing") == 0
+    assert db.statements == []
+
+
+def test_charged_in_batch_lists_emails_with_a_ledger_entry(db):
+    db.on("FROM credit_transactions WHERE batch_key", rows=[("a@example.com",), ("b@example.com",)])
+
+    assert charged_in_batch("hourly_billing:first") == {"a@example.com", "b@example.com"}
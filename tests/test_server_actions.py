@@ -0,0 +1,128 @@
+import datetime
+
+import pytest
+from mysql.connector.errors import IntegrityError
+
+from managers import server_actions
+from managers.server_actions import ACTION_BACKOFF_BASE, ACTION_MAX_ATTEMPTS, WORKER_ID
+
+
+@pytest.fixture(autouse=True)
+def webhook_logs(monkeypatch):
+    logs = []
+    monkeypatch.setattr(server_actions, "webhook_log", lambda message, *args, **kwargs: logs.append(message))
+    return logs
+
+
+def updates(db):
+    return [(sql, values) for sql, values in db.statements if sql.startswith("UPDATE server_actions")]
+
+
+def test_claim_caps_actions_per_node(db, monkeypatch):
+    monkeypatch.setattr(server_actions, "ACTION_NODE_CONCURRENCY", 2)
+    db.on("SELECT id, node_id FROM server_actions", rows=[(1, 7), (2, 7), (3, 7), (4, 8)])
+    db.on("SELECT id, action, server_id, reason, attempts", rows=[(1, "suspend", 101, "out_of_credits", 0)])
+
+    rows = server_actions._claim(10)
+
+    assert rows == [(1, "suspend", 101, "out_of_credits", 0)]
+    (sql, values), = updates(db)
+    assert "SET status = 'running', idempotency_key = NULL" in sql
+    assert "AND status = 'pending'" in sql
+    assert values[0] == WORKER_ID
+    assert values[2:] == (1, 2, 4)
+
+
+def test_done_and_obsolete_are_final(db):
+    assert server_actions._finish(1, "suspend", 101, 0, "done", None) == "done"
+    assert server_actions._finish(2, "unsuspend", 102, 3, "obsolete", "owner is suspended") == "obsolete"
+
+    assert [values for _, values in updates(db)] == [("done", 1, None, 1), ("obsolete", 4, "owner is suspended", 2)]
+
+
+def test_failure_is_requeued_with_exponential_backoff(db):
+    before = datetime.datetime.now()
+
+    assert server_actions._finish(1, "suspend", 101, 2, "error", "panel returned 500") == "retry"
+
+    (sql, values), = updates(db)
+    assert "SET status = 'pending', idempotency_key = %s" in sql
+    key, attempts, error, next_attempt_at, action_id = values
+    assert (key, attempts, error, action_id) == ("server:101", 3, "panel returned 500", 1)
+    delay = (next_attempt_at - before).total_seconds()
+    assert ACTION_BACKOFF_BASE * 4 <= delay < ACTION_BACKOFF_BASE * 4 + 5
+
+
+def test_retry_yields_to_a_newer_pending_action(db):
+    db.on("SELECT id FROM server_actions WHERE idempotency_key", rows=[(9,)])
+
+    assert server_actions._finish(1, "suspend", 101, 0, "error", "panel returned 500") == "obsolete"
+
+    (sql, values), = updates(db)
+    assert "SET status = 'obsolete', last_error = 'superseded by a newer action'" in sql
+    assert values == (1,)
+
+
+def test_retry_that_races_a_newer_action_is_obsolete(db):
+    db.on("SET status = 'pending'", error=IntegrityError("Duplicate entry 'server:101'"))
+
+    assert server_actions._finish(1, "suspend", 101, 0, "error", "panel returned 500") == "obsolete"
+    assert "status = 'obsolete'" in updates(db)[-1][0]
+
+
+def test_last_attempt_is_dead_lettered(db, webhook_logs):
+    outcome = server_actions._finish(1, "delete", 101, ACTION_MAX_ATTEMPTS - 1, "error", "delete failed")
+
+    assert outcome == "dead"
+    (sql, values), = updates(db)
+    assert "SET status = 'dead'" in sql
+    assert values == (ACTION_MAX_ATTEMPTS, "delete failed", 1)
+    assert "dead-lettered" in webhook_logs[0]
+
+
+def test_exception_while_executing_counts_as_a_failure(db, monkeypatch):
+    def boom(action, server_id, reason):
+        raise RuntimeError()
+    monkeypatch.setattr(server_actions, "_execute", boom)
+
+    assert server_actions._process_one((1, "suspend", 101, "out_of_credits", 0)) == "retry"
+    assert updates(db)[0][1][2] == "RuntimeError"
+
+
+def test_dead_action_is_retried_with_fresh_attempts(db):
+    db.on("WHERE id = %s AND status = 'dead'", rows=[(101, "delete failed")])
+
+    assert server_actions.retry_action(1) is True
+
+    (_, values), = updates(db)
+    assert values[:3] == ("server:101", 0, "delete failed")
+
+
+def test_only_dead_actions_can_be_retried(db):
+    assert server_actions.retry_action(1) is False
+    assert updates(db) == []
+
+
+class PanelResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+@pytest.mark.parametrize("action, outcome", [("delete", "done"), ("suspend", "obsolete"), ("unsuspend", "obsolete")])
+def test_missing_server_closes_the_action(monkeypatch, action, outcome):
+    monkeypatch.setattr(server_actions.ptero, "get", lambda path, **kwargs: PanelResponse(404))
+
+    assert server_actions._execute(action, 101, "user_suspended")[0] == outcome
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+@pytest.mark.parametrize("action", ["delete", "suspend", "unsuspend"])
+def test_panel_failure_keeps_the_action_queued(db, monkeypatch, action, status):
+    monkeypatch.setattr(server_actions.ptero, "get", lambda path, **kwargs: PanelResponse(status))
+
+    assert server_actions._execute(action, 101, "user_suspended") == ("error", f"panel returned {status}")
+    assert server_actions._process_one((1, action, 101, "user_suspended", 0)) == "retry"
@@ -0,0 +1,170 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from managers import sweep
+from managers.sweep import Fleet, SweepPlan, billing_rule, inactive_free_rule, suspended_users_rule, unsuspend_rule
+
+# memory -> product; a price of 720 credits a month costs 1 credit an hour
+PRODUCTS = {
+    0: {"name": "Free", "price": 0},
+    1: {"name": "Small", "price": 720},
+    2: {"name": "Large", "price": 1440},
+}
+
+
+@pytest.fixture(autouse=True)
+def products(monkeypatch):
+    monkeypatch.setattr(sweep, "convert_to_products", lambda servers: [PRODUCTS[s['attributes']['limits']['memory']] for s in servers])
+
+
+def server(server_id, user, memory=1, suspended=False, updated_at=None, node=1):
+    return {"attributes": {
+        "id": server_id,
+        "user": user,
+        "name": f"server-{server_id}",
+        "node": node,
+        "suspended": suspended,
+        "updated_at": updated_at,
+        "limits": {"memory": memory},
+    }}
+
+
+def owner(email="a@example.com", credits=0.0, last_seen=None, suspended=False):
+    return {"email": email, "credits": credits, "last_seen": last_seen, "suspended": suspended}
+
+
+def run(fleet, *rules):
+    plan = SweepPlan()
+    for rule in rules:
+        plan._rule = rule.__name__
+        rule(fleet, plan)
+    return plan
+
+
+def planned(plan):
+    return [(action, server_id, reason) for action, server_id, _, reason, _ in plan.actions]
+
+
+def suspended_at(days):
+    return (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def test_billing_charges_what_the_owner_can_afford_and_suspends_the_rest():
+    fleet = Fleet([server(1, 10, memory=1), server(2, 10, memory=2)], {10: owner(credits=2.5)})
+
+    plan = run(fleet, billing_rule)
+
+    assert plan.charges == [("a@example.com", -1.0)]
+    assert planned(plan) == [("suspend", 2, "out_of_credits")]
+    assert fleet.owners[10]["credits"] == 1.5
+    assert [email for email, _, _ in plan.emails] == ["a@example.com"]
+
+
+def test_billing_ignores_suspended_servers_and_unknown_owners():
+    fleet = Fleet([server(1, 10, suspended=True), server(2, 11)], {10: owner(credits=5.0)})
+
+    plan = run(fleet, billing_rule)
+
+    assert plan.charges == []
+    assert plan.actions == []
+    assert "skipped 1 server owner" in plan.logs[0][0]
+
+
+def test_billing_retry_skips_owners_the_batch_already_charged():
+    # The failed attempt debited 2.0 of 2.5; the reloaded balance must not trigger suspensions
+    fleet = Fleet([server(1, 10, memory=2), server(2, 11)], {10: owner(credits=0.5), 11: owner("b@example.com", credits=3.0)})
+    plan = SweepPlan()
+    plan.charged = {"a@example.com"}
+
+    billing_rule(fleet, plan)
+
+    assert plan.charges == [("b@example.com", -1.0)]
+    assert plan.actions == []
+    assert fleet.owners[10]["credits"] == 0.5
+
+
+def test_unsuspend_restores_cheapest_servers_first_and_deletes_long_suspended_ones():
+    fleet = Fleet(
+        [server(1, 10, memory=2, suspended=True, updated_at=suspended_at(5)),
+         server(2, 10, memory=1, suspended=True, updated_at=suspended_at(5))],
+        {10: owner(credits=2.5)}
+    )
+
+    plan = run(fleet, unsuspend_rule)
+
+    assert planned(plan) == [("unsuspend", 2, "credits_available"), ("delete", 1, "suspended_too_long")]
+
+
+def test_unsuspend_keeps_recently_suspended_servers():
+    fleet = Fleet([server(1, 10, memory=2, suspended=True, updated_at=suspended_at(1))], {10: owner(credits=0.5)})
+
+    assert run(fleet, unsuspend_rule).actions == []
+
+
+def test_unsuspend_sees_balance_left_by_billing():
+    servers = [server(1, 10), server(2, 10, suspended=True, updated_at=suspended_at(1))]
+
+    alone = run(Fleet(servers, {10: owner(credits=1.5)}), unsuspend_rule)
+    after_billing = run(Fleet(servers, {10: owner(credits=1.5)}), billing_rule, unsuspend_rule)
+
+    assert planned(alone) == [("unsuspend", 2, "credits_available")]
+    assert after_billing.charges == [("a@example.com", -1.0)]
+    assert after_billing.actions == []
+
+
+def test_first_rule_to_claim_a_server_wins():
+    last_seen = datetime.datetime.now() - datetime.timedelta(days=16)
+    fleet = Fleet([server(1, 10, memory=0)], {10: owner(last_seen=last_seen, suspended=True)})
+
+    plan = run(fleet, suspended_users_rule, inactive_free_rule)
+
+    assert planned(plan) == [("delete", 1, "user_suspended")]
+    assert [rule for *_, rule in plan.actions] == ["suspended_users_rule"]
+
+
+def test_inactive_free_servers_are_suspended_then_deleted():
+    now = datetime.datetime.now()
+    fleet = Fleet(
+        [server(1, 10, memory=0), server(2, 11, memory=0), server(3, 12, memory=0), server(4, 11, memory=1)],
+        {
+            10: owner("recent@example.com", last_seen=now - datetime.timedelta(days=3)),
+            11: owner("idle@example.com", last_seen=now - datetime.timedelta(days=16)),
+            12: owner("gone@example.com", last_seen=now - datetime.timedelta(days=18)),
+        }
+    )
+
+    plan = run(fleet, inactive_free_rule)
+
+    assert planned(plan) == [("suspend", 2, "inactive_free_tier"), ("delete", 3, "inactive_free_tier")]
+    assert [email for email, _, _ in plan.emails] == ["idle@example.com"]
+
+
+def test_rollback_drops_a_rules_partial_work():
+    fleet = Fleet([server(1, 10), server(2, 10, memory=2)], {10: owner(credits=2.5)})
+    plan = SweepPlan()
+    checkpoint = plan.checkpoint(fleet)
+
+    billing_rule(fleet, plan)
+    plan.rollback(fleet, checkpoint)
+
+    assert (plan.charges, plan.actions, plan.emails, plan.logs) == ([], [], [], [])
+    assert fleet.owners[10]["credits"] == 2.5
+    assert plan.add_action("delete", fleet.servers[1], "user_suspended")
+
+
+def test_dry_run_writes_nothing_and_reports_actions_per_rule(db, monkeypatch, capsys):
+    flushed = []
+    monkeypatch.setattr(sweep, "flush_last_seen", lambda: flushed.append(True))
+    monkeypatch.setattr(sweep.inventory, "snapshot", lambda: SimpleNamespace(age=0, servers=[server(1, 10), server(2, 10, memory=2)]))
+    db.on("FROM users WHERE pterodactyl_id IS NOT NULL", rows=[(10, "a@example.com", 2.5, None, 0)])
+
+    report = sweep.run_sweep(["billing", "unsuspend"], dry_run=True)
+
+    assert flushed == []
+    assert db.committed == []
+    assert report["charges"] == [("a@example.com", -1.0)]
+    assert report["rule_actions"] == {"billing": 1, "unsuspend": 0}
+    assert set(report["timings"]["rules"]) == {"billing", "unsuspend"}
+    assert capsys.readouterr().out == ""
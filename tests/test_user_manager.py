@@ -0,0 +1,62 @@
+import pytest
+
+from managers import user_manager
+from managers.user_manager import get_principal, invalidate_principal
+
+USER_ROW = [(7, "admin", 0, None, 10.0, 70)]
+
+
+@pytest.fixture(autouse=True)
+def published(monkeypatch):
+    user_manager._principal_cache.clear()
+    entries = []
+    monkeypatch.setattr(user_manager, "publish", lambda scope, item_id=None: entries.append((scope, item_id)))
+    yield entries
+    user_manager._principal_cache.clear()
+
+
+def test_principal_is_cached_across_requests(db):
+    db.on("FROM users WHERE email", rows=USER_ROW)
+
+    assert get_principal("a@example.com")["role"] == "admin"
+    # A second load would find no scripted row and return None
+    assert get_principal("a@example.com")["role"] == "admin"
+
+
+def test_expired_principal_is_reloaded(db, monkeypatch):
+    monkeypatch.setattr(user_manager, "PRINCIPAL_CACHE_TTL", -1)
+    db.on("FROM users WHERE email", rows=USER_ROW)
+
+    assert get_principal("a@example.com") is not None
+    assert get_principal("a@example.com") is None
+
+
+def test_invalidation_is_published_to_every_process(db, published):
+    db.on("FROM users WHERE email", rows=USER_ROW)
+    get_principal("a@example.com")
+
+    invalidate_principal("a@example.com")
+
+    assert published == [("principal", 7)]
+    assert "a@example.com" not in user_manager._principal_cache
+
+
+def test_invalidating_an_uncached_user_looks_up_the_id(db, published):
+    db.on("SELECT id FROM users WHERE email", rows=[(9,)])
+
+    invalidate_principal("b@example.com")
+
+    assert published == [("principal", 9)]
+
+
+def test_published_invalidation_drops_the_users_entry(db):
+    db.on("FROM users WHERE email", rows=USER_ROW)
+    db.on("FROM users WHERE email", rows=[(8, "client", 0, None, 0.0, 80)])
+    get_principal("a@example.com")
+    get_principal("b@example.com")
+
+    user_manager._invalidate_principal_locally(7)
+
+    assert list(user_manager._principal_cache) == ["b@example.com"]
+    user_manager._invalidate_principal_locally(None)
+    assert user_manager._principal_cache == {}